@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Union
+from typing import Union
 from loguru import logger
 
 from app.redis.custom_redis import CustomRedis
@@ -8,35 +8,46 @@ from app.redis.redis_client import get_redis
 from app.api.typization.exceptions import HackathonsNotFoundException, HackathonNotFoundException
 from app.db.session_maker import db
 from app.api.utils.api_utils import exception_handler, generate_response_model
-from app.redis.redis_operations.hackathon import get_all_hackathons_data, get_hackathon_data
-from app.api.typization.responses import SHackathonInfo, SHackathons, ErrorResponse
+from app.redis.redis_operations.hackathon import get_hackathons_page_data, get_hackathon_data
+from app.api.typization.responses import SHackathonInfo, SHackathonsPage, ErrorResponse
+from app.api.typization.schemas import HackathonPageFilter
 
 router = APIRouter(prefix="/hackathons", tags=["Работа с хакатонами"])
 
 
 @router.get(
     path="/",
-    summary="Получить список хакатонов",
-    response_model=Union[List[SHackathons], ErrorResponse],
+    summary="Получить страницу списка хакатонов",
+    response_model=Union[SHackathonsPage, ErrorResponse],
     responses={
-        200: generate_response_model(description="Успешный запрос. Возвращает список хакатонов",
-                                     model=List[SHackathons]),
+        200: generate_response_model(description="Успешный запрос. Возвращает страницу хакатонов и курсор следующей",
+                                     model=SHackathonsPage),
         404: generate_response_model("Хакатоны не найдены"),
+        422: generate_response_model("Ошибка валидации входных данных"),
         500: generate_response_model()}
 )
 @exception_handler
 async def get_all_hackathons(
+        name: str | None = Query(None, max_length=64, description="Начало названия хакатона"),
+        after: int | None = Query(None, ge=0, description="Курсор: next_cursor предыдущей страницы"),
+        limit: int = Query(20, ge=1, le=100, description="Размер страницы"),
         session: AsyncSession = Depends(db.get_db),
         redis: CustomRedis = Depends(get_redis)
-) -> List[SHackathons]:
-    """Получить информацию о хакатонах"""
+) -> SHackathonsPage:
+    """Получить страницу хакатонов (по возрастанию ID)"""
     try:
 
-        hackathons = await get_all_hackathons_data(redis=redis, session=session)
-        if not hackathons:
+        hackathons_page = await get_hackathons_page_data(
+            redis=redis,
+            session=session,
+            filters=HackathonPageFilter(name_prefix=name),
+            after_id=after,
+            limit=limit
+        )
+        if not hackathons_page or not hackathons_page.items:
             raise HackathonsNotFoundException
 
-        return hackathons
+        return hackathons_page
 
     except Exception as e:
         logger.error(f"Ошибка при получении информации о хакатонах: {e}")
@@ -1,22 +1,27 @@
+import hmac
 from fastapi import APIRouter, Depends, Request, HTTPException
 from loguru import logger
 from typing import List, Union
 from aiogram.types import Update
 from aiogram.exceptions import TelegramBadRequest
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.redis.custom_redis import CustomRedis
+from app.redis.invalidation import invalidation_batch
 from app.redis.redis_client import get_redis
-from app.redis.redis_operations.user import redis_user_data, get_teams_data_by_user, invalidate_user_cache
-from app.api.typization.exceptions import UserNotFoundException, UserAlreadyExistsException
+from app.redis.update_queue import UpdateQueue
+from app.redis.redis_operations.user import redis_user_data, get_teams_data_by_user, invalidate_user_cache, \
+    get_user_bootstrap_data
+from app.api.typization.exceptions import UserNotFoundException, UserAlreadyExistsException, WebhookSecretException
 from app.db.dao import UserDAO
 from app.api.utils.api_utils import exception_handler, check_registration_for_app, generate_response_model
 from app.api.utils.auth_dep import fast_auth_user
 from app.api.typization.schemas import UserInfoUpdate, IdModel
 from app.api.typization.responses import SUser, ErrorResponse, SUserInfo, ProfileInfo, SUserCheckRegistration, \
-    SuccessResponse, STeam
+    SuccessResponse, STeam, SBootstrap
 from app.db.session_maker import db
-from config import bot, dp
+from config import bot, dp, settings
 
 router = APIRouter(tags=["Работа с пользователем и Telegram"])
 
@@ -24,22 +29,41 @@ router = APIRouter(tags=["Работа с пользователем и Telegram
 @router.post(
     path="/webhook",
     summary="Устанавливает вебхук для получения обновлений от Telegram",
+    response_model=Union[SuccessResponse, ErrorResponse],
     responses={
         200: generate_response_model(description="Успешная обработка обновления", model=SuccessResponse),
         400: generate_response_model("Некорректный запрос от Telegram."),
+        403: generate_response_model("Неверный секретный токен вебхука"),
         500: generate_response_model(),
     },
     response_description="Успешный ответ (обработка обновления завершена)."
 )
 @exception_handler
-async def webhook(request: Request) -> None:
-    """Эта функция принимает обновления от Telegram через вебхук
-    и отправляет их для дальнейшей обработки."""
+async def webhook(request: Request, redis: CustomRedis = Depends(get_redis)):
+    """Эта функция принимает обновления от Telegram через вебхук.
+    Запросы без секретного токена, заданного при установке вебхука, отклоняются.
+    В режиме очереди обновление только ставится в Redis Stream и Telegram сразу получает ответ,
+    а обрабатывают его обработчики процесса бота; иначе обновление обрабатывается прямо в запросе."""
+    secret_token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not settings.WEBHOOK_SECRET or not hmac.compare_digest(secret_token.encode(), settings.WEBHOOK_SECRET.encode()):
+        logger.warning(f"Запрос к вебхуку с неверным секретным токеном от {request.client.host if request.client else '?'}")
+        raise WebhookSecretException
+
     try:
-        logger.info("Обработка обновления...")
         update = Update.model_validate(await request.json(), context={"bot": bot})
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Некорректный запрос от Telegram. Проверьте формат данных.")
+
+    if settings.WEBHOOK_QUEUE:
+        queue = UpdateQueue(redis=redis, partitions=settings.WEBHOOK_QUEUE_PARTITIONS)
+        await queue.enqueue(update)
+        return SuccessResponse(message="Обновление поставлено в очередь")
+
+    try:
+        logger.info("Обработка обновления...")
         await dp.feed_update(bot, update)
         logger.info("Обновление обработано")
+        return SuccessResponse(message="Обновление обработано")
     except TelegramBadRequest:
         raise HTTPException(status_code=400, detail="Некорректный запрос от Telegram. Проверьте формат данных.")
 
@@ -77,7 +101,8 @@ async def register_user(
 
         await UserDAO(session).update(filters=IdModel(id=user.id), values=user_info)
 
-        await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_user=True)
+        async with invalidation_batch(redis=redis, session=session):
+            await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_user=True)
 
         return SuccessResponse(message="Пользователь успешно зарегистрирован")
 
@@ -151,3 +176,33 @@ async def get_my_profile(
     except Exception as e:
         logger.error(f"Ошибка при получении профиля пользователя: {e}")
         raise
+
+
+@router.get(
+    path="/me/bootstrap",
+    response_model=Union[SBootstrap, ErrorResponse],
+    summary="Получить стартовые данные Mini App одним запросом",
+    responses={
+        200: generate_response_model(description="Успешный запрос. Возвращает пользователя, его регистрацию, "
+                                                 "команды с ролями и количеством участников и входящие приглашения",
+                                     model=SBootstrap),
+        401: generate_response_model("Ошибка авторизации"),
+        404: generate_response_model("Пользователь не найден"),
+        500: generate_response_model()
+    }
+)
+@exception_handler
+async def get_bootstrap(
+        session: AsyncSession = Depends(db.get_db),
+        redis: CustomRedis = Depends(get_redis),
+        user: SUser = Depends(fast_auth_user)
+) -> SBootstrap:
+    """Заменяет запросы /my_profile, /register (GET), приглашений и проверок лидерства при запуске Mini App:
+    лидерство определяется по роли пользователя в каждой команде"""
+    try:
+
+        return await get_user_bootstrap_data(redis=redis, session=session, user=user)
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении стартовых данных пользователя: {e}")
+        raise
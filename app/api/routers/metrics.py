@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends
+from typing import Union
+from loguru import logger
+
+from app.redis.antiflood_stats import ANTIFLOOD_STATS_KEY
+from app.redis.custom_redis import CustomRedis
+from app.redis.redis_client import get_redis
+from app.api.utils.api_utils import exception_handler, generate_response_model
+from app.api.utils.auth_dep import admin_auth_user
+from app.api.typization.responses import SUser, SCacheStats, SDbPoolStats, SAntiFloodStats, ErrorResponse
+from app.db.database import engine
+
+router = APIRouter(prefix="/metrics", tags=["Служебные метрики"])
+
+
+@router.get(
+    path="/cache",
+    summary="Получить счетчики кэша текущего воркера (только администраторам)",
+    response_model=Union[SCacheStats, ErrorResponse],
+    responses={
+        200: generate_response_model(description="Успешный запрос. Возвращает счетчики кэша", model=SCacheStats),
+        401: generate_response_model("Ошибка авторизации"),
+        403: generate_response_model("Пользователь не является администратором"),
+        500: generate_response_model()
+    }
+)
+@exception_handler
+async def get_cache_metrics(
+        redis: CustomRedis = Depends(get_redis),
+        user: SUser = Depends(admin_auth_user)
+) -> SCacheStats:
+    """Возвращает счетчики попаданий, промахов и объединенных перестроений кэша"""
+    try:
+
+        return SCacheStats(**redis.cache_stats.as_dict())
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении метрик кэша: {e}")
+        raise
+
+
+@router.get(
+    path="/antiflood",
+    summary="Получить счетчики антифлуда всех процессов бота (только администраторам)",
+    response_model=Union[SAntiFloodStats, ErrorResponse],
+    responses={
+        200: generate_response_model(description="Успешный запрос. Возвращает счетчики антифлуда",
+                                     model=SAntiFloodStats),
+        401: generate_response_model("Ошибка авторизации"),
+        403: generate_response_model("Пользователь не является администратором"),
+        500: generate_response_model()
+    }
+)
+@exception_handler
+async def get_antiflood_metrics(
+        redis: CustomRedis = Depends(get_redis),
+        user: SUser = Depends(admin_auth_user)
+) -> SAntiFloodStats:
+    """Возвращает число пропущенных и отклоненных событий и отправленных предупреждений о флуде"""
+    try:
+
+        return SAntiFloodStats(**redis.convert_redis_data(await redis.hgetall(ANTIFLOOD_STATS_KEY)))
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении метрик антифлуда: {e}")
+        raise
+
+
+@router.get(
+    path="/db",
+    summary="Получить метрики пула подключений к БД текущего воркера (только администраторам)",
+    response_model=Union[SDbPoolStats, ErrorResponse],
+    responses={
+        200: generate_response_model(description="Успешный запрос. Возвращает метрики пула подключений",
+                                     model=SDbPoolStats),
+        401: generate_response_model("Ошибка авторизации"),
+        403: generate_response_model("Пользователь не является администратором"),
+        500: generate_response_model()
+    }
+)
+@exception_handler
+async def get_db_metrics(user: SUser = Depends(admin_auth_user)) -> SDbPoolStats:
+    """Возвращает число выдач подключений, время ожидания и выходы за pool_size"""
+    try:
+
+        return SDbPoolStats(**engine.pool.snapshot())
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении метрик пула подключений: {e}")
+        raise
@@ -1,25 +1,25 @@
-import json
 from loguru import logger
-from typing import Union, List
+from typing import Union
 from aiogram.exceptions import TelegramForbiddenError
-from fastapi import APIRouter, Depends, Body, Path
+from fastapi import APIRouter, Depends, Body, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.utils.bot_utils import send_invite_to_user
 from app.db.models import Invite
 from app.redis.custom_redis import CustomRedis
+from app.redis.invalidation import invalidation_batch
 from app.redis.redis_client import get_redis
-from app.redis.redis_operations.member import get_all_members_data, find_existing_member_by_hackathon, \
-    invalidate_member_cache, count_members_in_team
-from app.redis.redis_operations.team import get_all_teams_data, get_team_data, \
-    get_member_data_by_team_id, get_team_if_user_is_leader, invalidate_team_cache
+from app.redis.redis_operations.member import find_existing_member_by_hackathon, invalidate_member_cache, \
+    is_team_leader, get_member_data_by_team_id
+from app.redis.redis_operations.team import get_teams_page_data, get_team_data, get_team_with_members_data, \
+    get_team_if_user_is_leader, invalidate_team_cache
 from app.redis.redis_operations.hackathon import get_hackathon_data
 from app.redis.redis_operations.invite import get_all_invites_user_data, invalidate_invite_cache
 from app.redis.redis_operations.user import invalidate_user_cache, redis_user_data
 from app.bot.keyboards.user_keyboards import invite_keyboard
-from app.api.typization.schemas import IdModel, NameModel, TeamCreate, InviteCreate, MemberCreate, TeamUpdate
-from app.api.typization.responses import STeam, SUser, ErrorResponse, STeamWithMembers, SuccessResponse, SMember, \
-    SUserIsLeader
+from app.api.typization.schemas import IdModel, TeamNameFilter, TeamPageFilter, TeamCreate, InviteCreate, MemberCreate, TeamUpdate
+from app.api.typization.responses import STeam, STeamsPage, SUser, ErrorResponse, STeamWithMembers, SuccessResponse, SMember, \
+    SUserIsLeader, SInvite
 from app.api.typization.exceptions import (TeamNotFoundException, TeamsNotFoundException,
                                            TeamNameAlreadyExistsException, MaxTeamMembersExceededException,
                                            InvitationAlreadyExistsException, MemberNotFoundException,
@@ -28,7 +28,7 @@ from app.api.typization.exceptions import (TeamNotFoundException, TeamsNotFoundE
                                            ForbiddenException)
 from app.api.utils.auth_dep import fast_auth_user
 from app.api.utils.api_utils import exception_handler, check_registration_for_app, generate_response_model
-from app.db.dao import TeamDAO, MemberDAO, InviteDAO
+from app.db.dao import TeamDAO, MemberDAO, InviteDAO, JoinStatus
 from app.db.models import Team
 from app.db.session_maker import db
 from config import bot
@@ -38,27 +38,40 @@ router = APIRouter(prefix="/teams", tags=["Работа с командами"])
 
 @router.get(
     path="/",
-    summary="Получить список команд",
-    response_model=Union[List[STeam], ErrorResponse],
+    summary="Получить страницу списка команд",
+    response_model=Union[STeamsPage, ErrorResponse],
     responses={
-        200: generate_response_model(description="Успешный запрос. Возвращает список команд", model=List[STeam]),
+        200: generate_response_model(description="Успешный запрос. Возвращает страницу команд и курсор следующей",
+                                     model=STeamsPage),
         404: generate_response_model("Команды не найдены"),
+        422: generate_response_model("Ошибка валидации входных данных"),
         500: generate_response_model()
     }
 )
 @exception_handler
 async def get_all_teams(
+        hackathon_id: int | None = Query(None, description="ID хакатона"),
+        is_open: bool | None = Query(None, description="Открыта ли команда для новых участников"),
+        name: str | None = Query(None, max_length=64, description="Начало названия команды"),
+        after: int | None = Query(None, ge=0, description="Курсор: next_cursor предыдущей страницы"),
+        limit: int = Query(20, ge=1, le=100, description="Размер страницы"),
         session: AsyncSession = Depends(db.get_db),
         redis: CustomRedis = Depends(get_redis)
-) -> List[STeam]:
-    """Получает информацию о командах"""
+) -> STeamsPage:
+    """Получает страницу команд (по возрастанию ID) с фильтрами"""
     try:
 
-        teams = await get_all_teams_data(redis=redis, session=session)
-        if not teams:
+        teams_page = await get_teams_page_data(
+            redis=redis,
+            session=session,
+            filters=TeamPageFilter(hackathon_id=hackathon_id, is_open=is_open, name_prefix=name),
+            after_id=after,
+            limit=limit
+        )
+        if not teams_page or not teams_page.items:
             raise TeamsNotFoundException
 
-        return teams
+        return teams_page
 
     except Exception as e:
         logger.error(f"Ошибка при получении команд: {e}")
@@ -87,15 +100,14 @@ async def get_team_with_members_by_id(
     """Получает информацию о команде с ее участниками."""
     try:
 
-        team = await get_team_data(redis=redis, session=session, team_id=team_id)
-        if not team:
+        team_with_members = await get_team_with_members_data(redis=redis, session=session, team_id=team_id)
+        if not team_with_members:
             raise TeamNotFoundException
 
-        members_in_team = await get_all_members_data(redis=redis, session=session, team_id=team_id)
-        if not members_in_team:
+        if not team_with_members.members:
             raise MemberNotFoundException
 
-        return STeamWithMembers(team=team, members=members_in_team)
+        return team_with_members
 
     except Exception as e:
         logger.error(f"Ошибка при получении информации о команде: {e}")
@@ -133,27 +145,43 @@ async def create_team(
 
         team_dao = TeamDAO(session)
 
-        existing_team = await team_dao.find_one_or_none(filters=NameModel(name=team.name))
+        existing_team = await team_dao.find_one_or_none(
+            filters=TeamNameFilter(name=team.name, hackathon_id=team.hackathon_id)
+        )
         if existing_team:
             raise TeamNameAlreadyExistsException
 
-        member_for_hackathon = await MemberDAO(session).find_existing_member(user_id=user.telegram_id, hackathon_id=team.hackathon_id)
+        member_for_hackathon = await find_existing_member_by_hackathon(
+            redis=redis,
+            session=session,
+            user_id=user.telegram_id,
+            hackathon_id=team.hackathon_id
+        )
         if member_for_hackathon:
             raise MemberInTeamException
 
         new_team: Team = await team_dao.add(values=team)
 
-        await MemberDAO(session).add(values=MemberCreate(
+        leader = await MemberDAO(session).add(values=MemberCreate(
             user_id=user.telegram_id,
             tg_name=user.username,
             team_id=new_team.id,
+            hackathon_id=new_team.hackathon_id,
             role="leader"
         ))
 
-        await invalidate_team_cache(redis=redis, hackathon_id=team.hackathon_id, team=STeam(**new_team.to_dict()))
-        await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_teams=True)
+        created_team = STeam(**new_team.to_dict())
 
-        await redis.set_value_with_ttl(key=f"team:{new_team.id}", value=json.dumps(new_team.to_dict()))
+        async with invalidation_batch(redis=redis, session=session):
+            await invalidate_team_cache(redis=redis, hackathon_id=team.hackathon_id, team=created_team)
+            await invalidate_member_cache(
+                redis=redis,
+                hackathon_id=team.hackathon_id,
+                team_id=new_team.id,
+                tg_id=user.telegram_id,
+                member=SMember(**leader.to_dict())
+            )
+            await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, team=created_team)
 
         return SuccessResponse(message="Команда была успешно создана")
 
@@ -198,10 +226,18 @@ async def update_team(
             user_id=user.telegram_id
         )
 
+        if team.name and team.name != existing_team.name:
+            same_name_team = await team_dao.find_one_or_none(
+                filters=TeamNameFilter(name=team.name, hackathon_id=existing_team.hackathon_id)
+            )
+            if same_name_team:
+                raise TeamNameAlreadyExistsException
+
         await team_dao.update(filters=IdModel(id=existing_team.id), values=team)
 
-        await invalidate_team_cache(redis=redis, team_id=existing_team.id, hackathon_id=existing_team.hackathon_id)
-        await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_teams=True)
+        async with invalidation_batch(redis=redis, session=session):
+            await invalidate_team_cache(redis=redis, team_id=existing_team.id, hackathon_id=existing_team.hackathon_id)
+            await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_teams=True)
 
         return SuccessResponse(message="Команда успешно обновлена")
 
@@ -246,16 +282,18 @@ async def delete_team(
 
         await team_dao.delete(filters=IdModel(id=existing_team.id))
 
-        await invalidate_team_cache(redis=redis, team_id=existing_team.id, hackathon_id=existing_team.hackathon_id)
-        await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_teams=True)
+        async with invalidation_batch(redis=redis, session=session):
+            await invalidate_team_cache(redis=redis, team_id=existing_team.id, hackathon_id=existing_team.hackathon_id,
+                                        invalidate_related=True)
+            await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_teams=True)
 
-        await invalidate_member_cache(
-            redis=redis,
-            team_id=existing_team.id,
-            hackathon_id=existing_team.hackathon_id,
-            tg_id=user.telegram_id,
-            invalidate_leader=True
-        )
+            await invalidate_member_cache(
+                redis=redis,
+                team_id=existing_team.id,
+                hackathon_id=existing_team.hackathon_id,
+                tg_id=user.telegram_id,
+                invalidate_leader=True
+            )
 
         return SuccessResponse(message="Команда успешно удалена")
 
@@ -287,11 +325,9 @@ async def check_user_is_leader(
     """Проверяет, является ли пользователь лидером команды"""
 
     try:
-        leader = await get_member_data_by_team_id(redis=redis, session=session, team_id=team_id, role="leader")
-        if not leader or leader.user_id != user.telegram_id:
-            return SUserIsLeader(is_leader=False)
-        else:
-            return SUserIsLeader(is_leader=True)
+        is_leader = await is_team_leader(redis=redis, session=session, tg_id=user.telegram_id, team_id=team_id)
+
+        return SUserIsLeader(is_leader=is_leader)
     except Exception as e:
         logger.error(f"Ошибка при проверке пользователя на лидерство: {e}")
         raise
@@ -344,32 +380,32 @@ async def join_to_team(
         if existing_member:
             raise MemberInTeamException
 
-        current_hackathon = await get_hackathon_data(
-            redis=redis,
-            session=session,
-            hackathon_id=current_team.hackathon_id
-        )
-        members_count = await count_members_in_team(redis=redis, session=session, team_id=current_team.id)
-
-        if 0 < members_count >= current_hackathon.max_members:
-            raise MaxTeamMembersExceededException
-
-        new_member = await MemberDAO(session).add(values=MemberCreate(
+        join_result = await MemberDAO(session).join_team(
             user_id=user.telegram_id,
             team_id=current_team.id,
-            tg_name=user.username,
-            role="member"
-        ))
-
-        await invalidate_member_cache(
-            redis=redis,
-            hackathon_id=current_team.hackathon_id,
-            team_id=current_team.id,
-            tg_id=user.telegram_id,
-            member=SMember(**new_member.to_dict())
+            tg_name=user.username
         )
+        match join_result.status:
+            case JoinStatus.TEAM_NOT_FOUND:
+                raise TeamNotFoundException
+            case JoinStatus.TEAM_FULL:
+                raise MaxTeamMembersExceededException
+            case JoinStatus.ALREADY_MEMBER:
+                raise MemberInTeamException
+
+        current_team = current_team.model_copy(update={"member_count": join_result.member_count})
+
+        async with invalidation_batch(redis=redis, session=session):
+            await invalidate_team_cache(redis=redis, hackathon_id=current_team.hackathon_id, team=current_team)
+            await invalidate_member_cache(
+                redis=redis,
+                hackathon_id=current_team.hackathon_id,
+                team_id=current_team.id,
+                tg_id=user.telegram_id,
+                member=SMember(**join_result.member.to_dict())
+            )
 
-        await invalidate_user_cache(redis=redis, tg_id=user.telegram_id)
+            await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, team=current_team)
 
         return SuccessResponse(message="Вы успешно присоединились к команде")
 
@@ -415,36 +451,43 @@ async def leave_from_team(
         if not existing_member:
             raise MemberNotFoundException
 
-        await MemberDAO(session).delete(filters=IdModel(id=existing_member.id))
+        member_count = await MemberDAO(session).remove_member(member_id=existing_member.id)
 
         message = f"Вы успешно покинули команду {current_team.name}"
 
-        if existing_member.role == "leader":
+        async with invalidation_batch(redis=redis, session=session):
+            if existing_member.role == "leader":
 
-            await TeamDAO(session).delete(filters=IdModel(id=current_team_id))
+                await TeamDAO(session).delete(filters=IdModel(id=current_team_id))
 
-            await invalidate_team_cache(redis=redis, hackathon_id=hackathon_id, team_id=current_team_id)
+                await invalidate_team_cache(redis=redis, hackathon_id=hackathon_id, team_id=current_team_id,
+                                            invalidate_related=True)
 
-            await invalidate_member_cache(
-                redis=redis,
-                hackathon_id=hackathon_id,
-                team_id=current_team_id,
-                invalidate_leader=True
-            )
+                await invalidate_member_cache(
+                    redis=redis,
+                    hackathon_id=hackathon_id,
+                    team_id=current_team_id,
+                    invalidate_leader=True
+                )
 
-            message += " и удалили ее"
+                message += " и удалили ее"
 
-        else:
+            else:
 
-            await invalidate_member_cache(
-                redis=redis,
-                hackathon_id=hackathon_id,
-                team_id=current_team_id,
-                tg_id=tg_id,
-                invalidate_member=True
-            )
+                await invalidate_team_cache(
+                    redis=redis,
+                    hackathon_id=hackathon_id,
+                    team=current_team.model_copy(update={"member_count": member_count})
+                )
+                await invalidate_member_cache(
+                    redis=redis,
+                    hackathon_id=hackathon_id,
+                    team_id=current_team_id,
+                    tg_id=tg_id,
+                    invalidate_member=True
+                )
 
-        await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_teams=True)
+            await invalidate_user_cache(redis=redis, tg_id=user.telegram_id, invalidate_teams=True)
 
         return SuccessResponse(message=message)
 
@@ -481,7 +524,7 @@ async def invite_user_to_team(
     Приглашение отправляется ботом в телеграм, если боту разрешено отправлять сообщения"""
     try:
 
-        invite_user = await redis_user_data(tg_id=invite.invite_user_id)
+        invite_user = await redis_user_data(tg_id=invite.invite_user_id, session=session)
         if not invite_user:
             raise UserNotFoundException
 
@@ -512,15 +555,13 @@ async def invite_user_to_team(
         if not current_hackathon:
             raise HackathonNotFoundException
 
-        members_count = await count_members_in_team(redis=redis, session=session, team_id=current_team.id)
-        if 0 < members_count >= current_hackathon.max_members:
+        if current_team.member_count >= current_hackathon.max_members:
             raise MaxTeamMembersExceededException
 
         add_invite: Invite = await InviteDAO(session).add(values=invite)
 
-        await invalidate_invite_cache(redis=redis, tg_id=user.telegram_id)
-
-        await redis.set_value_with_ttl(key=f"invite:{add_invite.id}", value=json.dumps(add_invite.to_dict()))
+        async with invalidation_batch(redis=redis, session=session):
+            await invalidate_invite_cache(redis=redis, invite=SInvite(**add_invite.to_dict()))
 
         await send_invite_to_user(
             redis=redis,
@@ -164,3 +164,11 @@ InvitationNotFoundException = HTTPException(
 
 
 
+
+
+# Запрос к вебхуку пришел не от Telegram
+WebhookSecretException = HTTPException(
+    status_code=status.HTTP_403_FORBIDDEN,
+    detail="Неверный секретный токен вебхука"
+)
+"""Выбрасывается, если заголовок X-Telegram-Bot-Api-Secret-Token не совпадает с WEBHOOK_SECRET."""
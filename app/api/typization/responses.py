@@ -41,6 +41,12 @@ class SHackathons(BaseModel):
 
 
 
+class SHackathonsPage(BaseModel):
+    items: List[SHackathons] = Field(..., description="Хакатоны страницы")
+    next_cursor: int | None = Field(None, description="Курсор следующей страницы (None - страница последняя)")
+
+
+
 class SHackathonInfo(BaseModel):
     id: int = Field(..., description="ID хакатона")
     name: str = Field(..., description="Название хакатона")
@@ -58,6 +64,12 @@ class STeam(BaseModel):
     is_open: bool = Field(..., description="Открыта ли команда для новых участников")
     description: str | None = Field(None, description="Описание команды")
     hackathon_id: int = Field(..., description="ID хакатона")
+    member_count: int = Field(0, description="Количество участников команды")
+
+
+class STeamsPage(BaseModel):
+    items: List[STeam] = Field(..., description="Команды страницы")
+    next_cursor: int | None = Field(None, description="Курсор следующей страницы (None - страница последняя)")
 
 
 
@@ -89,6 +101,54 @@ class SInvite(BaseModel):
 
 
 
+class STeamMembership(STeam):
+    role: str = Field(..., description="Роль пользователя в команде")
+
+
+
+class SBootstrap(BaseModel):
+    user: SUser = Field(..., description="Текущий пользователь")
+    is_registered: bool = Field(..., description="Зарегистрирован ли пользователь в MiniApp")
+    teams: List[STeamMembership] = Field(..., description="Команды пользователя с его ролью")
+    invites: List[SInvite] = Field(..., description="Входящие приглашения в команды")
+
+
+
+class SCacheStats(BaseModel):
+    l1_hits: int = Field(..., description="Попадания в in-process L1 кэш")
+    hits: int = Field(..., description="Попадания в кэш Redis")
+    misses: int = Field(..., description="Промахи кэша")
+    rebuilds: int = Field(..., description="Перестроения ключей из базы данных")
+    coalesced: int = Field(..., description="Промахи, объединенные с уже выполняющейся загрузкой в воркере")
+    lock_waits: int = Field(..., description="Ожидания перестроения ключа другим воркером")
+    lock_wait_hits: int = Field(..., description="Ожидания, завершившиеся получением значения из кэша")
+    lock_timeouts: int = Field(..., description="Ожидания, завершившиеся самостоятельной загрузкой из базы данных")
+    stale_served: int = Field(..., description="Устаревшие значения, отданные до фонового обновления")
+    background_refreshes: int = Field(..., description="Фоновые обновления устаревших ключей")
+
+
+
+class SAntiFloodStats(BaseModel):
+    allowed: int = Field(0, description="Пропущенные события")
+    limited: int = Field(0, description="События, отклоненные по проверке в Redis (с отправкой предупреждения)")
+    suppressed_locally: int = Field(0, description="Повторные события, отклоненные без обращения к Redis и без предупреждения")
+    warnings_sent: int = Field(0, description="Отправленные предупреждения о флуде")
+
+
+
+class SDbPoolStats(BaseModel):
+    checkouts: int = Field(..., description="Выдачи подключений из пула")
+    timeouts: int = Field(..., description="Запросы, не дождавшиеся свободного подключения (pool_timeout)")
+    overflow_events: int = Field(..., description="Подключения, открытые сверх pool_size (overflow)")
+    wait_time_total_ms: float = Field(..., description="Суммарное время ожидания подключения, мс")
+    wait_time_max_ms: float = Field(..., description="Максимальное время ожидания подключения, мс")
+    wait_time_avg_ms: float = Field(..., description="Среднее время ожидания подключения, мс")
+    pool_size: int = Field(..., description="Размер пула (pool_size)")
+    checked_out: int = Field(..., description="Подключения, выданные в данный момент")
+    overflow: int = Field(..., description="Открытые в данный момент подключения сверх pool_size")
+
+
+
 class SuccessResponse(BaseModel):
     status: str = Field("success", description="Статус ответа")
     message: str = Field(..., description="Сообщение")
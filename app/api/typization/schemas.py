@@ -14,6 +14,21 @@ class HackathonIDModel(BaseModel):
     hackathon_id: int = Field(..., description="ID хакатона")
 
 
+class TeamNameFilter(BaseModel):
+    name: str = Field(..., description="Имя команды")
+    hackathon_id: int = Field(..., description="ID хакатона")
+
+
+class TeamPageFilter(BaseModel):
+    hackathon_id: int | None = Field(None, description="ID хакатона")
+    is_open: bool | None = Field(None, description="Открыта ли команда для новых участников")
+    name_prefix: str | None = Field(None, description="Начало названия команды")
+
+
+class HackathonPageFilter(BaseModel):
+    name_prefix: str | None = Field(None, description="Начало названия хакатона")
+
+
 class TelegramIDModel(BaseModel):
     telegram_id: int = Field(..., description="Telegram ID")
 
@@ -55,6 +70,7 @@ class TeamUpdate(BaseModel):
 class MemberCreate(BaseModel):
     user_id: int = Field(..., description="ID пользователя")
     team_id: int = Field(..., description="ID команды")
+    hackathon_id: int = Field(..., description="ID хакатона команды")
     tg_name: str = Field(..., description="Tg username пользователя")
     role: str = Field("member", description="Роль участника")
 
@@ -1,6 +1,5 @@
 import time
 import json
-import urllib
 import hmac
 import hashlib
 
@@ -15,66 +14,72 @@ from starlette.responses import JSONResponse
 from typing import Dict, Tuple, Type
 
 from app.api.typization.responses import T, SUser, ErrorResponse, Error
+from app.redis.local_cache import LocalCache
 from config import settings
 
 
-def reformat_data(query_string: str) -> Dict:
-    parsed_qs = urllib.parse.parse_qs(query_string)
+INIT_DATA_MAX_AGE = timedelta(hours=2000).total_seconds()
 
-    parsed_dict = {}
-    for key, value in parsed_qs.items():
-        if len(value) == 1:
-            parsed_dict[key] = value[0]
+# Секретный ключ для проверки подписи initData зависит только от токена бота, поэтому считается один раз
+INIT_DATA_SECRET_KEY = hmac.new(b"WebAppData", settings.BOT_TOKEN.encode(), hashlib.sha256).digest()
+
+# Уже проверенные initData: повторные запросы той же сессии Mini App не проверяют подпись заново
+verified_init_data = LocalCache(max_size=settings.AUTH_CACHE_MAX_SIZE, ttl=INIT_DATA_MAX_AGE)
+
+
+def parse_init_data(init_data: str) -> Tuple[Dict, str, str]:
+    """ Разбирает initData за один проход.
+    Возвращает поля без hash, сам hash и строку для проверки подписи """
+    fields = {}
+    hash_str = ""
+
+    for chunk in init_data.split("&"):
+        key, _, value = chunk.partition("=")
+        value = unquote(value)
+
+        if key == "hash":
+            hash_str = value
         else:
-            parsed_dict[key] = value
+            fields[key] = value
 
-    if 'user' in parsed_dict:
-        parsed_dict['user'] = json.loads(parsed_dict['user'])
+    data_check_string = "\n".join(f"{key}={fields[key]}" for key in sorted(fields))
+    return fields, hash_str, data_check_string
 
-    return parsed_dict
 
+def eligible_checker(hash_str: str, data_check_string: str, secret_key: bytes = INIT_DATA_SECRET_KEY) -> bool:
+    data_check = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256)
+    return hmac.compare_digest(data_check.hexdigest(), hash_str)
 
-def eligible_checker(hash_str: str, init_data: str, token=settings.BOT_TOKEN, c_str: str = "WebAppData") -> bool:
-    init_data = sorted([chunk.split("=")
-                        for chunk in unquote(init_data).split("&")
-                        if chunk[:len("hash=")] != "hash="],
-                       key=lambda x: x[0])
-    init_data = "\n".join([f"{rec[0]}={rec[1]}" for rec in init_data])
 
-    secret_key = hmac.new(c_str.encode(), token.encode(),
-                          hashlib.sha256).digest()
-    data_check = hmac.new(secret_key, init_data.encode(),
-                          hashlib.sha256)
+async def authorization_check(headers: dict) -> Tuple[bool, Dict | None]:
+    """ Проверка авторизации пользователя """
 
-    return data_check.hexdigest() == hash_str
+    authorization = headers.get("authorization", "")
+    if not authorization.startswith("tma "):
+        return False, None
 
+    query_data = authorization[len("tma "):]
 
-def parse_query_string(query_string: str) -> Dict:
-    parts = query_string.split('&')
-    result = {}
+    dict_data = verified_init_data.get(query_data)
+    if dict_data is not None:
+        return True, dict_data
 
-    for part in parts:
-        key, value = part.split('=', 1)
-        if key == 'user':
-            result[key] = json.loads(urllib.parse.unquote(value))
-        else:
-            result[key] = urllib.parse.unquote(value)
+    dict_data, hash_str, data_check_string = parse_init_data(query_data)
 
-    return result
+    try:
+        expires_in = int(dict_data.get("auth_date", 0)) + INIT_DATA_MAX_AGE - time.time()
+    except ValueError:
+        return False, None
 
+    valid_status = eligible_checker(hash_str, data_check_string)
+    logger.info(f"{valid_status} | {expires_in > 0}")
 
-async def authorization_check(headers: dict) -> Tuple[bool, Dict | None]:
-    """ Проверка авторизации пользователя """
+    if valid_status and expires_in > 0:
+        if "user" in dict_data:
+            dict_data["user"] = json.loads(dict_data["user"])
 
-    if "authorization" in headers and "tma " in headers['authorization']:
-        query_data = headers["authorization"].replace("tma ", "")
-        dict_data = parse_query_string(query_data)
-        valid_status = eligible_checker(query_data.split("hash=")[-1], query_data)
-        logger.info(
-            f"{valid_status} | {((time.time() - int(dict_data['auth_date'])) <= timedelta(hours=2000).total_seconds())}")
-        if valid_status and ((time.time() - int(dict_data['auth_date'])) <= timedelta(hours=2000).total_seconds()):
-            dict_data = reformat_data(query_data)
-            return True, dict_data
+        verified_init_data.set(query_data, dict_data, ttl=expires_in)
+        return True, dict_data
 
     return False, None
 
@@ -1,12 +1,13 @@
 from fastapi import Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import logger
+from config import logger, admins
 from app.db.dao import UserDAO
 from app.db.session_maker import db
 from app.api.typization.schemas import TelegramIDModel
 from app.redis.redis_operations.user import redis_user_data
-from app.api.typization.exceptions import AuthException, UserNotFoundException
+from app.api.typization.exceptions import AuthException, UserNotFoundException, ForbiddenException
+from app.api.typization.responses import SUser
 from app.api.utils.api_utils import authorization_check, exception_handler
 
 
@@ -20,19 +21,25 @@ async def get_authenticated_user(request: Request, session: AsyncSession = Depen
         raise AuthException
 
 
-async def fast_auth_user(request: Request):
-    """ Быстрая аутентификация пользователя """
+async def fast_auth_user(request: Request, session: AsyncSession = Depends(db.get_db)):
+    """ Быстрая аутентификация пользователя.
+    Пользователь запрашивается через сессию запроса и запоминается в request.state до конца запроса """
     try:
+        user_data = getattr(request.state, "user", None)
+        if user_data is not None:
+            return user_data
+
         headers = dict(request.headers)
         authorization_status, dict_data = await authorization_check(headers)
 
         if authorization_status and dict_data:
             logger.info(f"Аутентификация пользователя {dict_data["user"]["username"]}")
 
-            user_data = await redis_user_data(tg_id=dict_data["user"]["id"])
+            user_data = await redis_user_data(tg_id=dict_data["user"]["id"], session=session)
             if not user_data:
                 raise UserNotFoundException()
 
+            request.state.user = user_data
             return user_data
 
         raise AuthException
@@ -41,3 +48,10 @@ async def fast_auth_user(request: Request):
         logger.error(f"Ошибка при аутентификации пользователя: {e}")
         raise
 
+
+async def admin_auth_user(user: SUser = Depends(fast_auth_user)) -> SUser:
+    """ Аутентификация администратора """
+    if user.telegram_id not in admins:
+        raise ForbiddenException
+
+    return user
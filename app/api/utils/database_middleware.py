@@ -0,0 +1,18 @@
+from typing import Awaitable, Callable
+from fastapi import Request, Response
+from loguru import logger
+
+from app.db.request_stats import start_request_db_stats
+
+
+async def db_usage_middleware(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    """ Считает, сколько раз запрос брал подключение из пула БД, и отдает значение в заголовке X-DB-Checkouts """
+    stats = start_request_db_stats()
+
+    response = await call_next(request)
+
+    response.headers["X-DB-Checkouts"] = str(stats.checkouts)
+    if stats.checkouts > 1:
+        logger.warning(f"Запрос {request.method} {request.url.path} использовал {stats.checkouts} подключений к БД")
+
+    return response
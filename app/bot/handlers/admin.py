@@ -1,9 +1,7 @@
-import asyncio
-
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
-from aiogram.types.input_file import FSInputFile
+from aiogram.types.input_file import BufferedInputFile
 from loguru import logger
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,7 +14,7 @@ from app.bot.keyboards.admin_keyboards import admin_keyboard, choice_hackathon_k
 from app.bot.utils.bot_utils import send_edit_message
 from app.redis.redis_operations.invite import bot_cleanup_invites
 from app.db.dao import UserDAO
-from app.bot.utils.pdf_utils import create_hackathon_report_pdf
+from app.bot.utils.pdf_utils import create_hackathon_report_pdf, pack_participant_chunks, report_file_name
 
 
 router = Router()
@@ -99,7 +97,7 @@ async def get_hackathon_members(call: CallbackQuery, session_without_commit: Asy
             raise HackathonNotFoundException
 
         user_dao = UserDAO(session_without_commit)
-        participants = await user_dao.get_hackathon_participants(hackathon_id=hackathon_id)
+        participants = await pack_participant_chunks(user_dao.stream_hackathon_participants(hackathon_id=hackathon_id))
 
         if not participants:
             await send_edit_message(
@@ -112,7 +110,7 @@ async def get_hackathon_members(call: CallbackQuery, session_without_commit: Asy
         start_date = datetime.fromtimestamp(hackathon.start_date).strftime('%d.%m.%Y')
         end_date = datetime.fromtimestamp(hackathon.end_date).strftime('%d.%m.%Y')
 
-        pdf_path = create_hackathon_report_pdf(
+        pdf = await create_hackathon_report_pdf(
             participants,
             hackathon.name,
             start_date,
@@ -122,10 +120,8 @@ async def get_hackathon_members(call: CallbackQuery, session_without_commit: Asy
         await call.message.delete()
         await call.answer(text="Создание PDF завершено. Отправляю файл...",)
 
-        asyncio.sleep(1)
-
         await call.message.answer_document(
-            document=FSInputFile(path=pdf_path),
+            document=BufferedInputFile(pdf, filename=report_file_name(hackathon.name)),
             caption=f"Список участников хакатона: {hackathon.name}",
             reply_markup=manage_hackathon_keyboard(hackathon_id=hackathon_id)
         )
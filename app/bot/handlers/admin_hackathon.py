@@ -12,6 +12,7 @@ from app.api.typization.schemas import HackathonCreate, IdModel
 from app.bot.keyboards.admin_keyboards import admin_keyboard, confirm_delete_hackathon_keyboard, cancel_keyboard
 from app.bot.utils.bot_utils import send_edit_message
 from app.db.dao import HackathonDAO
+from app.redis.invalidation import invalidation_batch
 from app.redis.redis_client import redis_client
 from app.redis.redis_operations.hackathon import invalidate_hackathon_cache
 
@@ -84,7 +85,8 @@ async def process_start_date(message: Message, state: FSMContext):
                 await message.answer("Дата начала не может быть в прошлом. Введите корректную дату:")
                 return
 
-            await state.update_data(start_date=start_date)
+            # Данные FSM хранятся в Redis, поэтому даты сохраняются строкой ISO
+            await state.update_data(start_date=start_date.isoformat())
         except ValueError:
             await message.answer("Неверный формат даты. Используйте формат DD.MM.YYYY или отправьте '-' для пропуска", reply_markup=cancel_keyboard())
             return
@@ -106,11 +108,11 @@ async def process_end_date(message: Message, state: FSMContext, session_with_com
             data = await state.get_data()
             start_date = data.get("start_date")
 
-            if start_date is not None and end_date <= start_date:
+            if start_date is not None and end_date <= datetime.fromisoformat(start_date):
                 await message.answer("Дата окончания должна быть позже даты начала. Введите корректную дату:")
                 return
 
-            await state.update_data(end_date=end_date)
+            await state.update_data(end_date=end_date.isoformat())
 
         except ValueError:
             await message.answer("Неверный формат даты. Используйте формат DD.MM.YYYY или отправьте '-' для пропуска", reply_markup=cancel_keyboard())
@@ -120,7 +122,8 @@ async def process_end_date(message: Message, state: FSMContext, session_with_com
     try:
         hackathon_data = HackathonCreate(**data)
         new_hackathon = await HackathonDAO(session_with_commit).add(hackathon_data)
-        await invalidate_hackathon_cache(redis_client.get_client())
+        async with invalidation_batch(redis=redis_client.get_client(), session=session_with_commit):
+            await invalidate_hackathon_cache(redis_client.get_client())
 
         await message.answer(
             f"Хакатон '{new_hackathon.name}' успешно создан!",
@@ -157,7 +160,8 @@ async def delete_hackathon(call: CallbackQuery, session_with_commit: AsyncSessio
             raise HackathonNotFoundException(hackathon_id=hackathon_id)
 
         await hackathon_dao.delete(filters=IdModel(id=hackathon_id))
-        await invalidate_hackathon_cache(redis_client.get_client(), hackathon_id=hackathon_id, invalidate_teams=True)
+        async with invalidation_batch(redis=redis_client.get_client(), session=session_with_commit):
+            await invalidate_hackathon_cache(redis_client.get_client(), hackathon_id=hackathon_id, invalidate_teams=True)
 
         await send_edit_message(
             call=call,
@@ -1,5 +1,5 @@
-import asyncio
 import json
+from functools import partial
 
 from loguru import logger
 from aiogram import F, Router
@@ -7,22 +7,23 @@ from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.redis.custom_redis import CustomRedis
+from app.redis.invalidation import invalidation_batch
 from app.redis.redis_client import redis_client
 from app.redis.redis_operations.hackathon import get_hackathon_data
 from app.redis.redis_operations.invite import get_all_invites_user_data, get_invite_data_by_id, \
     invalidate_invite_cache, bot_cleanup_invites
-from app.redis.redis_operations.member import find_existing_member_by_hackathon, count_members_in_team, \
-    invalidate_member_cache
-from app.redis.redis_operations.team import get_team_data
+from app.redis.redis_operations.member import find_existing_member_by_hackathon, invalidate_member_cache
+from app.redis.redis_operations.team import get_team_data, get_teams_data, invalidate_team_cache
 from app.redis.redis_operations.user import redis_user_data, invalidate_user_cache
 from app.api.typization.bot_exceptions import TeamNotFoundException, InvitationNotFoundException, \
     MaxTeamMembersExceededException, HackathonNotFoundException, \
     MemberInTeamAlreadyExistsException, UserNotRegisteredForApp, UserNotFoundException
-from app.api.typization.schemas import MemberCreate
+from app.api.typization.responses import SMember
 from app.api.utils.api_utils import check_registration_for_app
 from app.bot.keyboards.user_keyboards import main_keyboard, invite_keyboard
+from app.bot.utils.send_scheduler import telegram_scheduler
 from app.bot.utils.bot_utils import send_message_to_leader, send_edit_message, clear_message_and_answer
-from app.db.dao import MemberDAO, InviteDAO
+from app.db.dao import MemberDAO, InviteDAO, JoinStatus
 
 router = Router()
 
@@ -44,16 +45,26 @@ async def get_invites(call: CallbackQuery, session_without_commit: AsyncSession)
         await bot_cleanup_invites(redis=redis, user_id=call.from_user.id, session=session_without_commit)
         await call.message.delete()
 
-        for invite in invites_data:
+        teams = await get_teams_data(redis=redis, session=session_without_commit,
+                                     team_ids=[invite.team_id for invite in invites_data])
+        invites_data = [invite for invite in invites_data if invite.team_id in teams]
 
-            team = await get_team_data(redis=redis, session=session_without_commit, team_id=invite.team_id)
+        messages = await telegram_scheduler.run_many(
+            (call.from_user.id, partial(call.message.answer,
+                                        f"Приглашение в команду {teams[invite.team_id].name}\n"
+                                        f"Описание команды: {teams[invite.team_id].description}",
+                                        reply_markup=invite_keyboard(invite_id=invite.id)))
+            for invite in invites_data
+        )
+
+        for invite, message in zip(invites_data, messages):
+            if isinstance(message, Exception):
+                logger.warning(f"Не удалось отправить приглашение {invite.id}: {message}")
+                continue
+            await redis.set_value_with_ttl(f"invite_message_process:{invite.id}", value=str(message.message_id))
 
-            if team:
-                message = await call.message.answer(f"Приглашение в команду {team.name}\nОписание команды: {team.description}",
-                                          reply_markup=invite_keyboard(invite_id=invite.id))
-                await redis.set_value_with_ttl(f"invite_message_process:{invite.id}", value=str(message.message_id))
-                await asyncio.sleep(0.5)
-        await call.message.answer("Вы вернулись в главное меню", reply_markup=main_keyboard(user_id=call.from_user.id))
+        await telegram_scheduler.run(call.from_user.id, partial(call.message.answer, "Вы вернулись в главное меню",
+                                                                reply_markup=main_keyboard(user_id=call.from_user.id)))
 
     except Exception as e:
         logger.error(f"Ошибка при получении приглашений в команду: {e}")
@@ -74,7 +85,7 @@ async def accept_invite(call: CallbackQuery, session_with_commit: AsyncSession)
         if not invite:
             raise InvitationNotFoundException(invite_id=invite_id)
 
-        existing_user = await redis_user_data(tg_id=user_id)
+        existing_user = await redis_user_data(tg_id=user_id, session=session_with_commit)
         if not existing_user:
             raise UserNotFoundException(user_id=user_id)
 
@@ -91,28 +102,39 @@ async def accept_invite(call: CallbackQuery, session_with_commit: AsyncSession)
         if not hackathon:
             raise HackathonNotFoundException(hackathon_id=team.hackathon_id)
 
-        existing_member = await MemberDAO(session_with_commit).find_existing_member(user_id=user_id, hackathon_id=hackathon.id)
+        existing_member = await find_existing_member_by_hackathon(
+            redis=redis,
+            session=session_with_commit,
+            user_id=user_id,
+            hackathon_id=hackathon.id
+        )
         if existing_member:
             raise MemberInTeamAlreadyExistsException()
 
 
-        members_count = await count_members_in_team(redis=redis, session=session_with_commit, team_id=team.id)
-        if 0 < members_count >= hackathon.max_members:
-            raise MaxTeamMembersExceededException(team_id=team.id, max_members=hackathon.max_members)
-
-        new_member = await MemberDAO(session_with_commit).add(values=MemberCreate(
+        join_result = await MemberDAO(session_with_commit).join_team(
             user_id=existing_user.telegram_id,
             team_id=team.id,
-            tg_name=call.from_user.username,
-            role="member"
-        ))
+            tg_name=call.from_user.username
+        )
+        match join_result.status:
+            case JoinStatus.TEAM_NOT_FOUND:
+                raise TeamNotFoundException(team_id=team.id)
+            case JoinStatus.TEAM_FULL:
+                raise MaxTeamMembersExceededException(team_id=team.id, max_members=hackathon.max_members)
+            case JoinStatus.ALREADY_MEMBER:
+                raise MemberInTeamAlreadyExistsException()
+
+        team = team.model_copy(update={"member_count": join_result.member_count})
 
         await InviteDAO(session_with_commit).delete(filters=invite)
 
-        await invalidate_member_cache(redis=redis, team_id=team.id, hackathon_id=hackathon.id, tg_id=user_id,
-                                      member=new_member)
-        await invalidate_invite_cache(redis=redis, tg_id=call.from_user.id, invite_id=invite.id)
-        await invalidate_user_cache(redis=redis, tg_id=user_id, invalidate_teams=True)
+        async with invalidation_batch(redis=redis, session=session_with_commit):
+            await invalidate_team_cache(redis=redis, hackathon_id=hackathon.id, team=team)
+            await invalidate_member_cache(redis=redis, team_id=team.id, hackathon_id=hackathon.id, tg_id=user_id,
+                                          member=SMember(**join_result.member.to_dict()))
+            await invalidate_invite_cache(redis=redis, tg_id=call.from_user.id, invite_id=invite.id)
+            await invalidate_user_cache(redis=redis, tg_id=user_id, team=team)
 
         await send_message_to_leader(
             redis=redis,
@@ -167,7 +189,8 @@ async def reject_invite(call: CallbackQuery, session_with_commit: AsyncSession)
 
         await InviteDAO(session_with_commit).delete(filters=invite)
 
-        await invalidate_invite_cache(redis=redis, tg_id=call.from_user.id, invite_id=invite_id)
+        async with invalidation_batch(redis=redis, session=session_with_commit):
+            await invalidate_invite_cache(redis=redis, tg_id=call.from_user.id, invite_id=invite_id)
 
         await send_message_to_leader(
             redis=redis,
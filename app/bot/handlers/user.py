@@ -22,7 +22,7 @@ router = Router()
 async def cmd_start(message: Message, session_with_commit: AsyncSession) -> None:
     try:
         logger.info(f"Пользователь {message.from_user.username} нажал /start")
-        user = await redis_user_data(tg_id=message.from_user.id)
+        user = await redis_user_data(tg_id=message.from_user.id, session=session_with_commit)
 
         if not user:
             user_dao = UserDAO(session_with_commit)
@@ -4,10 +4,12 @@ from aiogram.exceptions import TelegramRetryAfter
 from aiogram.types import BotCommand, BotCommandScopeDefault, MenuButtonWebApp, WebAppInfo
 
 from app.redis.redis_client import redis_client
+from app.redis.update_queue import UpdateQueue
 from app.bot.utils.database_middleware import DatabaseMiddlewareWithoutCommit, DatabaseMiddlewareWithCommit
 from app.bot.handlers import user, invite, admin_hackathon, admin
 from app.bot.utils.antiflood_middleware import AntiFloodMiddleware
-from config import bot, admins, front_site_url, dp
+from app.bot.utils.pdf_utils import shutdown_pdf_executor
+from config import bot, admins, front_site_url, dp, settings
 
 
 def setup_middleware():
@@ -36,6 +38,22 @@ async def set_button():
         menu_button=MenuButtonWebApp(text="App", web_app=WebAppInfo(url=f"{front_site_url}")))
 
 
+async def start_webhook_consumers():
+    if not settings.WEBHOOK_SECRET:
+        # Без секрета вебхук отклоняет все обновления
+        raise RuntimeError("Для режима вебхука нужно задать WEBHOOK_SECRET")
+
+    try:
+        logger.info("Запуск бота в режиме вебхука с очередью обновлений...")
+        await bot.set_webhook(url=f"{settings.WEBHOOK_URL}/webhook",
+                              secret_token=settings.WEBHOOK_SECRET,
+                              allowed_updates=dp.resolve_used_update_types())
+        queue = UpdateQueue(redis=redis_client.get_client(), partitions=settings.WEBHOOK_QUEUE_PARTITIONS)
+        await queue.run_consumers(dp=dp, bot=bot, concurrency=settings.WEBHOOK_QUEUE_CONCURRENCY)
+    except Exception as e:
+        logger.error(f"Ошибка при обработке очереди обновлений: {e}")
+
+
 async def start_polling():
     try:
         logger.info("Запуск бота в режиме long polling...")
@@ -78,8 +96,12 @@ async def main():
     try:
         await redis_client.connect()
         await start_bot()
-        await start_polling()
+        if settings.WEBHOOK_URL and settings.WEBHOOK_QUEUE:
+            await start_webhook_consumers()
+        else:
+            await start_polling()
     finally:
+        shutdown_pdf_executor()
         await bot.session.close()
         await redis_client.close()
 
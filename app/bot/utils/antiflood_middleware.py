@@ -1,22 +1,58 @@
-import datetime
+import math
+import time
+import uuid
+from dataclasses import replace
 from typing import Callable, Awaitable, Dict, Any
-from venv import logger
+from loguru import logger
 
 from aiogram import BaseMiddleware
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.types import TelegramObject, Message, CallbackQuery
 from redis.asyncio import Redis
 
+from app.redis.antiflood_stats import ANTIFLOOD_STATS_KEY, AntiFloodStats
+from app.redis.local_cache import LocalCache
+
+
+# Скользящее окно: в ключе хранятся моменты пропущенных событий за последние window мс.
+# Возвращает 0, если событие пропущено, иначе сколько миллисекунд осталось до освобождения окна.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('zremrangebyscore', KEYS[1], '-inf', now - window)
+if redis.call('zcard', KEYS[1]) < limit then
+    redis.call('zadd', KEYS[1], now, ARGV[4])
+    redis.call('pexpire', KEYS[1], window)
+    return 0
+end
+
+local oldest = redis.call('zrange', KEYS[1], 0, 0, 'WITHSCORES')
+return math.max(1, tonumber(oldest[2]) + window - now)
+"""
+
 
 class AntiFloodMiddleware(BaseMiddleware):
     """
-    Middleware для защиты от флуда. Использует Redis для отслеживания активности пользователей.
+    Middleware для защиты от флуда. Пропускает не больше max_events событий пользователя
+    за flood_limit секунд; проверка выполняется одним Lua-скриптом в Redis.
+    Сообщения и нажатия кнопок учитываются раздельно, ключи удаляются сами по истечении окна.
+
+    После отказа пользователь запоминается в процессе до освобождения окна: его повторные события
+    отклоняются без обращения к Redis и без повторного предупреждения. Счетчики процесса
+    дописываются в общий хэш ANTIFLOOD_STATS_KEY вместе со следующей проверкой в Redis.
     """
 
-    def __init__(self, redis: Redis, flood_limit: int = 2):
+    def __init__(self, redis: Redis, flood_limit: float = 2, max_events: int = 1, local_cache_size: int = 10000):
         self.redis = redis
         self.flood_limit = flood_limit
+        self.max_events = max_events
         self.warning_message = "Пожалуйста, не флудите."
+        self.stats = AntiFloodStats()
+        self._flushed_stats = AntiFloodStats()
+        self._blocked = LocalCache(max_size=local_cache_size, ttl=flood_limit)
+        self._sliding_window = redis.register_script(SLIDING_WINDOW_SCRIPT)
 
 
     async def __call__(
@@ -29,50 +65,103 @@ class AntiFloodMiddleware(BaseMiddleware):
         Вызывается для каждого обновления.
         """
         try:
-            if isinstance(event, (Message, CallbackQuery)):
-                tg_id = event.from_user.id
-                key = f"antiflood:{tg_id}"
+            if not isinstance(event, (Message, CallbackQuery)) or event.from_user is None:
+                return await handler(event, data)
+
+            tg_id = event.from_user.id
+            key = f"antiflood:{type(event).__name__.lower()}:{tg_id}"
 
-                last_request_time = await self.redis.get(key)
+            if self._blocked.get(key) is not None:
+                # Предупреждение за это окно уже отправлено
+                self.stats.suppressed_locally += 1
+                if isinstance(event, CallbackQuery):
+                    # Без ответа на нажатие у пользователя продолжает крутиться индикатор загрузки
+                    await self._answer_silently(event)
+                return
 
-                if last_request_time:
-                    last_request_time = float(last_request_time)
-                    time_since_last_request = datetime.datetime.now().timestamp() - last_request_time
+            wait_ms = await self.check_rate(key)
 
-                    if time_since_last_request < self.flood_limit:
-                        logger.info(f"Флуд от пользователя {tg_id}.")
-                        await self._send_flood_warning(event, tg_id)
-                        return
-                    else:
-                        await self.redis.set(key, datetime.datetime.now().timestamp())
-                        return await handler(event, data)
+            if wait_ms:
+                logger.info(f"Флуд от пользователя {tg_id}.")
+                self.stats.limited += 1
+                self._blocked.set(key, True, ttl=wait_ms / 1000)
+                if await self._send_flood_warning(event, tg_id, wait_ms):
+                    self.stats.warnings_sent += 1
+                return
 
-                else:
-                    await self.redis.set(key, datetime.datetime.now().timestamp())
-                    return await handler(event, data)
+            self.stats.allowed += 1
+            return await handler(event, data)
 
         except Exception as e:
             logger.error(f"Ошибка в AntiFloodMiddleware: {e}")
             raise
 
 
-    async def _send_flood_warning(self, event: TelegramObject, tg_id: int):
+    async def check_rate(self, key: str) -> int:
+        """Учитывает событие и возвращает, сколько миллисекунд пользователю нужно подождать (0 - событие пропущено)."""
+        now_ms = time.time_ns() // 1_000_000
+        keys = [key]
+        args = [now_ms, int(self.flood_limit * 1000), self.max_events, f"{now_ms}-{uuid.uuid4().hex[:8]}"]
+
+        # Прирост счетчиков забирается до первого await: параллельные события не отправят его повторно
+        flushed = self._flushed_stats.as_dict()
+        stats = replace(self.stats)
+        increments = {field: value - flushed[field] for field, value in stats.as_dict().items() if value != flushed[field]}
+        if not increments:
+            return int(await self._sliding_window(keys=keys, args=args))
+        self._flushed_stats = stats
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                await self._sliding_window(keys=keys, args=args, client=pipe)
+                for field, increment in increments.items():
+                    pipe.hincrby(ANTIFLOOD_STATS_KEY, field, increment)
+                results = await pipe.execute()
+        except Exception:
+            # Прирост не записан: он уйдет со следующей проверкой
+            self._flushed_stats = replace(self._flushed_stats, **{
+                field: getattr(self._flushed_stats, field) - increment for field, increment in increments.items()
+            })
+            raise
+
+        return int(results[0])
+
+
+    @staticmethod
+    async def _answer_silently(event: CallbackQuery) -> None:
+        """
+        Отвечает на нажатие кнопки без текста, чтобы у пользователя остановился индикатор загрузки.
+        """
+        try:
+            await event.answer()
+        except (TelegramBadRequest, TelegramForbiddenError) as e:
+            logger.warning(f"Не удалось ответить на нажатие кнопки пользователя {event.from_user.id}: {e}")
+
+
+    async def _send_flood_warning(self, event: TelegramObject, tg_id: int, wait_ms: int) -> bool:
         """
-        Отправляет предупреждение пользователю о флуде.
+        Отправляет предупреждение пользователю о флуде. Возвращает True, если предупреждение доставлено.
         """
+        warning = f"{self.warning_message} Попробуйте через {math.ceil(wait_ms / 1000)} сек."
         try:
             if isinstance(event, Message):
-                await event.reply(self.warning_message)
+                await event.reply(warning)
+                return True
             elif isinstance(event, CallbackQuery):
                 try:
-                    await event.answer(self.warning_message)
+                    await event.answer(warning)
                 except TelegramBadRequest:
+                    if event.message is None:
+                        logger.warning(f"Предупреждение о флуде для tg_id {tg_id} не отправлено: сообщение кнопки недоступно.")
+                        return False
                     logger.warning(f"Предупреждение о флуде для tg_id {tg_id} не поместилось в alert. Отправляем обычным сообщением.")
-                    await event.message.answer(self.warning_message)
+                    await event.message.answer(warning)
+                return True
+            return False
 
         except TelegramForbiddenError:
             logger.warning(f"Бот заблокирован пользователем {tg_id}. Невозможно отправить предупреждение о флуде.")
+            return False
         except Exception as e:
             logger.error(f"Ошибка при отправке предупреждения о флуде пользователю {tg_id}: {e}", exc_info=True)
             raise
-
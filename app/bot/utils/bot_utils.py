@@ -1,5 +1,3 @@
-import asyncio
-
 from loguru import logger
 from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup
@@ -7,8 +5,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.typization.responses import STeam
 from app.redis.custom_redis import CustomRedis
-from app.redis.redis_operations.team import get_member_data_by_team_id
+from app.redis.redis_operations.member import get_member_data_by_team_id
 from app.bot.keyboards.user_keyboards import main_keyboard, invite_keyboard, back_keyboard, delete_message_keyboard
+from app.bot.utils.send_scheduler import telegram_scheduler
 from config import bot
 
 
@@ -22,7 +21,10 @@ async def send_message_to_leader(
     try:
         leader = await get_member_data_by_team_id(redis=redis, session=session, team_id=team_id, role="leader")
         if leader:
-            await bot.send_message(chat_id=leader.user_id, text=message, reply_markup=delete_message_keyboard())
+            await telegram_scheduler.run(
+                leader.user_id,
+                lambda: bot.send_message(chat_id=leader.user_id, text=message, reply_markup=delete_message_keyboard())
+            )
 
     except TelegramForbiddenError:
         logger.warning(f"Бот заблокирован пользователем. Невозможно отправить уведомление лидеру.")
@@ -38,21 +40,20 @@ async def send_invite_to_user(
 
         logger.info("Отправка приглашения в Telegram...")
 
-        message = await bot.send_message(
+        message = await telegram_scheduler.run(invite_user_tg_id, lambda: bot.send_message(
             chat_id=invite_user_tg_id,
             text=f"Вам пришло приглашение в команду {team.name}\n\n"
                  f"Описание команды: {team.description or 'нет'}",
             reply_markup=invite_keyboard(invite_id=invite_id)
-        )
+        ))
 
         await redis.set_value_with_ttl(f"invite_message_process:{invite_id}", value=str(message.message_id))
-        await asyncio.sleep(0.5)
 
-        await bot.send_message(
+        await telegram_scheduler.run(invite_user_tg_id, lambda: bot.send_message(
             chat_id=invite_user_tg_id,
             text="Вы вернулись в главное меню",
             reply_markup=main_keyboard(user_id=invite_user_tg_id)
-        )
+        ))
         logger.info("Приглашение отправлено")
 
     except TelegramForbiddenError:
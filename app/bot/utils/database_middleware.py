@@ -3,6 +3,7 @@ from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
 
 from app.db.database import async_session_maker
+from app.db.session_maker import db
 
 
 class BaseDatabaseMiddleware(BaseMiddleware):
@@ -17,9 +18,12 @@ class BaseDatabaseMiddleware(BaseMiddleware):
             try:
                 result = await handler(event, data)
                 await self.after_handler(session)
+                await db.run_after_commit_hooks(session)
                 return result
             except Exception as e:
+                db.discard_after_commit_hooks(session)
                 await session.rollback()
+                await db.run_after_commit_hooks(session)
                 raise e
             finally:
                 await session.close()
@@ -1,44 +1,70 @@
-import os
-from typing import List
+import io
+import json
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterable, Iterable
 from loguru import logger
 
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph, Spacer
+from reportlab.platypus import Paragraph
 from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
-from app.db.models import User
 
+FONT_NAME = "ArialUnicode"
+PDF_WORKERS = 2
 
-def create_hackathon_report_pdf(users: List[User], hackathon_name: str, start_date: str, end_date: str, pdf_dir: str = "reports_pdf"):
+_executor: ProcessPoolExecutor | None = None
 
-    if not os.path.exists(pdf_dir):
-        os.makedirs(pdf_dir)
 
+def register_fonts() -> None:
+    """Регистрирует шрифт отчета; в процессах пула вызывается один раз при запуске процесса."""
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, 'arial.ttf'))
+
+
+def report_file_name(hackathon_name: str) -> str:
     safe_name = "".join(c for c in hackathon_name if c.isalnum() or c in (' ', '-', '_')).strip()
-    file_path = os.path.join(pdf_dir, f"{safe_name}.pdf")
+    return f"{safe_name or 'report'}.pdf"
+
 
-    pdfmetrics.registerFont(TTFont('ArialUnicode', 'arial.ttf'))
+async def pack_participant_chunks(chunks: AsyncIterable[list[tuple]]) -> list[bytes]:
+    """
+    Упаковывает пачки строк участников в JSON по мере чтения из БД.
+    В процессе бота остается одна пачка кортежей и упакованный текст всех участников
+    (десятки байт на участника) - его и получает процесс пула.
+    """
+    return [json.dumps(chunk, ensure_ascii=False).encode() async for chunk in chunks if chunk]
 
 
-    c = canvas.Canvas(file_path, pagesize=letter)
+def render_hackathon_report_pdf(packed_chunks: Iterable[bytes], hackathon_name: str, start_date: str, end_date: str) -> bytes:
+    """
+    Рисует отчет в память и возвращает содержимое PDF.
+    packed_chunks - пачки из pack_participant_chunks со строками (full_name, username, group, is_mirea_student):
+    сначала студенты МИРЭА, затем остальные. Пачки распаковываются по одной по ходу отрисовки.
+    """
+    register_fonts()
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
 
     styles = getSampleStyleSheet()
     title_style = styles['h1']
-    title_style.fontName = 'ArialUnicode'
+    title_style.fontName = FONT_NAME
     title_style.textColor = colors.blue
     title_style.alignment = 1
 
     heading_style = styles['h2']
-    heading_style.fontName = 'ArialUnicode'
+    heading_style.fontName = FONT_NAME
     heading_style.textColor = colors.black
 
     normal_style = styles['Normal']
-    normal_style.fontName = 'ArialUnicode'
+    normal_style.fontName = FONT_NAME
     normal_style.fontSize = 12
     normal_style.leading = 14
     normal_style.textColor = colors.black
@@ -47,65 +73,65 @@ def create_hackathon_report_pdf(users: List[User], hackathon_name: str, start_da
     title.wrapOn(c, letter[0] - 2 * inch, letter[1])
     title.drawOn(c, inch, letter[1] - inch)
 
-    c.setFont('ArialUnicode', 14)
+    c.setFont(FONT_NAME, 14)
     c.drawCentredString(letter[0]/2.0,letter[1] - 1.5 * inch,f"Дата проведения: {start_date} - {end_date}")
 
-    students = [user for user in users if user.is_mirea_student]
-    non_students = [user for user in users if not user.is_mirea_student]
-
-    students.sort(key=lambda user: user.group or "")
-
     y_position = letter[1] - 2 * inch
 
-    def add_section_header(text, y_pos):
-        p = Paragraph(text, heading_style)
+    def add_paragraph(text, style, y_pos, step):
+        p = Paragraph(text, style)
         p.wrapOn(c, letter[0] - 2 * inch, letter[1])
         p.drawOn(c, inch, y_pos)
-        return y_pos - 0.5 * inch
-
-    def add_user_info(user, y_pos):
-        user_info = f"ФИО: {user.full_name or 'Не указано'}, Telegram: @{user.username}"
-        if user.is_mirea_student:
-            user_info += f", Группа: {user.group or 'Не указана'}"
-
-        p = Paragraph(user_info, normal_style)
-        p.wrapOn(c, letter[0] - 2 * inch, letter[1])
-        p.drawOn(c, inch, y_pos)
-        return y_pos - 0.3 * inch
-
-
-
-    y_position = add_section_header("Студенты МИРЭА", y_position)
-
-    if students:
-        for student in students:
-            y_position = add_user_info(student, y_position)
-            if y_position < inch:
-                c.showPage()
-                y_position = letter[1] - inch
-
-
-    else:
-        p = Paragraph("Нет студентов МИРЭА.", normal_style)
-        p.wrapOn(c, letter[0] - 2 * inch, letter[1])
-        p.drawOn(c, inch, y_position)
-        y_position -= 0.3 * inch
-
-    y_position = add_section_header("Не студенты", y_position)
-
-    if non_students:
-        for non_student in non_students:
-            y_position = add_user_info(non_student, y_position)
-            if y_position < inch:
-                c.showPage()
-                y_position = letter[1] - inch
-
-    else:
-        p = Paragraph("Нет участников не из МИРЭА.", normal_style)
-        p.wrapOn(c, letter[0] - 2 * inch, letter[1])
-        p.drawOn(c, inch, y_position)
-        y_position -= 0.3 * inch
+        y_pos -= step
+        if y_pos < inch:
+            c.showPage()
+            y_pos = letter[1] - inch
+        return y_pos
+
+    rows = (row for chunk in packed_chunks for row in json.loads(chunk))
+    row = next(rows, None)
+
+    for is_mirea_section, header, empty_text in ((True, "Студенты МИРЭА", "Нет студентов МИРЭА."),
+                                                 (False, "Не студенты", "Нет участников не из МИРЭА.")):
+        y_position = add_paragraph(header, heading_style, y_position, 0.5 * inch)
+        if row is None or bool(row[3]) != is_mirea_section:
+            y_position = add_paragraph(empty_text, normal_style, y_position, 0.3 * inch)
+            continue
+
+        while row is not None and bool(row[3]) == is_mirea_section:
+            full_name, username, group, is_mirea_student = row
+            user_info = f"ФИО: {full_name or 'Не указано'}, Telegram: @{username}"
+            if is_mirea_student:
+                user_info += f", Группа: {group or 'Не указана'}"
+            y_position = add_paragraph(user_info, normal_style, y_position, 0.3 * inch)
+            row = next(rows, None)
 
     c.save()
-    logger.info(f"PDF отчет создан: {file_path}")
-    return file_path
\ No newline at end of file
+    return buffer.getvalue()
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Пул процессов для отчетов создается при первом отчете."""
+    global _executor
+    if _executor is None:
+        # spawn: процессы пула не наследуют event loop и подключения бота
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=register_fonts)
+    return _executor
+
+
+def shutdown_pdf_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+async def create_hackathon_report_pdf(packed_chunks: list[bytes], hackathon_name: str, start_date: str, end_date: str) -> bytes:
+    """Строит отчет по упакованным пачкам участников в пуле процессов, не блокируя event loop бота."""
+    loop = asyncio.get_running_loop()
+    pdf = await loop.run_in_executor(get_pdf_executor(), render_hackathon_report_pdf,
+                                     packed_chunks, hackathon_name, start_date, end_date)
+    logger.info(f"PDF отчет по хакатону {hackathon_name} создан ({len(packed_chunks)} пачек участников, {len(pdf)} байт)")
+    return pdf
@@ -0,0 +1,116 @@
+import time
+import asyncio
+from loguru import logger
+from aiogram.exceptions import TelegramRetryAfter
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, TypeVar
+
+from config import settings
+
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity подряд."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+
+    def is_idle(self, now: float) -> bool:
+        """Ведро заполнено и никто его не ждет: его можно удалить без потери ограничения."""
+        self._refill(now)
+        return self._tokens >= self.capacity and not self._lock.locked()
+
+
+    async def acquire(self) -> None:
+        """Ждет токен. Ожидающие обслуживаются по очереди, поэтому порядок отправок в чат сохраняется."""
+        async with self._lock:
+            while True:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class TelegramSendScheduler:
+    """
+    Планировщик исходящих запросов к Telegram.
+    Ограничивает общий поток запросов бота и поток в каждый чат, а TelegramRetryAfter
+    обрабатывает централизованно: все отправки приостанавливаются до конца запрошенной паузы.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: int = 3,
+        max_retries: int = 3,
+        max_idle_chats: int = 1000
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_idle_chats = max_idle_chats
+        self._global_bucket = TokenBucket(rate=global_rate, capacity=global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._resume_at = 0.0
+
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.max_idle_chats:
+                now = time.monotonic()
+                self._chat_buckets = {key: value for key, value in self._chat_buckets.items()
+                                      if not value.is_idle(now)}
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate=self.chat_rate, capacity=self.chat_burst)
+        return bucket
+
+
+    async def _wait_for_resume(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+    async def run(self, chat_id: int, request: Callable[[], Awaitable[T]]) -> T:
+        """Выполняет запрос к Telegram (например, lambda: bot.send_message(...)) с учетом лимитов."""
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_resume()
+            await self._chat_bucket(chat_id).acquire()
+            await self._global_bucket.acquire()
+            await self._wait_for_resume()
+
+            try:
+                return await request()
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self._resume_at = max(self._resume_at, time.monotonic() + e.retry_after)
+                logger.warning(f"Telegram ограничил отправку на {e.retry_after} сек. (чат {chat_id}), "
+                               f"попытка {attempt + 1} из {self.max_retries}")
+
+
+    async def run_many(self, requests: Iterable[tuple[int, Callable[[], Awaitable[Any]]]]) -> List[Any]:
+        """Выполняет независимые запросы (ID чата, запрос) одновременно.
+        Результаты возвращаются в порядке запросов; ошибка одного запроса возвращается вместо его результата."""
+        return await asyncio.gather(*(self.run(chat_id, request) for chat_id, request in requests),
+                                    return_exceptions=True)
+
+
+telegram_scheduler = TelegramSendScheduler(
+    global_rate=settings.TG_GLOBAL_RATE,
+    chat_rate=settings.TG_CHAT_RATE,
+    chat_burst=settings.TG_CHAT_BURST
+)
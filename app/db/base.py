@@ -65,6 +65,39 @@ class BaseDAO(Generic[T]):
             raise
 
 
+    async def find_page(self, filters: BaseModel | None = None, after_id: int | None = None, limit: int = 20):
+        """
+        Страница записей по ключу (keyset): записи с id больше after_id в порядке возрастания id.
+        Поля фильтра с суффиксом _prefix ищут по началу значения колонки без суффикса (name_prefix -> name).
+        Возвращает записи страницы и курсор следующей страницы (None, если страница последняя).
+        """
+        filter_dict = filters.model_dump(exclude_none=True) if filters else {}
+        logger.info(f"Поиск страницы {self.model.__name__} после ID {after_id} (лимит {limit}) по фильтрам: {filter_dict}")
+        try:
+            query = select(self.model)
+            for key, value in filter_dict.items():
+                if key.endswith("_prefix"):
+                    column = getattr(self.model, key.removesuffix("_prefix"))
+                    query = query.where(column.startswith(value, autoescape=True))
+                else:
+                    query = query.where(getattr(self.model, key) == value)
+
+            if after_id is not None:
+                query = query.where(self.model.id > after_id)
+
+            # Лишняя запись показывает, есть ли следующая страница
+            query = query.order_by(self.model.id).limit(limit + 1)
+            result = await self._session.execute(query)
+            records = result.scalars().all()
+
+            next_cursor = records[limit - 1].id if len(records) > limit else None
+            logger.info(f"Найдено {min(len(records), limit)} записей, следующая страница: {next_cursor}")
+            return records[:limit], next_cursor
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при поиске страницы записей по фильтрам {filter_dict}: {e}")
+            raise
+
+
     async def add(self, values: BaseModel):
         values_dict = values.model_dump(exclude_unset=True)
         logger.info(f"Добавление записи {self.model.__name__} с параметрами: {values_dict}")
@@ -1,9 +1,12 @@
-from typing import List
+from collections import Counter
+from enum import StrEnum
+from typing import AsyncIterator, List, NamedTuple
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import delete, func, literal, null, select, union_all, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from app.api.typization.schemas import HackathonIDModel
 from app.db.base import BaseDAO
@@ -31,36 +34,70 @@ class UserDAO(BaseDAO[User]):
             logger.error(f"Ошибка при получении user_id по telegram_id {telegram_id}: {e}")
             raise
 
-    async def get_hackathon_participants(self, hackathon_id: int) -> list[User]:
+    async def stream_hackathon_participants(self, hackathon_id: int, chunk_size: int = 500) -> AsyncIterator[list[tuple]]:
         """
-        Получает всех пользователей, которые являются участниками хакатона
-        (состоят в командах, участвующих в хакатоне).
+        Отдает пачками по chunk_size всех пользователей, которые являются участниками хакатона
+        (состоят в командах, участвующих в хакатоне), в виде строк (full_name, username, group, is_mirea_student):
+        сначала студенты МИРЭА по группам, затем остальные.
+        Строки читаются серверным курсором, без загрузки ORM-объектов: в памяти одновременно только одна пачка.
         """
         try:
             logger.info(f"Поиск участников хакатона с ID: {hackathon_id}")
 
             query = (
-                select(self.model)
+                select(self.model.full_name, self.model.username, self.model.group, self.model.is_mirea_student)
                 .join(Member, self.model.telegram_id == Member.user_id)
-                .join(Team, Member.team_id == Team.id)
-                .where(Team.hackathon_id == hackathon_id)
-                .distinct()
+                .where(Member.hackathon_id == hackathon_id)
+                .order_by(self.model.is_mirea_student.desc(), func.coalesce(self.model.group, ""), self.model.id)
+                .execution_options(yield_per=chunk_size)
             )
 
-            result = await self._session.execute(query)
-            participants = result.scalars().all()
+            found = 0
+            result = await self._session.stream(query)
+            async for chunk in result.partitions():
+                found += len(chunk)
+                yield [tuple(row) for row in chunk]
 
-            if participants:
-                logger.info(f"Найдено {len(participants)} участников хакатона с ID: {hackathon_id}")
+            if found:
+                logger.info(f"Найдено {found} участников хакатона с ID: {hackathon_id}")
             else:
                 logger.info(f"Участники хакатона с ID: {hackathon_id} не найдены")
 
-            return participants
-
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при поиске участников хакатона {hackathon_id}: {e}")
             raise
 
+    async def get_memberships_and_invites(self, user_id: int) -> list[dict]:
+        """
+        Одним запросом (UNION ALL) получает команды пользователя с его ролью и входящие приглашения.
+        Каждая строка содержит kind ("member" или "invite"), role, invite_id и колонки команды.
+        """
+        try:
+            logger.info(f"Поиск команд и приглашений пользователя с ID: {user_id}")
+
+            team_columns = (Team.id, Team.name, Team.is_open, Team.description, Team.hackathon_id, Team.member_count)
+            memberships = (
+                select(literal("member").label("kind"), Member.role.label("role"),
+                       null().label("invite_id"), *team_columns)
+                .join(Team, Member.team_id == Team.id)
+                .where(Member.user_id == user_id)
+            )
+            invites = (
+                select(literal("invite"), null(), Invite.id, *team_columns)
+                .join(Team, Invite.team_id == Team.id)
+                .where(Invite.invite_user_id == user_id)
+            )
+
+            result = await self._session.execute(union_all(memberships, invites))
+            rows = [dict(row) for row in result.mappings()]
+
+            logger.info(f"Найдено {len(rows)} команд и приглашений пользователя с ID: {user_id}")
+            return rows
+
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при поиске команд и приглашений пользователя {user_id}: {e}")
+            raise
+
 
 class TeamDAO(BaseDAO[Team]):
     model = Team
@@ -91,25 +128,196 @@ class TeamDAO(BaseDAO[Team]):
             logger.error(f"Ошибка при поиске команды с участниками для user ID {user_id}: {e}")
             raise
 
+    async def find_team_with_members(self, team_id: int) -> dict | None:
+        """
+        Находит команду вместе с участниками одним запросом (JOIN).
+        Возвращает словарь {"team": ..., "members": [...]} или None, если команды нет.
+        """
+        try:
+            query = (
+                select(self.model)
+                .options(joinedload(self.model.members))
+                .where(self.model.id == team_id)
+            )
+
+            result = await self._session.execute(query)
+            team = result.unique().scalar_one_or_none()
+            if team is None:
+                logger.info(f"Команда с ID {team_id} не найдена")
+                return None
+
+            members = sorted(team.members, key=lambda member: member.id)
+            logger.info(f"Команда с ID {team_id} найдена, участников: {len(members)}")
+            return {"team": team.to_dict(), "members": [member.to_dict() for member in members]}
+
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при поиске команды с участниками по ID {team_id}: {e}")
+            raise
+
 
 class HackathonDAO(BaseDAO[Hackathon]):
     model = Hackathon
 
 
+class JoinStatus(StrEnum):
+    JOINED = "joined"
+    TEAM_NOT_FOUND = "team_not_found"
+    TEAM_FULL = "team_full"
+    ALREADY_MEMBER = "already_member"
+
+
+class JoinResult(NamedTuple):
+    status: JoinStatus
+    member: Member | None = None
+    # Количество участников команды после вступления
+    member_count: int | None = None
+
+
+# Уникальный индекс, который не дает пользователю состоять в двух командах одного хакатона
+MEMBERSHIP_UNIQUE_CONSTRAINT = "uq_members_user_id_hackathon_id"
+
+
+def violated_constraint(error: IntegrityError) -> str | None:
+    """Имя нарушенного ограничения: asyncpg передает его в исходном исключении драйвера,
+    для остальных драйверов имя ищется в тексте ошибки."""
+    driver_error = getattr(error.orig, "__cause__", None)
+    constraint_name = getattr(driver_error, "constraint_name", None)
+    if constraint_name:
+        return constraint_name
+
+    message = str(error.orig)
+    for constraint in Member.__table__.constraints:
+        if constraint.name and constraint.name in message:
+            return constraint.name
+    return None
+
+
 class MemberDAO(BaseDAO[Member]):
     model = Member
 
+    async def _shift_member_count(self, team_id: int, delta: int) -> int | None:
+        """Атомарно меняет Team.member_count и возвращает новое значение."""
+        query = (
+            update(Team)
+            .where(Team.id == team_id)
+            # updated_at не трогаем: смена состава не считается изменением самой команды
+            .values(member_count=Team.member_count + delta, updated_at=Team.updated_at)
+            .returning(Team.member_count)
+        )
+        return (await self._session.execute(query)).scalar_one_or_none()
+
+    async def add(self, values: BaseModel):
+        new_member = await super().add(values=values)
+        await self._shift_member_count(new_member.team_id, 1)
+        return new_member
+
+    async def add_many(self, instances: List[BaseModel]):
+        new_members = await super().add_many(instances=instances)
+        for team_id, added in Counter(member.team_id for member in new_members).items():
+            await self._shift_member_count(team_id, added)
+        return new_members
+
+    async def delete(self, filters: BaseModel):
+        filter_dict = filters.model_dump(exclude_unset=True)
+        logger.info(f"Удаление участников по фильтру: {filter_dict}")
+
+        if not filter_dict:
+            logger.error("Нужен хотя бы один фильтр для удаления.")
+            raise ValueError("Нужен хотя бы один фильтр для удаления.")
+        try:
+            query = delete(self.model).filter_by(**filter_dict).returning(self.model.team_id)
+            removed = Counter((await self._session.execute(query)).scalars())
+            for team_id, count in removed.items():
+                await self._shift_member_count(team_id, -count)
+
+            logger.info(f"Удалено {removed.total()} участников.")
+            return removed.total()
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при удалении участников: {e}")
+            raise
+
+    async def remove_member(self, member_id: int) -> int | None:
+        """Удаляет участника и возвращает новое количество участников его команды (None, если участника нет)."""
+        logger.info(f"Удаление участника с ID: {member_id}")
+        try:
+            query = delete(self.model).where(self.model.id == member_id).returning(self.model.team_id)
+            team_id = (await self._session.execute(query)).scalar_one_or_none()
+            if team_id is None:
+                return None
+            return await self._shift_member_count(team_id, -1)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при удалении участника с ID {member_id}: {e}")
+            raise
+
+    async def join_team(self, user_id: int, team_id: int, tg_name: str, role: str = "member") -> JoinResult:
+        """
+        Добавляет пользователя в команду с проверкой вместимости и участия в хакатоне на стороне БД.
+        Место в команде занимается одним условным UPDATE счетчика member_count: Postgres перепроверяет
+        условие на актуальной версии строки, поэтому параллельные вступления не могут переполнить команду.
+        Повторное участие в хакатоне отсекает уникальный индекс, откатывая и счетчик.
+        """
+        logger.info(f"Вступление пользователя {user_id} в команду {team_id}")
+        try:
+            max_members = (
+                select(Hackathon.max_members)
+                .where(Hackathon.id == Team.hackathon_id)
+                .scalar_subquery()
+            )
+            take_slot = (
+                update(Team)
+                .where(Team.id == team_id, Team.member_count < max_members)
+                .values(member_count=Team.member_count + 1, updated_at=Team.updated_at)
+                .returning(Team.hackathon_id, Team.member_count)
+            )
+
+            try:
+                async with self._session.begin_nested():
+                    slot = (await self._session.execute(take_slot)).one_or_none()
+                    if slot is None:
+                        team_exists = await self._session.scalar(select(Team.id).where(Team.id == team_id))
+                        status = JoinStatus.TEAM_FULL if team_exists else JoinStatus.TEAM_NOT_FOUND
+                        logger.info(f"Вступление в команду {team_id} невозможно: {status}")
+                        return JoinResult(status)
+
+                    member = self.model(user_id=user_id, team_id=team_id, hackathon_id=slot.hackathon_id,
+                                        tg_name=tg_name, role=role)
+                    self._session.add(member)
+                    await self._session.flush()
+            except IntegrityError as e:
+                if violated_constraint(e) != MEMBERSHIP_UNIQUE_CONSTRAINT:
+                    raise
+                logger.info(f"Пользователь {user_id} уже участвует в хакатоне команды {team_id}")
+                return JoinResult(JoinStatus.ALREADY_MEMBER)
+
+            logger.info(f"Пользователь {user_id} вступил в команду {team_id}")
+            return JoinResult(JoinStatus.JOINED, member, slot.member_count)
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при вступлении пользователя {user_id} в команду {team_id}: {e}")
+            raise
+
+    async def find_roles_by_user_id(self, user_id: int) -> dict[int, str]:
+        """Возвращает роли пользователя во всех его командах: team_id -> role."""
+        try:
+            logger.info(f"Поиск ролей пользователя с user_id: {user_id}")
+            query = select(self.model.team_id, self.model.role).where(self.model.user_id == user_id)
+            result = await self._session.execute(query)
+            roles = {team_id: role for team_id, role in result}
+            logger.info(f"Найдено {len(roles)} ролей пользователя с user_id: {user_id}")
+            return roles
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при поиске ролей пользователя с user_id {user_id}: {e}")
+            raise
+
     async def find_existing_member(self, user_id: int, hackathon_id: int):
         try:
             logger.info(f"Поиск существующего участника с user_id: {user_id} и hackathon_id: {hackathon_id}")
             query = (
                 select(self.model)
-                .join(Team, self.model.team_id == Team.id)
-                .where(self.model.user_id == user_id, Team.hackathon_id == hackathon_id)
+                .where(self.model.user_id == user_id, self.model.hackathon_id == hackathon_id)
             )
 
             result = await self._session.execute(query)
-            member = result.scalars().first()
+            member = result.scalar_one_or_none()
 
             if member:
                 logger.info(f"Найден участник с user_id: {user_id} и hackathon_id: {hackathon_id}")
@@ -1,14 +1,33 @@
 import uuid
+from functools import cache
+from operator import attrgetter
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy import func, TIMESTAMP, Integer, inspect
 from sqlalchemy.orm import DeclarativeBase, declared_attr, mapped_column, Mapped
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs, AsyncSession
 
-from config import db_url
+from app.db.pool import InstrumentedAsyncPool
+from config import db_url, settings
 
 
-engine = create_async_engine(url=db_url)
+connect_args = {}
+if db_url.startswith("postgresql+asyncpg"):
+    connect_args = {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+
+engine = create_async_engine(
+    url=db_url,
+    poolclass=InstrumentedAsyncPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=connect_args,
+)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession)
 
 
@@ -32,11 +51,18 @@ class Base(AsyncAttrs, DeclarativeBase):
     def __tablename__(cls) -> str:
         return cls.__name__.lower() + 's'
 
+    @classmethod
+    @cache
+    def _column_extractor(cls) -> tuple[tuple[str, ...], attrgetter]:
+        #Ключи колонок и функция, читающая их значения за один вызов (строятся один раз на модель)
+        keys = tuple(column.key for column in inspect(cls).columns)
+        return keys, attrgetter(*keys)
+
     def to_dict(self, exclude_none: bool = False):
         #exclude_none (bool): Исключать ли None значения из результата
+        keys, extract = self._column_extractor()
         result = {}
-        for column in inspect(self.__class__).columns:
-            value = getattr(self, column.key)
+        for key, value in zip(keys, extract(self)):
 
             if isinstance(value, datetime):
                 value = int(value.timestamp())
@@ -46,6 +72,6 @@ class Base(AsyncAttrs, DeclarativeBase):
                 value = str(value)
 
             if not exclude_none or value is not None:
-                result[column.key] = value
+                result[key] = value
 
         return result
@@ -0,0 +1,103 @@
+"""initial schema
+
+Базовая схема: таблицы в том виде, в каком они создавались до появления миграций в репозитории.
+Для уже развернутой базы выполните `alembic stamp 5a1d0c3e9b21`, затем `alembic upgrade head`.
+
+Revision ID: 5a1d0c3e9b21
+Revises:
+Create Date: 2025-01-20 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1d0c3e9b21'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps() -> list[sa.Column]:
+    return [
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('last_name', sa.String(), nullable=True),
+        sa.Column('photo_url', sa.String(), nullable=True),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('is_mirea_student', sa.Boolean(), nullable=True),
+        sa.Column('group', sa.String(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('telegram_id', name='users_telegram_id_key'),
+    )
+    op.create_table(
+        'hackathons',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('start_description', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('max_members', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.TIMESTAMP(), nullable=True),
+        sa.Column('end_date', sa.TIMESTAMP(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'teams',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('is_open', sa.Boolean(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('hackathon_id', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['hackathon_id'], ['hackathons.id'], ondelete='CASCADE',
+                                name='teams_hackathon_id_fkey'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'members',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('tg_name', sa.String(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.telegram_id'], name='members_user_id_fkey'),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE', name='members_team_id_fkey'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'invites',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('invite_user_id', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE', name='invites_team_id_fkey'),
+        sa.ForeignKeyConstraint(['invite_user_id'], ['users.telegram_id'], ondelete='CASCADE',
+                                name='invites_invite_user_id_fkey'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('invites')
+    op.drop_table('members')
+    op.drop_table('teams')
+    op.drop_table('hackathons')
+    op.drop_table('users')
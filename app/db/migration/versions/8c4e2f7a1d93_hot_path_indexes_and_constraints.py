@@ -0,0 +1,124 @@
+"""hot path indexes and membership constraints
+
+- members.hackathon_id (заполняется из команды) и составной внешний ключ на teams(id, hackathon_id);
+- уникальность (user_id, hackathon_id): пользователь состоит не более чем в одной команде хакатона;
+- уникальность имени команды в пределах хакатона;
+- индексы под выборки участников по команде и приглашений по пользователю/команде.
+
+Миграция не меняет данные: если в базе уже есть пользователи, состоящие в нескольких командах
+одного хакатона, или команды с одинаковыми именами в хакатоне, она останавливается со списком
+таких записей. Их нужно разобрать вручную (решить, какое участие и какое имя оставить) и
+запустить миграцию снова.
+
+Revision ID: 8c4e2f7a1d93
+Revises: 5a1d0c3e9b21
+Create Date: 2025-01-20 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2f7a1d93'
+down_revision: Union[str, Sequence[str], None] = '5a1d0c3e9b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Сколько дубликатов каждого вида показывать в сообщении об ошибке
+DUPLICATES_REPORT_LIMIT = 50
+
+
+def _abort_on_duplicates() -> None:
+    """Останавливает миграцию, если существующие данные нарушают новые ограничения уникальности."""
+    bind = op.get_bind()
+
+    duplicate_members = bind.execute(sa.text(
+        """
+        SELECT user_id, hackathon_id,
+               string_agg(format('team %s (%s, member %s)', team_id, role, id), ', ' ORDER BY id) AS memberships
+        FROM members
+        GROUP BY user_id, hackathon_id
+        HAVING count(*) > 1
+        ORDER BY user_id, hackathon_id
+        LIMIT :limit
+        """
+    ), {"limit": DUPLICATES_REPORT_LIMIT}).all()
+
+    duplicate_team_names = bind.execute(sa.text(
+        """
+        SELECT hackathon_id, name, string_agg(id::text, ', ' ORDER BY id) AS team_ids
+        FROM teams
+        GROUP BY hackathon_id, name
+        HAVING count(*) > 1
+        ORDER BY hackathon_id, name
+        LIMIT :limit
+        """
+    ), {"limit": DUPLICATES_REPORT_LIMIT}).all()
+
+    if not duplicate_members and not duplicate_team_names:
+        return
+
+    lines = ["Существующие данные нарушают новые ограничения уникальности, миграция остановлена.",
+             "Разберите дубликаты вручную и запустите миграцию снова."]
+    if duplicate_members:
+        lines.append("Пользователи в нескольких командах одного хакатона:")
+        lines.extend(f"  user {row.user_id}, hackathon {row.hackathon_id}: {row.memberships}"
+                     for row in duplicate_members)
+    if duplicate_team_names:
+        lines.append("Команды с одинаковыми именами в хакатоне:")
+        lines.extend(f"  hackathon {row.hackathon_id}, name {row.name!r}: teams {row.team_ids}"
+                     for row in duplicate_team_names)
+    if DUPLICATES_REPORT_LIMIT in (len(duplicate_members), len(duplicate_team_names)):
+        lines.append(f"(показаны первые {DUPLICATES_REPORT_LIMIT} дубликатов каждого вида)")
+
+    raise RuntimeError("\n".join(lines))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('members', sa.Column('hackathon_id', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE members
+        SET hackathon_id = teams.hackathon_id
+        FROM teams
+        WHERE teams.id = members.team_id
+        """
+    )
+    _abort_on_duplicates()
+    op.alter_column('members', 'hackathon_id', nullable=False)
+
+    op.create_unique_constraint('uq_teams_hackathon_id_name', 'teams', ['hackathon_id', 'name'])
+    op.create_unique_constraint('uq_teams_id_hackathon_id', 'teams', ['id', 'hackathon_id'])
+
+    op.drop_constraint('members_team_id_fkey', 'members', type_='foreignkey')
+    op.create_foreign_key(
+        'fk_members_team_id_hackathon_id', 'members', 'teams',
+        ['team_id', 'hackathon_id'], ['id', 'hackathon_id'],
+        ondelete='CASCADE', onupdate='CASCADE'
+    )
+    op.create_unique_constraint('uq_members_user_id_hackathon_id', 'members', ['user_id', 'hackathon_id'])
+    op.create_index('ix_members_team_id_role', 'members', ['team_id', 'role'])
+
+    op.create_index('ix_invites_invite_user_id', 'invites', ['invite_user_id'])
+    op.create_index('ix_invites_team_id_invite_user_id', 'invites', ['team_id', 'invite_user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invites_team_id_invite_user_id', table_name='invites')
+    op.drop_index('ix_invites_invite_user_id', table_name='invites')
+
+    op.drop_index('ix_members_team_id_role', table_name='members')
+    op.drop_constraint('uq_members_user_id_hackathon_id', 'members', type_='unique')
+    op.drop_constraint('fk_members_team_id_hackathon_id', 'members', type_='foreignkey')
+    op.create_foreign_key('members_team_id_fkey', 'members', 'teams', ['team_id'], ['id'], ondelete='CASCADE')
+
+    op.drop_constraint('uq_teams_id_hackathon_id', 'teams', type_='unique')
+    op.drop_constraint('uq_teams_hackathon_id_name', 'teams', type_='unique')
+
+    op.drop_column('members', 'hackathon_id')
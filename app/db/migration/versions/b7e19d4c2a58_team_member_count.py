@@ -0,0 +1,42 @@
+"""team member_count
+
+teams.member_count - денормализованное количество участников команды.
+Заполняется по текущим данным; дальше поддерживается MemberDAO в той же транзакции,
+что и вставка/удаление участника.
+
+Revision ID: b7e19d4c2a58
+Revises: 8c4e2f7a1d93
+Create Date: 2025-01-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e19d4c2a58'
+down_revision: Union[str, Sequence[str], None] = '8c4e2f7a1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('teams', sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE teams
+        SET member_count = counts.total
+        FROM (SELECT team_id, count(*) AS total FROM members GROUP BY team_id) counts
+        WHERE counts.team_id = teams.id
+        """
+    )
+    op.create_check_constraint('ck_teams_member_count_non_negative', 'teams', 'member_count >= 0')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_teams_member_count_non_negative', 'teams', type_='check')
+    op.drop_column('teams', 'member_count')
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, BigInteger, ForeignKey, TIMESTAMP
+from sqlalchemy import (Integer, BigInteger, CheckConstraint, ForeignKey, ForeignKeyConstraint, Index, TIMESTAMP,
+                        UniqueConstraint)
 from datetime import datetime
 from typing import List
 from app.db.database import Base
@@ -22,10 +23,20 @@ class User(Base):
 
 
 class Team(Base):
+    __table_args__ = (
+        # Имя команды уникально в пределах хакатона; индекс также обслуживает выборки по hackathon_id
+        UniqueConstraint("hackathon_id", "name", name="uq_teams_hackathon_id_name"),
+        # Цель составного внешнего ключа members(team_id, hackathon_id)
+        UniqueConstraint("id", "hackathon_id", name="uq_teams_id_hackathon_id"),
+        CheckConstraint("member_count >= 0", name="ck_teams_member_count_non_negative"),
+    )
+
     name: Mapped[str]
     is_open: Mapped[bool]
     description: Mapped[str | None]
     hackathon_id: Mapped[int] = mapped_column(Integer, ForeignKey("hackathons.id", ondelete="CASCADE"))
+    # Количество участников; меняется только через MemberDAO вместе со вставкой/удалением участника
+    member_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     hackathon: Mapped["Hackathon"] = relationship("Hackathon", back_populates="teams")
     members: Mapped[List["Member"]] = relationship("Member", back_populates="team")
@@ -44,8 +55,20 @@ class Hackathon(Base):
 
 
 class Member(Base):
+    __table_args__ = (
+        # hackathon_id всегда совпадает с хакатоном команды: обновляется и удаляется вместе с ней
+        ForeignKeyConstraint(
+            ["team_id", "hackathon_id"], ["teams.id", "teams.hackathon_id"],
+            ondelete="CASCADE", onupdate="CASCADE", name="fk_members_team_id_hackathon_id"
+        ),
+        # Пользователь состоит не более чем в одной команде хакатона
+        UniqueConstraint("user_id", "hackathon_id", name="uq_members_user_id_hackathon_id"),
+        Index("ix_members_team_id_role", "team_id", "role"),
+    )
+
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.telegram_id"))
-    team_id: Mapped[int] = mapped_column(Integer, ForeignKey("teams.id", ondelete="CASCADE"))
+    team_id: Mapped[int] = mapped_column(Integer)
+    hackathon_id: Mapped[int] = mapped_column(Integer)
     tg_name: Mapped[str]
     role: Mapped[str]
 
@@ -54,6 +77,11 @@ class Member(Base):
 
 
 class Invite(Base):
+    __table_args__ = (
+        Index("ix_invites_invite_user_id", "invite_user_id"),
+        Index("ix_invites_team_id_invite_user_id", "team_id", "invite_user_id"),
+    )
+
     team_id: Mapped[int] = mapped_column(Integer, ForeignKey("teams.id", ondelete="CASCADE"))
     invite_user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.telegram_id", ondelete="CASCADE"))
 
@@ -0,0 +1,64 @@
+import time
+from dataclasses import dataclass, asdict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolStats:
+    """Счетчики работы пула подключений к БД в рамках одного воркера."""
+
+    checkouts: int = 0
+    timeouts: int = 0
+    overflow_events: int = 0
+    wait_time_total_ms: float = 0.0
+    wait_time_max_ms: float = 0.0
+
+    def record_wait(self, wait_ms: float) -> None:
+        self.wait_time_total_ms += wait_ms
+        self.wait_time_max_ms = max(self.wait_time_max_ms, wait_ms)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Пул подключений, который измеряет время ожидания свободного подключения
+    и считает выходы за pool_size (overflow) и таймауты."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+
+    def _do_get(self):
+        overflow_before = self.overflow()
+        started_at = time.perf_counter()
+
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_wait((time.perf_counter() - started_at) * 1000)
+
+        self.stats.checkouts += 1
+        # overflow() начинается с -pool_size: подключения в пределах pool_size выходом за пул не считаются
+        if self.overflow() > max(overflow_before, 0):
+            self.stats.overflow_events += 1
+
+        return connection
+
+
+    def snapshot(self) -> dict:
+        """Счетчики пула вместе с его текущим состоянием."""
+        stats = self.stats.as_dict()
+        stats["wait_time_avg_ms"] = stats["wait_time_total_ms"] / stats["checkouts"] if stats["checkouts"] else 0.0
+
+        return {
+            **stats,
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+        }
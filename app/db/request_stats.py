@@ -0,0 +1,29 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import event
+
+from app.db.database import engine
+
+
+@dataclass
+class RequestDbStats:
+    """Использование пула подключений к БД в рамках одного запроса."""
+
+    checkouts: int = 0
+
+
+_request_db_stats: ContextVar[RequestDbStats | None] = ContextVar("request_db_stats", default=None)
+
+
+def start_request_db_stats() -> RequestDbStats:
+    """Начинает подсчет обращений к пулу для текущего запроса."""
+    stats = RequestDbStats()
+    _request_db_stats.set(stats)
+    return stats
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _count_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.checkouts += 1
@@ -1,7 +1,19 @@
-from typing import AsyncGenerator
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Awaitable, Callable
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import async_session_maker
 
+AFTER_COMMIT_HOOKS = "after_commit_hooks"
+COMMITTED_HOOKS = "committed_hooks"
+SAVEPOINT_MARKS = "savepoint_marks"
+
+# Сессия текущего HTTP-запроса: все зависимости запроса работают через одно подключение к БД
+_request_session: ContextVar[AsyncSession | None] = ContextVar("request_session", default=None)
+
+
 class DatabaseSession:
     @staticmethod
     async def get_session(commit: bool = False) -> AsyncGenerator[AsyncSession, None]:
@@ -10,22 +22,108 @@ class DatabaseSession:
                 yield session
                 if commit:
                     await session.commit()
+                await DatabaseSession.run_after_commit_hooks(session)
             except Exception:
+                DatabaseSession.discard_after_commit_hooks(session)
                 await session.rollback()
+                # Изменения, закоммиченные до ошибки, остаются в БД: их действия выполняются
+                await DatabaseSession.run_after_commit_hooks(session)
                 raise
             finally:
                 await session.close()
 
+    @staticmethod
+    async def get_request_session(commit: bool = False) -> AsyncGenerator[AsyncSession, None]:
+        """Возвращает сессию текущего запроса, открывая ее при первом обращении.
+        Повторные обращения в рамках запроса получают ту же сессию; закрывает ее первый владелец"""
+        session = _request_session.get()
+        if session is not None:
+            yield session
+            if commit:
+                await session.commit()
+                await DatabaseSession.run_after_commit_hooks(session)
+            return
+
+        async for session in DatabaseSession.get_session(commit=commit):
+            _request_session.set(session)
+            try:
+                yield session
+            finally:
+                _request_session.set(None)
+
     @staticmethod
     async def get_db() -> AsyncGenerator[AsyncSession, None]:
         """Dependency для получения сессии без автоматического коммита"""
-        async for session in DatabaseSession.get_session(commit=False):
+        async for session in DatabaseSession.get_request_session(commit=False):
             yield session
 
     @staticmethod
     async def get_db_with_commit() -> AsyncGenerator[AsyncSession, None]:
         """Dependency для получения сессии с автоматическим коммитом"""
-        async for session in DatabaseSession.get_session(commit=True):
+        async for session in DatabaseSession.get_request_session(commit=True):
             yield session
 
-db = DatabaseSession()
\ No newline at end of file
+    @staticmethod
+    def in_own_session(load: Callable[[AsyncSession], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """Оборачивает чтение из БД так, чтобы оно открывало собственную сессию.
+        Нужно для фоновых задач, которые выполняются после закрытия сессии запроса"""
+        async def run() -> Any:
+            async with async_session_maker() as session:
+                return await load(session)
+        return run
+
+    @staticmethod
+    def add_after_commit_hook(session: AsyncSession, hook: Callable[[], Awaitable[None]]) -> None:
+        """Регистрирует действие, которое выполнится только после коммита транзакции, в которой оно зарегистрировано"""
+        session.info.setdefault(AFTER_COMMIT_HOOKS, []).append(hook)
+
+    @staticmethod
+    async def run_after_commit_hooks(session: AsyncSession) -> None:
+        """Выполняет действия, чья транзакция закоммичена; действия без коммита отбрасываются.
+        Ошибки не пробрасываются: данные уже закоммичены"""
+        session.info.pop(AFTER_COMMIT_HOOKS, None)
+        for hook in session.info.pop(COMMITTED_HOOKS, []):
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"Ошибка при выполнении действия после коммита: {e}")
+
+    @staticmethod
+    def discard_after_commit_hooks(session: AsyncSession) -> None:
+        """Отменяет зарегистрированные действия (например, при откате транзакции)"""
+        session.info.pop(AFTER_COMMIT_HOOKS, None)
+
+@event.listens_for(Session, "after_transaction_create")
+def _on_transaction_create(session: Session, transaction: SessionTransaction) -> None:
+    """Запоминает, сколько действий было зарегистрировано до начала SAVEPOINT"""
+    if transaction.nested:
+        session.info.setdefault(SAVEPOINT_MARKS, []).append(len(session.info.get(AFTER_COMMIT_HOOKS, [])))
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session: Session) -> None:
+    """Действия, зарегистрированные до коммита, будут выполнены: их изменения в БД зафиксированы.
+    Освобождение SAVEPOINT ничего не фиксирует: действия ждут коммита внешней транзакции"""
+    if session.in_nested_transaction():
+        session.info[SAVEPOINT_MARKS].pop()
+        return
+
+    pending = session.info.pop(AFTER_COMMIT_HOOKS, [])
+    if pending:
+        session.info.setdefault(COMMITTED_HOOKS, []).extend(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session: Session) -> None:
+    """Изменения еще не закоммиченных действий откатились вместе с транзакцией.
+    При откате SAVEPOINT отбрасываются только действия, зарегистрированные внутри него"""
+    if session.in_nested_transaction():
+        mark = session.info[SAVEPOINT_MARKS].pop()
+        del session.info.get(AFTER_COMMIT_HOOKS, [])[mark:]
+        return
+
+    session.info.pop(AFTER_COMMIT_HOOKS, None)
+    session.info.pop(SAVEPOINT_MARKS, None)
+
+
+db = DatabaseSession()
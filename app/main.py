@@ -4,8 +4,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from uvicorn_worker import UvicornWorker
 
 from app.redis.redis_client import redis_client
-from app.api.routers import home, hackathon, team
+from app.api.routers import home, hackathon, team, metrics
 from app.api.utils.api_utils import exception_handler
+from app.api.utils.database_middleware import db_usage_middleware
 from config import logger, front_site_url
 
 
@@ -51,11 +52,14 @@ def create_app() -> FastAPI:
         max_age=3600,
     )
 
+    app.middleware("http")(db_usage_middleware)
+
     app.add_exception_handler(Exception, exception_handler)
 
     app.include_router(home.router)
     app.include_router(hackathon.router)
     app.include_router(team.router)
+    app.include_router(metrics.router)
 
     logger.info("Приложение собрано и готово к работе")
 
@@ -0,0 +1,18 @@
+from dataclasses import dataclass, asdict
+
+
+# Счетчики всех процессов бота суммируются в этом хэше
+ANTIFLOOD_STATS_KEY = "antiflood:stats"
+
+
+@dataclass
+class AntiFloodStats:
+    """Счетчики антифлуда в рамках одного процесса бота."""
+
+    allowed: int = 0
+    limited: int = 0
+    suppressed_locally: int = 0
+    warnings_sent: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
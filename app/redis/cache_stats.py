@@ -0,0 +1,20 @@
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class CacheStats:
+    """Счетчики работы кэша в рамках одного воркера."""
+
+    l1_hits: int = 0
+    hits: int = 0
+    misses: int = 0
+    rebuilds: int = 0
+    coalesced: int = 0
+    lock_waits: int = 0
+    lock_wait_hits: int = 0
+    lock_timeouts: int = 0
+    stale_served: int = 0
+    background_refreshes: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
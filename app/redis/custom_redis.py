@@ -1,36 +1,168 @@
 import json
+import time
+import uuid
+import asyncio
 from loguru import logger
 from pydantic import BaseModel
 from redis.asyncio import Redis
-from typing import Any, Callable, Awaitable, Dict, Union, Type, TypeVar
+from redis.exceptions import WatchError
+from typing import Any, Callable, Awaitable, Dict, Iterable, List, NamedTuple, Union, Type, TypeVar
+
+from app.redis.cache_stats import CacheStats
+from app.redis.invalidation import InvalidationBatch, current_invalidation_batch
+from app.redis.local_cache import LocalCache
+from app.redis.serializers import CacheSerializer, JsonSerializer, pack_entry, schema_version, unpack_entry
 
 
 T = TypeVar("T", bound=BaseModel)
 
+# Снимает блокировку, только если она все еще принадлежит текущему владельцу
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class CachePolicy(NamedTuple):
+    """Параметры записи ключа в кэш."""
+    ttl: int
+    soft_ttl: int
+    tags: tuple[str, ...] = ()
+    version: str = ""
+
 
 class CustomRedis(Redis):
     """Расширенный класс Redis с дополнительными методами"""
 
+    invalidation_channel: str = "cache:invalidate"
+    local_cache: LocalCache | None = None
+    _instance_id: str | None = None
+
+    lock_timeout_ms: int = 5000
+    lock_wait_timeout: float = 1.0
+    lock_poll_interval: float = 0.05
+
+    soft_ttl: int = 600
+    serializer: CacheSerializer = JsonSerializer()
+
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_stats = CacheStats()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._release_lock_script = self.register_script(RELEASE_LOCK_SCRIPT)
+
+
+    def enable_local_cache(self, max_size: int, ttl: int) -> None:
+        """Включает in-process L1 кэш перед Redis для текущего воркера."""
+        self.local_cache = LocalCache(max_size=max_size, ttl=ttl)
+        self._instance_id = uuid.uuid4().hex
+        logger.info(f"L1 кэш включен (размер: {max_size}, TTL: {ttl} сек)")
+
+
     async def delete_key(self, key: str):
-        """Удаляет ключ из Redis."""
-        await self.delete(key)
+        """Удаляет ключ из Redis и из L1 кэша всех воркеров.
+        Внутри invalidation_batch удаление откладывается до коммита сессии."""
+        batch = self._active_batch()
+        if batch is not None:
+            batch.add_keys(key)
+            return
+
+        await self.unlink_keys_and_tags(keys=[key])
         logger.info(f"Ключ {key} удален")
 
 
-    async def delete_keys_by_prefix(self, prefix: str):
-        """Удаляет ключи, начинающиеся с указанного префикса."""
-        keys = await self.keys(prefix + '*')
-        if keys:
-            await self.delete(*keys)
-            logger.info(f"Удалены ключи, начинающиеся с {prefix}")
+    async def delete_keys_by_prefix(self, prefix: str, batch_size: int = 500):
+        """Удаляет ключи, начинающиеся с указанного префикса.
+        Использует SCAN вместо KEYS, чтобы не блокировать Redis на время обхода всех ключей."""
+        deleted = 0
+        batch = []
+
+        async for key in self.scan_iter(match=prefix + '*', count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                await self.unlink(*batch)
+                deleted += len(batch)
+                batch = []
+
+        if batch:
+            await self.unlink(*batch)
+            deleted += len(batch)
+
+        if deleted:
+            logger.info(f"Удалено {deleted} ключей, начинающихся с {prefix}")
+
+        await self.publish(self.invalidation_channel, self._invalidation_message(prefixes=[prefix]))
+        self._evict_local(prefixes=[prefix])
 
 
     async def delete_all_keys(self):
         """Удаляет все ключи из текущей базы данных Redis."""
         await self.flushdb()
+        await self.publish(self.invalidation_channel, self._invalidation_message(prefixes=[""]))
+        self._evict_local(prefixes=[""])
         logger.info("Удалены все ключи из текущей базы данных Redis")
 
 
+    async def invalidate_tags(self, *tags: str) -> None:
+        """Удаляет все ключи, зарегистрированные под указанными тегами, вместе с самими тегами.
+        Внутри invalidation_batch удаление откладывается до коммита сессии."""
+        batch = self._active_batch()
+        if batch is not None:
+            batch.add_tags(*tags)
+            return
+
+        await self.unlink_keys_and_tags(tags=tags)
+        logger.info(f"Удалены ключи по тегам: {', '.join(tags)}")
+
+
+    async def unlink_keys_and_tags(self, keys: Iterable[str] = (), tags: Iterable[str] = ()) -> None:
+        """Удаляет ключи и все ключи под тегами одним UNLINK и оповещает остальные воркеры."""
+        await self.apply_cache_changes(keys=keys, tags=tags)
+
+
+    async def apply_cache_changes(
+        self,
+        keys: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        entries: Dict[str, tuple[Any, CachePolicy]] | None = None,
+        hashes: Dict[str, tuple[Dict[str, Any], CachePolicy]] | None = None
+    ) -> None:
+        """Удаляет ключи и ключи под тегами, затем записывает значения и поля хэшей одним pipeline-запросом
+        и оповещает остальные воркеры. Отдельным запросом перед ним читаются только составы тегов."""
+        entries = entries or {}
+        hashes = hashes or {}
+        keys = set(keys)
+        tag_keys = [self._tag_key(tag) for tag in tags]
+
+        if tag_keys:
+            async with self.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                tagged = await pipe.execute()
+
+            keys.update(key.decode() if isinstance(key, bytes) else key for members in tagged for key in members)
+
+        if not (keys or tag_keys or entries or hashes):
+            return
+
+        keys = sorted(keys)
+        changed = [*keys, *(key for key in entries if key not in keys)]
+        async with self.pipeline(transaction=False) as pipe:
+            if keys or tag_keys:
+                pipe.unlink(*keys, *tag_keys)
+            self._queue_entries(pipe, entries)
+            self._queue_hash_fields(pipe, hashes)
+            if changed:
+                self._publish_invalidation(pipe, keys=changed)
+            await pipe.execute()
+
+        self._evict_local(keys=changed)
+
+
     async def get_value(self, key: str):
         """Возвращает значение ключа из Redis."""
         value = await self.get(key)
@@ -42,14 +174,199 @@ class CustomRedis(Redis):
 
 
     async def set_value(self, key: str, value: str):
-        """Устанавливает значение ключа в Redis."""
-        await self.set(key, value)
+        """Устанавливает значение ключа в Redis и оповещает остальные воркеры."""
+        async with self.pipeline(transaction=False) as pipe:
+            pipe.set(key, value)
+            self._publish_invalidation(pipe, keys=[key])
+            await pipe.execute()
+
+        self._evict_local(keys=[key])
         logger.info(f"Установлено значение ключа {key}")
 
 
-    async def set_value_with_ttl(self, key: str, value: str, ttl: int = 3600):
-        """Устанавливает значение ключа с временем жизни в Redis."""
-        await self.setex(key, ttl, value)
+    async def set_value_with_ttl(self, key: str, value: str, ttl: int = 3600, tags: Iterable[str] = ()):
+        """Устанавливает значение ключа с временем жизни в Redis, регистрирует ключ под тегами
+        и оповещает остальные воркеры."""
+        async with self.pipeline(transaction=False) as pipe:
+            pipe.setex(key, ttl, value)
+            self._register_tags(pipe, key, ttl, tags)
+            self._publish_invalidation(pipe, keys=[key])
+            await pipe.execute()
+
+        self._evict_local(keys=[key])
+
+
+    async def cache_entry(self, key: str, payload: BaseModel, ttl: int = 3600, tags: Iterable[str] = ()) -> None:
+        """Записывает данные в кэш в том же формате, что и get_cached_data (write-through).
+        Внутри invalidation_batch запись откладывается до коммита сессии."""
+        policy = CachePolicy(ttl=ttl, soft_ttl=self.soft_ttl, tags=tuple(tags), version=schema_version(type(payload)))
+        payload = payload.model_dump(mode="json")
+
+        batch = self._active_batch()
+        if batch is not None:
+            batch.add_entry(key, payload, policy)
+            return
+
+        await self.store_entries({key: (payload, policy)})
+
+
+    async def cache_many(
+        self,
+        entries: Dict[str, tuple[BaseModel | list[BaseModel], Type[BaseModel], Iterable[str]]],
+        ttl: int = 3600
+    ) -> None:
+        """Записывает несколько значений (модель или список моделей, их тип и теги) одним pipeline-запросом
+        в том же формате, что и get_cached_data. Используется при пакетной сборке ключей на чтении."""
+        prepared = {}
+        for key, (payload, model, tags) in entries.items():
+            policy = CachePolicy(ttl=ttl, soft_ttl=self.soft_ttl, tags=tuple(tags), version=schema_version(model))
+            if isinstance(payload, list):
+                prepared[key] = ([item.model_dump(mode="json") for item in payload], policy)
+            else:
+                prepared[key] = (payload.model_dump(mode="json"), policy)
+
+        await self.store_entries(prepared)
+
+
+    async def append_to_cached_list(self, key: str, *items: BaseModel) -> None:
+        """Добавляет элементы в закэшированный список (элемент с тем же id заменяется).
+        Внутри invalidation_batch изменение откладывается до коммита сессии."""
+        batch = self._active_batch()
+        if batch is not None:
+            batch.add_list_items(key, *items)
+            return
+
+        await self.extend_cached_list(key, items)
+
+
+    async def update_hash_fields(
+        self,
+        key: str,
+        fields: Dict[str, Any],
+        ttl: int = 3600,
+        tags: Iterable[str] = ()
+    ) -> None:
+        """Устанавливает поля хэша (поле со значением None удаляется) и продлевает его TTL.
+        Внутри invalidation_batch изменение откладывается до коммита сессии."""
+        policy = CachePolicy(ttl=ttl, soft_ttl=self.soft_ttl, tags=tuple(tags))
+
+        batch = self._active_batch()
+        if batch is not None:
+            batch.add_hash_fields(key, fields, policy)
+            return
+
+        await self.store_hash_fields({key: (fields, policy)})
+
+
+    async def set_hash_field_if_absent(
+        self,
+        key: str,
+        field: str,
+        value: Any,
+        ttl: int = 3600,
+        tags: Iterable[str] = ()
+    ) -> None:
+        """Записывает поле хэша, только если его еще нет (HSETNX): значение, прочитанное из БД,
+        не перетирает более свежее, записанное после коммита."""
+        await self.set_hash_fields_if_absent(key, {field: value}, ttl=ttl, tags=tags)
+
+
+    async def set_hash_fields_if_absent(
+        self,
+        key: str,
+        mapping: Dict[str, Any],
+        ttl: int = 3600,
+        tags: Iterable[str] = ()
+    ) -> None:
+        """Дописывает в хэш только отсутствующие поля (HSETNX для каждого поля в одной транзакции MULTI).
+        Поля, записанные другими запросами после коммита, остаются нетронутыми."""
+        async with self.pipeline(transaction=True) as pipe:
+            for field, value in mapping.items():
+                pipe.hsetnx(key, field, value)
+            pipe.expire(key, ttl, nx=True)
+            self._register_tags(pipe, key, ttl, tags)
+            await pipe.execute()
+
+
+    async def store_hash_fields(self, hashes: Dict[str, tuple[Dict[str, Any], CachePolicy]]) -> None:
+        """Применяет изменения нескольких хэшей одним pipeline-запросом."""
+        await self.apply_cache_changes(hashes=hashes)
+
+
+    async def store_entries(self, entries: Dict[str, tuple[Any, CachePolicy]]) -> None:
+        """Записывает несколько значений одним pipeline-запросом и оповещает остальные воркеры."""
+        if not entries:
+            return
+
+        await self.apply_cache_changes(entries=entries)
+        logger.info(f"Записано в кэш ключей: {len(entries)}")
+
+
+    def _queue_entries(self, pipe, entries: Dict[str, tuple[Any, CachePolicy]]) -> None:
+        """Добавляет в pipeline запись значений вместе с их тегами."""
+        for key, (payload, policy) in entries.items():
+            pipe.setex(key, policy.ttl, self._encode_entry(payload, policy))
+            self._register_tags(pipe, key, policy.ttl, policy.tags)
+
+
+    def _queue_hash_fields(self, pipe, hashes: Dict[str, tuple[Dict[str, Any], CachePolicy]]) -> None:
+        """Добавляет в pipeline изменения полей хэшей: None удаляет поле."""
+        for key, (fields, policy) in hashes.items():
+            to_set = {field: value for field, value in fields.items() if value is not None}
+            to_delete = [field for field, value in fields.items() if value is None]
+
+            if to_set:
+                pipe.hset(key, mapping=to_set)
+            if to_delete:
+                pipe.hdel(key, *to_delete)
+            pipe.expire(key, policy.ttl)
+            self._register_tags(pipe, key, policy.ttl, policy.tags)
+
+
+    async def extend_cached_list(self, key: str, items: Iterable[BaseModel], retries: int = 3) -> bool:
+        """Дописывает элементы в закэшированный список через WATCH/MULTI, сохраняя TTL и мягкий срок жизни.
+        Если списка в кэше нет (или он записан по старой схеме), ничего не делает:
+        он будет собран из БД при следующем чтении."""
+        items = list(items)
+        if not items:
+            return False
+
+        version = schema_version(type(items[0]))
+        items = [item.model_dump(mode="json") for item in items]
+
+        async with self.pipeline(transaction=True) as pipe:
+            for _ in range(retries):
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    if raw is None:
+                        return False
+
+                    entry = unpack_entry(self.serializer, raw)
+                    if entry is None or entry.version != version or not isinstance(entry.payload, list):
+                        await pipe.unwatch()
+                        return False
+
+                    new_ids = {item.get("id") for item in items}
+                    data = [item for item in entry.payload if item.get("id") not in new_ids] + items
+
+                    value = pack_entry(self.serializer, version, data, entry.soft_expires_at)
+                    pipe.multi()
+                    pipe.set(key, value, keepttl=True)
+                    self._publish_invalidation(pipe, keys=[key])
+                    await pipe.execute()
+
+                    self._evict_local(keys=[key])
+                    logger.info(f"В список {key} добавлено элементов: {len(items)}")
+                    return True
+
+                except WatchError:
+                    continue
+
+        # Список постоянно меняется: надежнее пересобрать его из БД
+        logger.warning(f"Не удалось обновить список {key}, ключ будет удален")
+        await self.unlink_keys_and_tags(keys=[key])
+        return False
 
 
     async def exists(self, key: str) -> bool:
@@ -58,8 +375,8 @@ class CustomRedis(Redis):
 
 
     async def get_keys(self, pattern: str = '*'):
-        """Возвращает список ключей, соответствующих шаблону."""
-        return await self.keys(pattern)
+        """Возвращает список ключей, соответствующих шаблону (через SCAN)."""
+        return [key async for key in self.scan_iter(match=pattern, count=500)]
 
 
     async def get_cached_data(
@@ -69,30 +386,313 @@ class CustomRedis(Redis):
         model: Type[T],
         *args,
         ttl: int = 3600,
+        soft_ttl: int | None = None,
+        tags: Iterable[str] = (),
+        refresh: Callable[[], Awaitable[Any]] | None = None,
         **kwargs
     ) -> Any:
-        """Получает данные из кэша Redis или из БД, если их нет в кэше."""
-        cached_data = await (self.get(cache_key))
+        """Получает данные из L1 кэша, кэша Redis или из БД, если их нет в кэше.
+        Одновременные промахи по одному ключу объединяются в одно обращение к БД.
+        После мягкого срока жизни (soft_ttl) устаревшее значение отдается сразу,
+        а обновляется в фоне функцией refresh: она не принимает аргументов и сама открывает
+        сессию БД, потому что сессия запроса к этому моменту уже закрыта. Без refresh
+        устаревший ключ перестраивается в самом запросе. Записанный ключ регистрируется под тегами (tags)."""
+        policy = CachePolicy(ttl=ttl, soft_ttl=self.soft_ttl if soft_ttl is None else soft_ttl, tags=tuple(tags),
+                             version=schema_version(model))
+
+        local_data = self._get_local(cache_key)
+        if local_data is not None:
+            logger.info(f"Данные получены из L1 кэша для ключа: {cache_key}")
+            self.cache_stats.l1_hits += 1
+            return local_data
+
+        cached_data, is_stale = await self._read_cached(cache_key, model)
+        if cached_data is not None:
+            self.cache_stats.hits += 1
+
+            if is_stale:
+                self.cache_stats.stale_served += 1
+                if refresh is None:
+                    logger.info(f"Для ключа {cache_key} не задано фоновое обновление, перестраиваем его в запросе")
+                    return await self._single_flight(
+                        cache_key,
+                        lambda: self._rebuild_with_lock(cache_key, lambda: fetch_data_func(*args, **kwargs),
+                                                        model, policy)
+                    )
+                self._schedule_refresh(cache_key, refresh, model, policy)
+
+            return cached_data
+
+        self.cache_stats.misses += 1
+        logger.info(f"Данные не найдены в кэше для ключа: {cache_key}, получаем из базы данных")
+
+        return await self._single_flight(
+            cache_key,
+            lambda: self._rebuild_with_lock(cache_key, lambda: fetch_data_func(*args, **kwargs), model, policy)
+        )
+
+
+    async def get_cached_many(self, models: Dict[str, Type[BaseModel]]) -> Dict[str, Any]:
+        """Читает несколько ключей (ключ -> модель его значения): сначала из L1 кэша, остальные одним MGET.
+        Возвращает только найденные ключи; ключи с истекшим мягким сроком жизни тоже возвращаются."""
+        found: Dict[str, Any] = {}
+        missing: list[str] = []
+        for key in models:
+            local_data = self._get_local(key)
+            if local_data is not None:
+                self.cache_stats.l1_hits += 1
+                found[key] = local_data
+            else:
+                missing.append(key)
+
+        if missing:
+            for key, raw in zip(missing, await self.mget(missing)):
+                data, _ = await self._decode_cached(key, raw, models[key])
+                if data is None:
+                    self.cache_stats.misses += 1
+                    continue
+                self.cache_stats.hits += 1
+                found[key] = data
 
+        logger.info(f"Пакетное чтение кэша: найдено {len(found)} из {len(found) + len(missing)} ключей")
+        return found
+
+
+    async def get_cached_batch(
+        self,
+        ids: Iterable[int],
+        key_template: str,
+        fetch_many_func: Callable[[List[int]], Awaitable[Iterable[Any]]],
+        model: Type[T],
+        ttl: int = 3600,
+        tag_templates: Iterable[str] = ()
+    ) -> Dict[int, T]:
+        """Пакетный загрузчик записей по ID: ключи key_template.format(id) читаются одним MGET,
+        промахи загружаются одним вызовом fetch_many_func (например, BaseDAO.find_by_ids)
+        и записываются в кэш одним pipeline с тегами tag_templates.format(id).
+        Возвращает найденные записи по ID; отсутствующих в БД ID в результате нет."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+
+        keys = {data_id: key_template.format(data_id) for data_id in ids}
+        cached = await self.get_cached_many({key: model for key in keys.values()})
+        found = {data_id: cached[key] for data_id, key in keys.items() if key in cached}
+
+        missing_ids = [data_id for data_id in ids if data_id not in found]
+        if missing_ids:
+            self.cache_stats.rebuilds += 1
+            records = await fetch_many_func(missing_ids)
+
+            entries = {}
+            for record in records:
+                item = model.model_validate(record.to_dict() if hasattr(record, 'to_dict') else record)
+                found[item.id] = item
+                entries[keys[item.id]] = (item, model, [tag.format(item.id) for tag in tag_templates])
+
+            if entries:
+                await self.cache_many(entries, ttl=ttl)
+            logger.info(f"Пакетная загрузка из БД: найдено {len(entries)} из {len(missing_ids)} записей")
+
+        return {data_id: found[data_id] for data_id in ids if data_id in found}
+
+
+    async def _read_cached(self, cache_key: str, model: Type[T]) -> tuple[Any, bool]:
+        """Читает и валидирует данные из Redis, сохраняя результат в L1 кэш.
+        Возвращает данные и признак того, что истек их мягкий срок жизни."""
+        return await self._decode_cached(cache_key, await self.get(cache_key), model)
+
+
+    async def _decode_cached(self, cache_key: str, cached_data: bytes | str | None,
+                             model: Type[T]) -> tuple[Any, bool]:
+        """Распаковывает и валидирует значение, прочитанное из Redis, сохраняя результат в L1 кэш."""
         if cached_data:
             logger.info(f"Данные получены из кэша для ключа: {cache_key}")
             try:
                 logger.info(f"Загружаем данные из Redis")
-                data = json.loads(cached_data)
+                entry = unpack_entry(self.serializer, cached_data)
+                if entry is None or entry.version != schema_version(model):
+                    # Значение записано в старом формате или по старой схеме модели: пересобираем его
+                    logger.info(f"Версия схемы ключа {cache_key} устарела")
+                    return None, False
+
+                data = entry.payload
+                is_stale = entry.soft_expires_at <= time.time()
 
                 if isinstance(data, list):
-                    return [model.model_validate(item) for item in data]
+                    return self._set_local(cache_key, [model.model_validate(item) for item in data]), is_stale
                 else:
-                    return model.model_validate(data)
+                    return self._set_local(cache_key, model.model_validate(data)), is_stale
 
-            except (json.JSONDecodeError, ValueError, TypeError) as e:
+            except (ValueError, TypeError, KeyError) as e:
                 logger.error(f"Ошибка при десериализации данных из кэша: {e}")
                 await self.delete_key(cache_key)
 
-        logger.info(f"Данные не найдены в кэше для ключа: {cache_key}, получаем из базы данных")
+        return None, False
+
+
+    def _encode_entry(self, payload: Any, policy: CachePolicy) -> bytes:
+        """Упаковывает данные вместе с версией схемы и моментом мягкого истечения срока жизни."""
+        return pack_entry(self.serializer, policy.version, payload, time.time() + policy.soft_ttl)
+
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tag:{tag}"
+
+
+    def _register_tags(self, pipe, key: str, ttl: int, tags: Iterable[str]) -> None:
+        """Добавляет ключ в множества тегов; множество живет не меньше самого долгого своего ключа."""
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+
+
+    async def _single_flight(self, cache_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Объединяет одновременные загрузки одного ключа внутри процесса:
+        БД запрашивает только первый запрос, остальные ждут его результат."""
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            self.cache_stats.coalesced += 1
+            logger.info(f"Загрузка ключа {cache_key} уже выполняется, ожидаем результат")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # Запрос-лидер был отменен, загружаем данные самостоятельно
+                return await loader()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            result = await loader()
+            future.set_result(result)
+            return result
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(cache_key, None)
+
+
+    def _schedule_refresh(
+        self,
+        cache_key: str,
+        refresh: Callable[[], Awaitable[Any]],
+        model: Type[T],
+        policy: CachePolicy
+    ) -> None:
+        """Запускает фоновое обновление устаревшего ключа, если оно еще не запущено."""
+        if cache_key in self._refreshing:
+            return
+
+        task = asyncio.create_task(self._refresh_in_background(cache_key, refresh, model, policy))
+        self._refreshing[cache_key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(cache_key, None))
+
+
+    async def _refresh_in_background(
+        self,
+        cache_key: str,
+        refresh: Callable[[], Awaitable[Any]],
+        model: Type[T],
+        policy: CachePolicy
+    ) -> None:
+        """Обновляет ключ в фоне под блокировкой перестроения."""
+        token = await self._acquire_lock(cache_key)
+        if token is None:
+            logger.info(f"Ключ {cache_key} уже обновляется другим воркером")
+            return
+
+        try:
+            self.cache_stats.background_refreshes += 1
+            logger.info(f"Фоновое обновление устаревшего ключа {cache_key}")
+            await self._load_and_cache(cache_key, refresh, model, policy)
+
+        except Exception as e:
+            logger.error(f"Ошибка при фоновом обновлении ключа {cache_key}: {e}")
+
+        finally:
+            await self._release_lock(cache_key, token)
+
+
+    async def _acquire_lock(self, cache_key: str) -> str | None:
+        """Берет короткую блокировку на перестроение ключа, возвращает токен владельца."""
+        token = uuid.uuid4().hex
+        acquired = await self.set(f"lock:{cache_key}", token, nx=True, px=self.lock_timeout_ms)
+        return token if acquired else None
+
+
+    async def _release_lock(self, cache_key: str, token: str) -> None:
+        await self._release_lock_script(keys=[f"lock:{cache_key}"], args=[token])
+
+
+    async def _rebuild_with_lock(
+        self,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        model: Type[T],
+        policy: CachePolicy
+    ) -> Any:
+        """Перестраивает ключ под короткой блокировкой (SET NX PX), чтобы в кластере
+        БД запрашивал только один воркер. Остальные недолго ждут появления значения в кэше."""
+        token = await self._acquire_lock(cache_key)
+        if token is None:
+            self.cache_stats.lock_waits += 1
+            data = await self._wait_for_rebuild(cache_key, model)
+            if data is not None:
+                self.cache_stats.lock_wait_hits += 1
+                return data
+
+            logger.warning(f"Ключ {cache_key} не появился в кэше после перестроения, получаем данные из базы данных")
+
         try:
+            return await self._load_and_cache(cache_key, fetch, model, policy)
+        finally:
+            if token is not None:
+                await self._release_lock(cache_key, token)
+
+
+    async def _wait_for_rebuild(self, cache_key: str, model: Type[T]) -> Any:
+        """Ожидает, пока другой воркер запишет ключ в кэш. Ожидание прекращается сразу,
+        как только блокировка снята: если значения так и нет (данных в БД нет или загрузка
+        упала), дальше ждать нечего."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_wait_timeout
+
+        while loop.time() < deadline:
+            await asyncio.sleep(self.lock_poll_interval)
+            async with self.pipeline(transaction=False) as pipe:
+                pipe.get(cache_key)
+                pipe.exists(f"lock:{cache_key}")
+                cached_data, lock_held = await pipe.execute()
+
+            data, is_stale = await self._decode_cached(cache_key, cached_data, model)
+            if data is not None and not is_stale:
+                return data
+            if not lock_held:
+                return None
+
+        self.cache_stats.lock_timeouts += 1
+        return None
 
-            data = await fetch_data_func(*args, **kwargs)
+
+    async def _load_and_cache(
+        self,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        model: Type[T],
+        policy: CachePolicy
+    ) -> Any:
+        """Загружает данные из БД и сохраняет их в Redis и L1 кэш. Внутри invalidation_batch данные
+        только возвращаются: ключ будет удален после коммита, а откат транзакции не должен оставить их в кэше."""
+        try:
+            self.cache_stats.rebuilds += 1
+
+            data = await fetch()
             if data is None:
                 logger.info("Данные не найдены в базе данных")
                 return None
@@ -103,18 +703,25 @@ class CustomRedis(Redis):
                     for item in data
                 ]
                 models = [model(**item) for item in processed_data]
-                await self.set_value_with_ttl(key=cache_key, ttl=ttl, value=json.dumps(processed_data))
+                if self._active_batch() is not None:
+                    # Данные прочитаны внутри незакоммиченной транзакции: в кэш они не попадают
+                    return models
+                await self.set_value_with_ttl(key=cache_key, ttl=policy.ttl, tags=policy.tags,
+                                              value=self._encode_entry(processed_data, policy))
 
-                logger.info(f"Список данных сохранены в кэш для ключа: {cache_key} с TTL: {ttl} сек")
-                return models
+                logger.info(f"Список данных сохранены в кэш для ключа: {cache_key} с TTL: {policy.ttl} сек")
+                return self._set_local(cache_key, models)
 
             else:
                 processed_data = data.to_dict() if hasattr(data, 'to_dict') else data
                 model_instance = model(**processed_data)
-                await self.set_value_with_ttl(key=cache_key, ttl=ttl, value=json.dumps(processed_data))
+                if self._active_batch() is not None:
+                    return model_instance
+                await self.set_value_with_ttl(key=cache_key, ttl=policy.ttl, tags=policy.tags,
+                                              value=self._encode_entry(processed_data, policy))
 
-                logger.info(f"Данные сохранены в кэш для ключа: {cache_key} с TTL: {ttl} сек")
-                return model_instance
+                logger.info(f"Данные сохранены в кэш для ключа: {cache_key} с TTL: {policy.ttl} сек")
+                return self._set_local(cache_key, model_instance)
 
 
         except Exception as e:
@@ -122,6 +729,94 @@ class CustomRedis(Redis):
             return None
 
 
+    def _active_batch(self) -> InvalidationBatch | None:
+        """Возвращает активный пакет инвалидации, если он открыт для этого клиента."""
+        batch = current_invalidation_batch()
+        return batch if batch is not None and batch.redis is self else None
+
+
+    @staticmethod
+    def _copy_local(value: Any) -> Any:
+        """Копия значения L1 кэша: модели общие для всех запросов воркера, поэтому наружу отдаются только копии."""
+        if isinstance(value, list):
+            return [item.model_copy(deep=True) if isinstance(item, BaseModel) else item for item in value]
+        return value.model_copy(deep=True) if isinstance(value, BaseModel) else value
+
+
+    def _get_local(self, key: str) -> Any | None:
+        """Возвращает копию данных из L1 кэша, чтобы вызывающий код не менял кэш."""
+        if self.local_cache is None:
+            return None
+
+        value = self.local_cache.get(key)
+        return None if value is None else self._copy_local(value)
+
+
+    def _set_local(self, key: str, value: Any) -> Any:
+        """Сохраняет копию провалидированных данных в L1 кэш и возвращает сами данные."""
+        if self.local_cache is not None and value is not None:
+            self.local_cache.set(key, self._copy_local(value))
+        return value
+
+
+    def _evict_local(self, keys: Iterable[str] = (), prefixes: Iterable[str] = ()) -> None:
+        """Удаляет ключи из L1 кэша текущего воркера."""
+        if self.local_cache is None:
+            return
+
+        self.local_cache.delete(*keys)
+        self.local_cache.delete_by_prefixes(prefixes)
+
+
+    def _invalidation_message(self, keys: Iterable[str] = (), prefixes: Iterable[str] = ()) -> str:
+        return json.dumps({"origin": self._instance_id, "keys": list(keys), "prefixes": list(prefixes)})
+
+
+    def _publish_invalidation(self, pipe, keys: Iterable[str] = (), prefixes: Iterable[str] = ()) -> None:
+        """Добавляет в pipeline публикацию сообщения об инвалидации для остальных воркеров."""
+        pipe.publish(self.invalidation_channel, self._invalidation_message(keys=keys, prefixes=prefixes))
+
+
+    def _apply_invalidation(self, raw_message: bytes | str) -> None:
+        """Применяет сообщение об инвалидации, полученное от другого воркера."""
+        try:
+            message = json.loads(raw_message)
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.warning(f"Некорректное сообщение инвалидации L1 кэша: {e}")
+            return
+
+        if message.get("origin") == self._instance_id:
+            return
+
+        self._evict_local(keys=message.get("keys", ()), prefixes=message.get("prefixes", ()))
+
+
+    async def listen_invalidations(self) -> None:
+        """Слушает канал инвалидации и очищает L1 кэш по сообщениям других воркеров."""
+        while True:
+            pubsub = self.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                logger.info(f"Подписка на канал инвалидации {self.invalidation_channel} оформлена")
+
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message:
+                        self._apply_invalidation(message["data"])
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"Ошибка в слушателе инвалидации L1 кэша: {e}")
+                # Пока подписки не было, сообщения могли быть пропущены
+                self._evict_local(prefixes=[""])
+                await asyncio.sleep(1)
+
+            finally:
+                await pubsub.aclose()
+
+
     @staticmethod
     def convert_redis_data(data: Dict[str, str]) -> Dict[str, Union[str, int, float]]:
         """
@@ -0,0 +1,96 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, AsyncIterator
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session_maker import db
+
+if TYPE_CHECKING:
+    from app.redis.custom_redis import CachePolicy, CustomRedis
+
+
+_current_batch: ContextVar["InvalidationBatch | None"] = ContextVar("invalidation_batch", default=None)
+
+
+class InvalidationBatch:
+    """Собирает изменения кэша в рамках одной операции: ключи и теги на удаление,
+    а также значения для записи (write-through). Применяет их несколькими pipeline-запросами."""
+
+    def __init__(self, redis: "CustomRedis"):
+        self.redis = redis
+        self.keys: set[str] = set()
+        self.tags: set[str] = set()
+        self.entries: dict[str, tuple[Any, "CachePolicy"]] = {}
+        self.list_items: dict[str, list[BaseModel]] = {}
+        self.hash_fields: dict[str, tuple[dict[str, Any], "CachePolicy"]] = {}
+
+
+    def add_keys(self, *keys: str) -> None:
+        for key in keys:
+            self.entries.pop(key, None)
+            self.list_items.pop(key, None)
+            self.hash_fields.pop(key, None)
+        self.keys.update(keys)
+
+
+    def add_tags(self, *tags: str) -> None:
+        self.tags.update(tags)
+
+
+    def add_entry(self, key: str, payload: Any, policy: "CachePolicy") -> None:
+        self.keys.discard(key)
+        self.entries[key] = (payload, policy)
+
+
+    def add_list_items(self, key: str, *items: BaseModel) -> None:
+        self.list_items.setdefault(key, []).extend(items)
+
+
+    def add_hash_fields(self, key: str, fields: dict[str, Any], policy: "CachePolicy") -> None:
+        pending, _ = self.hash_fields.get(key, ({}, policy))
+        self.hash_fields[key] = ({**pending, **fields}, policy)
+
+
+    async def flush(self) -> None:
+        """Удаляет накопленные ключи и теги и записывает новые значения одним pipeline-запросом,
+        затем дописывает элементы в закэшированные списки."""
+        if not (self.keys or self.tags or self.entries or self.list_items or self.hash_fields):
+            return
+
+        keys, tags, entries, list_items, hash_fields = (self.keys, self.tags, self.entries,
+                                                        self.list_items, self.hash_fields)
+        self.keys, self.tags, self.entries, self.list_items, self.hash_fields = set(), set(), {}, {}, {}
+
+        await self.redis.apply_cache_changes(keys=keys, tags=tags, entries=entries, hashes=hash_fields)
+        # Дописывание в списки читает текущее значение, поэтому каждое идет своей транзакцией WATCH/MULTI
+        for key, items in list_items.items():
+            await self.redis.extend_cached_list(key, items)
+
+        logger.info(f"Инвалидация кэша: удалено ключей {len(keys)}, тегов {len(tags)}, "
+                    f"записано ключей {len(entries)}, обновлено списков {len(list_items)}, "
+                    f"хэшей {len(hash_fields)}")
+
+
+def current_invalidation_batch() -> InvalidationBatch | None:
+    """Возвращает активный пакет инвалидации текущей операции, если он есть."""
+    return _current_batch.get()
+
+
+@asynccontextmanager
+async def invalidation_batch(redis: "CustomRedis", session: AsyncSession | None = None) -> AsyncIterator[InvalidationBatch]:
+    """Пока контекст активен, delete_key, invalidate_tags, cache_entry, append_to_cached_list
+    и update_hash_fields только накапливают изменения. Если передана сессия, изменения применяются после ее успешного коммита
+    и отбрасываются при откате, иначе - сразу при выходе из контекста."""
+    batch = InvalidationBatch(redis)
+    token = _current_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _current_batch.reset(token)
+
+    if session is not None:
+        db.add_after_commit_hook(session, batch.flush)
+    else:
+        await batch.flush()
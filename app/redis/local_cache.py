@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+
+class LocalCache:
+    """In-process LRU кэш с ограниченным размером и TTL для уже провалидированных данных."""
+
+    def __init__(self, max_size: int = 2048, ttl: float = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+
+    def get(self, key: str) -> Any | None:
+        """Возвращает значение ключа или None, если ключа нет или истек его TTL."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Сохраняет значение, вытесняя самые старые ключи при превышении размера."""
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+    def delete(self, *keys: str) -> None:
+        """Удаляет указанные ключи."""
+        for key in keys:
+            self._data.pop(key, None)
+
+
+    def delete_by_prefixes(self, prefixes: Iterable[str]) -> None:
+        """Удаляет ключи, начинающиеся с любого из префиксов (пустой префикс очищает весь кэш)."""
+        prefixes = tuple(prefixes)
+        if not prefixes:
+            return
+
+        if "" in prefixes:
+            self.clear()
+            return
+
+        for key in [key for key in self._data if key.startswith(prefixes)]:
+            del self._data[key]
+
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        self._data.clear()
+
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,6 +1,9 @@
+import asyncio
+from contextlib import suppress
 from loguru import logger
 
 from app.redis.custom_redis import CustomRedis
+from app.redis.serializers import get_serializer
 from config import settings
 
 
@@ -11,24 +14,44 @@ class RedisClient:
         self,
         url: str,
         socket_timeout: int = 20,
+        local_cache_size: int = 2048,
+        local_cache_ttl: int = 30,
+        soft_ttl: int = 600,
+        serializer: str = "json",
     ):
         self.url = url
         self.socket_timeout = socket_timeout
+        self.local_cache_size = local_cache_size
+        self.local_cache_ttl = local_cache_ttl
+        self.soft_ttl = soft_ttl
+        self.serializer = serializer
         self._client: CustomRedis | None = None
+        self._invalidation_listener: asyncio.Task | None = None
 
     async def connect(self):
         """Создает и сохраняет подключение к Redis."""
         if self._client is None:
             try:
                 self._client = CustomRedis.from_url(url=self.url, socket_timeout=self.socket_timeout)
+                self._client.soft_ttl = self.soft_ttl
+                self._client.serializer = get_serializer(self.serializer)
                 await self._client.ping()
                 logger.info("Redis подключен успешно")
+
+                self._client.enable_local_cache(max_size=self.local_cache_size, ttl=self.local_cache_ttl)
+                self._invalidation_listener = asyncio.create_task(self._client.listen_invalidations())
             except Exception as e:
                 logger.error(f"Ошибка подключения к Redis: {e}")
                 raise
 
     async def close(self):
         """Закрывает подключение к Redis."""
+        if self._invalidation_listener:
+            self._invalidation_listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._invalidation_listener
+            self._invalidation_listener = None
+
         if self._client:
             await self._client.close()
             self._client = None
@@ -50,7 +73,13 @@ class RedisClient:
         await self.close()
 
 
-redis_client = RedisClient(url=settings.get_redis_url())
+redis_client = RedisClient(
+    url=settings.get_redis_url(),
+    local_cache_size=settings.CACHE_L1_MAX_SIZE,
+    local_cache_ttl=settings.CACHE_L1_TTL,
+    soft_ttl=settings.CACHE_SOFT_TTL,
+    serializer=settings.CACHE_SERIALIZER
+)
 
 async def get_redis() -> CustomRedis:
     """Возвращает объект клиента Redis."""
@@ -3,10 +3,11 @@ from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.redis.custom_redis import CustomRedis
+from app.db.session_maker import db
 from app.redis.redis_operations.team import invalidate_team_cache
-from app.api.typization.responses import SHackathonInfo, SHackathons
+from app.api.typization.responses import SHackathonInfo, SHackathons, SHackathonsPage
 from app.db.dao import HackathonDAO
-from app.api.typization.schemas import IdModel
+from app.api.typization.schemas import IdModel, HackathonPageFilter
 
 
 
@@ -17,7 +18,8 @@ async def get_all_hackathons_data(redis: CustomRedis, session: AsyncSession) ->
 
         hackathons_data = await redis.get_cached_data(cache_key=hackathons_cache_key,
                                                       fetch_data_func=HackathonDAO(session).find_all,
-                                                      model=SHackathons)
+                                                      model=SHackathons,
+                                                      refresh=db.in_own_session(lambda s: HackathonDAO(s).find_all()))
 
         if hackathons_data is None:
             logger.warning(f"Хакатоны не найдены.")
@@ -31,15 +33,56 @@ async def get_all_hackathons_data(redis: CustomRedis, session: AsyncSession) ->
 
 
 
+HACKATHON_PAGES_TAG = "hackathons:pages"
+
+
+async def get_hackathons_page_data(
+        redis: CustomRedis,
+        session: AsyncSession,
+        filters: HackathonPageFilter,
+        after_id: int | None = None,
+        limit: int = 20
+) -> SHackathonsPage | None:
+    try:
+
+        hackathons_cache_key = f"hackathons:page:{after_id or 0}:{limit}:{filters.name_prefix or ''}"
+
+        async def fetch_page(db_session: AsyncSession) -> dict:
+            hackathons, next_cursor = await HackathonDAO(db_session).find_page(filters=filters, after_id=after_id,
+                                                                               limit=limit)
+            return {"items": [hackathon.to_dict() for hackathon in hackathons], "next_cursor": next_cursor}
+
+        hackathons_page = await redis.get_cached_data(cache_key=hackathons_cache_key,
+                                                      fetch_data_func=fetch_page,
+                                                      model=SHackathonsPage,
+                                                      tags=[HACKATHON_PAGES_TAG],
+                                                      refresh=db.in_own_session(fetch_page),
+                                                      db_session=session)
+
+        if hackathons_page is None:
+            logger.warning(f"Страница хакатонов не получена.")
+            return None
+
+        return hackathons_page
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении страницы хакатонов: {e}")
+        return None
+
+
+
 async def get_hackathon_data(redis: CustomRedis, session: AsyncSession, hackathon_id: int) -> SHackathonInfo | None:
     try:
 
         hackathon_cache_key = f"hackathon:{hackathon_id}"
+        filters = IdModel(id=hackathon_id)
 
         hackathon_data = await redis.get_cached_data(cache_key=hackathon_cache_key,
                                                      fetch_data_func=HackathonDAO(session).find_one_or_none,
                                                      model=SHackathonInfo,
-                                                     filters=IdModel(id=hackathon_id))
+                                                     tags=[f"hackathon:{hackathon_id}"],
+                                                     refresh=db.in_own_session(lambda s: HackathonDAO(s).find_one_or_none(filters=filters)),
+                                                     filters=filters)
 
         if hackathon_data is None:
             logger.warning(f"Хакатон c {hackathon_id} не найден.")
@@ -57,10 +100,10 @@ async def invalidate_hackathon_cache(redis: CustomRedis, hackathon_id: int | Non
 
     hackathon_list_cache_key = "hackathons"
     await redis.delete_key(hackathon_list_cache_key)
+    await redis.invalidate_tags(HACKATHON_PAGES_TAG)
 
     if hackathon_id:
-        hackathon_cache_key = f"hackathon:{hackathon_id}"
-        await redis.delete_key(hackathon_cache_key)
+        await redis.invalidate_tags(f"hackathon:{hackathon_id}")
 
     if invalidate_teams:
         await invalidate_team_cache(redis=redis, hackathon_id=hackathon_id)
@@ -1,24 +1,29 @@
-import asyncio
 import json
+from functools import partial
 from typing import List
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.redis.custom_redis import CustomRedis
+from app.db.session_maker import db
 from app.api.typization.responses import SInvite
 from app.db.dao import InviteDAO
 from app.api.typization.schemas import IdModel, InviteFilter
+from app.bot.utils.send_scheduler import telegram_scheduler
 from config import bot
 
 async def get_all_invites_user_data(redis: CustomRedis, session: AsyncSession,
                                     invite_user_tg_id: int) -> List[SInvite] | None:
     try:
         invites_cache_key = f"invites:user:{invite_user_tg_id}"
+        filters = InviteFilter(invite_user_id=invite_user_tg_id)
 
         invites_data = await redis.get_cached_data(cache_key=invites_cache_key,
                                                    fetch_data_func=InviteDAO(session).find_all,
                                                    model=SInvite,
-                                                   filters=InviteFilter(invite_user_id=invite_user_tg_id))
+                                                   tags=[f"user:{invite_user_tg_id}"],
+                                                   refresh=db.in_own_session(lambda s: InviteDAO(s).find_all(filters=filters)),
+                                                   filters=filters)
 
         if invites_data is None:
             logger.error(f"Приглашения не найдены.")
@@ -34,11 +39,13 @@ async def get_all_invites_user_data(redis: CustomRedis, session: AsyncSession,
 async def get_invite_data_by_id(redis: CustomRedis, session: AsyncSession, invite_id: int) -> SInvite | None:
     try:
         invite_cache_key = f"invite:{invite_id}"
+        filters = IdModel(id=invite_id)
 
         invite_data = await redis.get_cached_data(cache_key=invite_cache_key,
                                                   fetch_data_func=InviteDAO(session).find_one_or_none,
                                                   model=SInvite,
-                                                  filters=IdModel(id=invite_id))
+                                                  refresh=db.in_own_session(lambda s: InviteDAO(s).find_one_or_none(filters=filters)),
+                                                  filters=filters)
         if invite_data is None:
             logger.error(f"Приглашения не найдены.")
             return None
@@ -57,32 +64,40 @@ async def bot_cleanup_invites(user_id: int, redis: CustomRedis, session: AsyncSe
     try:
 
         invites_data = await get_all_invites_user_data(redis=redis, session=session, invite_user_tg_id=user_id)
+        if not invites_data:
+            return
 
-        if invites_data:
-            for invite in invites_data:
+        message_keys = [f"invite_message_process:{invite.id}" for invite in invites_data]
+        message_ids = {key: int(value) for key, value in zip(message_keys, await redis.mget(message_keys)) if value}
+        if not message_ids:
+            logger.info("Сообщения с приглашениями уже были удалены")
+            return
 
-                invite_message_cache = await redis.get_value(f"invite_message_process:{invite.id}")
-                if invite_message_cache:
+        # Удаления независимы, поэтому отправляются одновременно в пределах лимитов Telegram
+        results = await telegram_scheduler.run_many(
+            (user_id, partial(bot.delete_message, chat_id=user_id, message_id=message_id))
+            for message_id in message_ids.values()
+        )
 
-                    message_id = int(invite_message_cache)
-                    try:
-                        await bot.delete_message(chat_id=user_id, message_id=message_id)
+        for (key, message_id), result in zip(message_ids.items(), results):
+            if isinstance(result, Exception):
+                logger.warning(f"Ошибка при удалении сообщения {message_id}: {result}")
+                continue
 
-                        await redis.delete_key(invite_message_cache)
-                        logger.info(f"Удалено сообщение {message_id} с приглашением в команду")
-
-                    except Exception as e:
-                        logger.warning(f"Ошибка при удалении сообщения {message_id}: {e}")
-
-                else:
-                    logger.info("Сообщение уже было обработано удалено")
+            await redis.delete_key(key)
+            logger.info(f"Удалено сообщение {message_id} с приглашением в команду")
 
     except Exception as e:
         logger.error(f"Произошла ошибка при очищении приглашений: {e}")
 
 
 
-async def invalidate_invite_cache(redis: CustomRedis, tg_id: int | None = None, invite_id: int | None = None) -> None:
+async def invalidate_invite_cache(
+        redis: CustomRedis,
+        tg_id: int | None = None,
+        invite_id: int | None = None,
+        invite: SInvite | None = None
+) -> None:
 
     if tg_id:
         invites_key = f"invites:user:{tg_id}"
@@ -91,3 +106,8 @@ async def invalidate_invite_cache(redis: CustomRedis, tg_id: int | None = None,
     if invite_id:
         invite_key = f"invite:{invite_id}"
         await redis.delete_key(invite_key)
+
+    if invite:
+        # Новое приглашение: записываем его и дописываем в список приглашений пользователя
+        await redis.cache_entry(f"invite:{invite.id}", invite)
+        await redis.append_to_cached_list(f"invites:user:{invite.invite_user_id}", invite)
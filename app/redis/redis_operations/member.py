@@ -1,47 +1,13 @@
-import json
-from typing import List
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.redis.custom_redis import CustomRedis
+from app.db.session_maker import db
 from app.api.typization.responses import STeam, SMember
 from app.db.dao import MemberDAO
 from app.api.typization.schemas import MemberFind, HackathonIDModel
 
 
-async def get_all_members_data(
-        redis: CustomRedis,
-        session: AsyncSession,
-        team_id: int | None = None,
-        hackathon_id: int | None = None
-) -> List[SMember] | None:
-    try:
-
-        members_cache_key = f"members"
-        filters = {}
-        fetch_data = MemberDAO(session).find_all
-
-        if team_id:
-            members_cache_key += f":team:{team_id}"
-            filters = MemberFind(team_id=team_id)
-
-        members_data = await redis.get_cached_data(cache_key=members_cache_key,
-                                                   fetch_data_func=fetch_data,
-                                                   model=SMember,
-                                                   filters=filters)
-
-        if members_data is None:
-            logger.error(f"Участники {f"команды с ID {team_id}" if team_id else ""} не найдены.")
-            return None
-
-        return members_data
-
-    except Exception as e:
-        logger.error(f"Ошибка при получении команды: {e}")
-        return None
-
-
-
 async def get_member_data_by_team_id(
         redis: CustomRedis,
         session: AsyncSession,
@@ -53,6 +19,7 @@ async def get_member_data_by_team_id(
 
         member_cache_key = f"members:team:{team_id}"
         filters = MemberFind(team_id=team_id)
+        tags = [f"team:{team_id}"]
 
         if role == "leader":
             member_cache_key += f":leader"
@@ -61,6 +28,7 @@ async def get_member_data_by_team_id(
         elif user_id:
             member_cache_key += f":member:{user_id}"
             filters.user_id = user_id
+            tags.append(f"user:{user_id}")
 
         else:
             logger.warning("Недостаточно параметров для поиска")
@@ -69,6 +37,8 @@ async def get_member_data_by_team_id(
         member_data = await redis.get_cached_data(cache_key=member_cache_key,
                                                   fetch_data_func=MemberDAO(session).find_one_or_none,
                                                   model=SMember,
+                                                  tags=tags,
+                                                  refresh=db.in_own_session(lambda s: MemberDAO(s).find_one_or_none(filters=filters)),
                                                   filters=filters)
 
         if member_data is None:
@@ -83,20 +53,58 @@ async def get_member_data_by_team_id(
 
 
 
-async def count_members_in_team(redis: CustomRedis, session: AsyncSession, team_id: int) -> int:
+def member_index_key(hackathon_id: int) -> str:
+    """Индекс участия в хакатоне: хэш user_id -> team_id (0 - пользователь не участвует)."""
+    return f"hackathon:{hackathon_id}:member_of"
+
+
+
+# Служебное поле хэша ролей: отличает собранный из БД хэш от частично записанного
+ROLES_LOADED_FIELD = "*"
+# Роль пользователя, покинувшего команду: поле не удаляется, чтобы сборка хэша
+# из устаревшего снимка БД не вернула роль обратно
+NO_ROLE = ""
+
+
+def user_roles_key(tg_id: int) -> str:
+    """Роли пользователя в командах: хэш team_id -> role."""
+    return f"roles:user:{tg_id}"
+
+
+
+async def get_user_roles(redis: CustomRedis, session: AsyncSession, tg_id: int) -> dict[int, str]:
+    """Возвращает роли пользователя во всех его командах одним HGETALL.
+    Если хэша нет (или в нем только дописанные поля), роли берутся из БД и дописываются в хэш
+    без перезаписи: поля, которые записал другой запрос, пока шло чтение из БД, новее снимка."""
     try:
 
-        members_data = await get_all_members_data(redis=redis, session=session, team_id=team_id)
+        roles_key = user_roles_key(tg_id)
+        cached = {
+            (field.decode() if isinstance(field, bytes) else field): (value.decode() if isinstance(value, bytes) else value)
+            for field, value in (await redis.hgetall(roles_key)).items()
+        }
 
-        if members_data is None:
-            logger.error(f"Участников в команде с ID {team_id} не найдено.")
-            return 0
+        if cached.pop(ROLES_LOADED_FIELD, None) is not None:
+            logger.info(f"Роли пользователя {tg_id} получены из кэша")
+            return {int(team_id): role for team_id, role in cached.items() if role != NO_ROLE}
 
-        return len(members_data)
+        roles = await MemberDAO(session).find_roles_by_user_id(user_id=tg_id)
+        await redis.set_hash_fields_if_absent(
+            roles_key,
+            {**{str(team_id): role for team_id, role in roles.items()}, ROLES_LOADED_FIELD: ""},
+            tags=[f"user:{tg_id}", *(f"team:{team_id}" for team_id in roles)]
+        )
+        return roles
 
     except Exception as e:
-        logger.error(f"Ошибка при подсчете количества участников в команде: {e}")
-        return 0
+        logger.error(f"Ошибка при получении ролей пользователя {tg_id}: {e}")
+        return {}
+
+
+
+async def is_team_leader(redis: CustomRedis, session: AsyncSession, tg_id: int, team_id: int) -> bool:
+    roles = await get_user_roles(redis=redis, session=session, tg_id=tg_id)
+    return roles.get(team_id) == "leader"
 
 
 
@@ -108,15 +116,31 @@ async def find_existing_member_by_hackathon(
 ) -> SMember | None:
     try:
 
-        members_data = await get_all_members_data(redis=redis, session=session, hackathon_id=hackathon_id)
-        member = next((m for m in members_data if m.user_id == user_id), None)
+        index_key = member_index_key(hackathon_id)
+        team_id = await redis.hget(index_key, str(user_id))
 
-        if member is not None:
-            logger.info(f"Участник с user_id {user_id} и hackathon_id {hackathon_id} найден.")
-        else:
-            logger.info(f"Участник с user_id {user_id} и hackathon_id {hackathon_id} не найден.")
+        if team_id is not None and int(team_id):
+            member = await get_member_data_by_team_id(redis=redis, session=session, team_id=int(team_id),
+                                                      user_id=user_id)
+            if member is not None:
+                logger.info(f"Участник с user_id {user_id} и hackathon_id {hackathon_id} найден.")
+                return member
 
-        return member
+            # Индекс ссылается на удаленную запись: проверяем участие по БД
+            await redis.hdel(index_key, str(user_id))
+            team_id = None
+
+        if team_id is None:
+            member_data = await MemberDAO(session).find_existing_member(user_id=user_id, hackathon_id=hackathon_id)
+            await redis.set_hash_field_if_absent(index_key, str(user_id), member_data.team_id if member_data else 0,
+                                                 tags=[f"hackathon:{hackathon_id}"])
+
+            if member_data is not None:
+                logger.info(f"Участник с user_id {user_id} и hackathon_id {hackathon_id} найден.")
+                return SMember(**member_data.to_dict())
+
+        logger.info(f"Участник с user_id {user_id} и hackathon_id {hackathon_id} не найден.")
+        return None
 
     except Exception as e:
         logger.error(f"Ошибка при поиске участника с user_id {user_id} и hackathon_id {hackathon_id}: {e}")
@@ -134,14 +158,24 @@ async def invalidate_member_cache(
         member: SMember | None = None
 ) -> None:
 
-    member_list_cache_key = "members"
-    await redis.delete_key(member_list_cache_key)
-
     members_hackathon_cache_key = f"members:hackathon:{hackathon_id}"
     await redis.delete_key(members_hackathon_cache_key)
 
-    members_team_cache_key = f"members:team:{team_id}"
-    await redis.delete_key(members_team_cache_key)
+    if tg_id and (member or invalidate_member):
+        await redis.update_hash_fields(member_index_key(hackathon_id), {str(tg_id): team_id if member else None},
+                                       tags=[f"hackathon:{hackathon_id}"])
+        await redis.update_hash_fields(user_roles_key(tg_id), {str(team_id): member.role if member else NO_ROLE},
+                                       tags=[f"user:{tg_id}", f"team:{team_id}"])
+
+    # Состав команды изменился: сводная запись команды с участниками пересобирается целиком
+    await redis.delete_key(f"team_full:{team_id}")
+
+    members_cache_key = f"members:team:{team_id}"
+    if member:
+        # Новый участник: дописываем его в закэшированный список вместо его удаления
+        await redis.append_to_cached_list(members_cache_key, member)
+    else:
+        await redis.delete_key(members_cache_key)
 
     if tg_id:
         member_cache_key = f"members:team:{team_id}:member:{tg_id}"
@@ -150,9 +184,11 @@ async def invalidate_member_cache(
             await redis.delete_key(member_cache_key)
 
         if member:
-            await redis.set_value_with_ttl(key=member_cache_key, value=json.dumps(member.model_dump()))
+            await redis.cache_entry(member_cache_key, member, tags=[f"team:{team_id}", f"user:{tg_id}"])
 
-    if invalidate_leader:
+    if member and member.role == "leader":
+        await redis.cache_entry(f"members:team:{team_id}:leader", member, tags=[f"team:{team_id}"])
+
+    elif invalidate_leader:
         leader_cache_key = f"members:team:{team_id}:leader"
         await redis.delete_key(leader_cache_key)
-
@@ -1,46 +1,59 @@
-import json
 from typing import List
 from loguru import logger
 from sqlalchemy import false
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.redis.custom_redis import CustomRedis
-from app.redis.redis_operations.member import get_member_data_by_team_id
+from app.db.session_maker import db
+from app.redis.redis_operations.member import is_team_leader, member_index_key
 from app.api.typization.exceptions import TeamNotFoundException, ForbiddenException
-from app.api.typization.responses import STeam
+from app.api.typization.responses import STeam, STeamsPage, STeamWithMembers
 from app.db.dao import TeamDAO
-from app.api.typization.schemas import IdModel, HackathonIDModel
+from app.api.typization.schemas import IdModel, TeamPageFilter
 
 
 
-async def get_all_teams_data(
+# Страницы списка команд кэшируются коротко: ключей много (курсор, лимит, фильтры), а меняются они часто
+TEAM_PAGE_TTL = 300
+
+
+def team_pages_tag(hackathon_id: int | None = None) -> str:
+    """Тег страниц списка команд: общих или отфильтрованных по хакатону."""
+    return f"teams:pages:hackathon:{hackathon_id}" if hackathon_id else "teams:pages"
+
+
+async def get_teams_page_data(
         redis: CustomRedis,
         session: AsyncSession,
-        find_by_hackathon: bool = False,
-        hackathon_id: int | None = None
-) -> List[STeam] | None:
+        filters: TeamPageFilter,
+        after_id: int | None = None,
+        limit: int = 20
+) -> STeamsPage | None:
     try:
 
-        teams_cache_key = f"teams"
-        filters = None
+        teams_cache_key = (f"teams:page:{filters.hackathon_id or '*'}:{filters.is_open}:"
+                           f"{after_id or 0}:{limit}:{filters.name_prefix or ''}")
 
-        if find_by_hackathon and hackathon_id:
-            teams_cache_key += f":hackathon:{hackathon_id}"
-            filters = HackathonIDModel(hackathon_id=hackathon_id)
+        async def fetch_page(db_session: AsyncSession) -> dict:
+            teams, next_cursor = await TeamDAO(db_session).find_page(filters=filters, after_id=after_id, limit=limit)
+            return {"items": [team.to_dict() for team in teams], "next_cursor": next_cursor}
 
-        teams_data = await redis.get_cached_data(cache_key=teams_cache_key,
-                                             fetch_data_func=TeamDAO(session).find_all,
-                                             model=STeam,
-                                             filters=filters)
+        teams_page = await redis.get_cached_data(cache_key=teams_cache_key,
+                                                 fetch_data_func=fetch_page,
+                                                 model=STeamsPage,
+                                                 ttl=TEAM_PAGE_TTL,
+                                                 tags=[team_pages_tag(filters.hackathon_id)],
+                                                 refresh=db.in_own_session(fetch_page),
+                                                 db_session=session)
 
-        if teams_data is None:
-            logger.error(f"Команды не найдены.")
+        if teams_page is None:
+            logger.error(f"Страница команд не получена.")
             return None
 
-        return teams_data
+        return teams_page
 
     except Exception as e:
-        logger.error(f"Ошибка при получении команд: {e}")
+        logger.error(f"Ошибка при получении страницы команд: {e}")
         return None
 
 
@@ -49,11 +62,14 @@ async def get_team_data(redis: CustomRedis, session: AsyncSession, team_id: int)
     try:
 
         team_cache_key = f"team:{team_id}"
+        filters = IdModel(id=team_id)
 
         team_data = await redis.get_cached_data(cache_key=team_cache_key,
                                                 fetch_data_func=TeamDAO(session).find_one_or_none,
                                                 model=STeam,
-                                                filters=IdModel(id=team_id))
+                                                tags=[f"team:{team_id}"],
+                                                refresh=db.in_own_session(lambda s: TeamDAO(s).find_one_or_none(filters=filters)),
+                                                filters=filters)
 
         if team_data is None:
             logger.error(f"Команда с ID {team_id} не найдена.")
@@ -66,6 +82,45 @@ async def get_team_data(redis: CustomRedis, session: AsyncSession, team_id: int)
         return None
 
 
+async def get_teams_data(redis: CustomRedis, session: AsyncSession, team_ids: List[int]) -> dict[int, STeam]:
+    """Команды по списку ID: одно чтение кэша и один запрос к БД на все промахи."""
+    try:
+
+        return await redis.get_cached_batch(ids=team_ids,
+                                            key_template="team:{}",
+                                            fetch_many_func=TeamDAO(session).find_by_ids,
+                                            model=STeam,
+                                            tag_templates=["team:{}"])
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении команд по списку ID {team_ids}: {e}")
+        return {}
+
+
+async def get_team_with_members_data(redis: CustomRedis, session: AsyncSession, team_id: int) -> STeamWithMembers | None:
+    try:
+
+        # Команда и участники хранятся одним значением, чтобы они не расходились между собой
+        team_full_cache_key = f"team_full:{team_id}"
+
+        team_full_data = await redis.get_cached_data(cache_key=team_full_cache_key,
+                                                     fetch_data_func=TeamDAO(session).find_team_with_members,
+                                                     model=STeamWithMembers,
+                                                     tags=[f"team:{team_id}"],
+                                                     refresh=db.in_own_session(lambda s: TeamDAO(s).find_team_with_members(team_id=team_id)),
+                                                     team_id=team_id)
+
+        if team_full_data is None:
+            logger.error(f"Команда с ID {team_id} не найдена.")
+            return None
+
+        return team_full_data
+
+    except Exception as e:
+        logger.error(f"Ошибка при получении команды с участниками: {e}")
+        return None
+
+
 async def get_team_if_user_is_leader(
         redis: CustomRedis,
         session: AsyncSession,
@@ -78,8 +133,7 @@ async def get_team_if_user_is_leader(
         if not existing_team:
             raise TeamNotFoundException
 
-        leader = await get_member_data_by_team_id(redis=redis, session=session, team_id=existing_team.id, role="leader")
-        if not leader or leader.user_id != user_id:
+        if not await is_team_leader(redis=redis, session=session, tg_id=user_id, team_id=existing_team.id):
             raise ForbiddenException
 
         return existing_team
@@ -94,20 +148,30 @@ async def invalidate_team_cache(
         redis: CustomRedis,
         hackathon_id: int | None = None,
         team_id: int | None = None,
-        team: STeam | None = None
+        team: STeam | None = None,
+        invalidate_related: bool = False
 ) -> None:
 
-    if hackathon_id:
-        team_list_cache_key = "teams"
-        await redis.delete_key(team_list_cache_key)
+    if team:
+        # Команда создана или изменена: обновляем ключи актуальными данными вместо удаления
+        team_id = team_id or team.id
 
-        teams_for_hackathon_cache_key = f"teams:hackathon:{hackathon_id}"
-        await redis.delete_key(teams_for_hackathon_cache_key)
+    if hackathon_id:
+        # Команда могла появиться, исчезнуть или измениться на любой странице списка
+        await redis.invalidate_tags(team_pages_tag(), team_pages_tag(hackathon_id))
 
     if team_id:
         team_cache_key = f"team:{team_id}"
-        await redis.delete_key(team_cache_key)
-
-        if team:
-            await redis.set_value_with_ttl(key=team_cache_key, value=json.dumps(team.model_dump()))
-
+        filters = IdModel(id=team_id)
+
+        if invalidate_related:
+            # Команда удалена: сбрасываем все ее ключи, включая ключи всех участников
+            await redis.invalidate_tags(f"team:{team_id}")
+            if hackathon_id:
+                await redis.delete_key(member_index_key(hackathon_id))
+        elif team:
+            await redis.cache_entry(team_cache_key, team, tags=[f"team:{team_id}"])
+            await redis.delete_key(f"team_full:{team_id}")
+        else:
+            await redis.delete_key(team_cache_key)
+            await redis.delete_key(f"team_full:{team_id}")
@@ -4,30 +4,40 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.redis.custom_redis import CustomRedis
 from app.redis.redis_client import redis_client
-from app.api.typization.responses import SUser,  STeam
+from app.api.typization.responses import SUser, STeam, SBootstrap, SInvite, STeamMembership
+from app.api.utils.api_utils import check_registration_for_app
 from app.db.dao import UserDAO, TeamDAO
 from app.api.typization.schemas import TelegramIDModel
 from app.db.session_maker import db
+from app.redis.redis_operations.member import NO_ROLE, get_user_roles, user_roles_key
 
 
 
-async def redis_user_data(tg_id: int) -> SUser | None:
+async def redis_user_data(tg_id: int, session: AsyncSession | None = None) -> SUser | None:
+    """Возвращает пользователя из кэша или БД.
+    Сессию лучше передавать явно, иначе для промаха кэша откроется отдельное подключение к БД."""
     try:
 
-        redis: CustomRedis = redis_client.get_client()
+        if session is None:
+            async for session in db.get_session():
+                return await redis_user_data(tg_id=tg_id, session=session)
 
-        async for session in db.get_db():
-            user_cache_key = f"user:{tg_id}"
+        redis: CustomRedis = redis_client.get_client()
 
-            user_data = await redis.get_cached_data(cache_key=user_cache_key,
-                                                    fetch_data_func=UserDAO(session).find_one_or_none,
-                                                    model=SUser,
-                                                    filters=TelegramIDModel(telegram_id=tg_id))
-            if not user_data:
-                logger.error(f"Пользователь с ID {tg_id} не найден.")
-                return None
+        user_cache_key = f"user:{tg_id}"
+        filters = TelegramIDModel(telegram_id=tg_id)
+
+        user_data = await redis.get_cached_data(cache_key=user_cache_key,
+                                                fetch_data_func=UserDAO(session).find_one_or_none,
+                                                model=SUser,
+                                                tags=[f"user:{tg_id}"],
+                                                refresh=db.in_own_session(lambda s: UserDAO(s).find_one_or_none(filters=filters)),
+                                                filters=filters)
+        if not user_data:
+            logger.error(f"Пользователь с ID {tg_id} не найден.")
+            return None
 
-            return user_data
+        return user_data
 
     except Exception as e:
         logger.error(f"Общая ошибка при получении пользователя: {e}")
@@ -44,6 +54,8 @@ async def get_teams_data_by_user(redis: CustomRedis, session: AsyncSession, user
                                                 fetch_data_func=TeamDAO(session).find_all_teams_by_user_id,
                                                 model=STeam,
                                                 user_id=user_id,
+                                                tags=[f"user:{user_id}"],
+                                                refresh=db.in_own_session(lambda s: TeamDAO(s).find_all_teams_by_user_id(user_id=user_id)),
                                                 ttl=3600)
 
         if team_data is None:
@@ -58,17 +70,70 @@ async def get_teams_data_by_user(redis: CustomRedis, session: AsyncSession, user
 
 
 
+async def get_user_bootstrap_data(redis: CustomRedis, session: AsyncSession, user: SUser) -> SBootstrap:
+    """Собирает стартовые данные Mini App: команды пользователя с ролями и приглашения.
+    Роли читаются одним HGETALL, приглашения и команды - одним MGET; если чего-то нет в кэше,
+    приглашения и команды берутся одним запросом к БД и недостающие ключи записываются одним pipeline."""
+    tg_id = user.telegram_id
+    invites_key = f"invites:user:{tg_id}"
+
+    roles = await get_user_roles(redis=redis, session=session, tg_id=tg_id)
+
+    cached = await redis.get_cached_many({invites_key: SInvite, **{f"team:{team_id}": STeam for team_id in roles}})
+    invites: List[SInvite] | None = cached.pop(invites_key, None)
+    teams: dict[int, STeam] = {team.id: team for team in cached.values()}
+
+    if invites is None or len(teams) < len(roles):
+        rows = await UserDAO(session).get_memberships_and_invites(user_id=tg_id)
+
+        invites, missing, member_of = [], {}, set()
+        for row in rows:
+            team = STeam.model_validate(row)
+            if row["kind"] == "member":
+                roles[team.id] = row["role"]
+                member_of.add(team.id)
+                if team.id not in teams:
+                    missing[f"team:{team.id}"] = (team, STeam, [f"team:{team.id}"])
+                teams[team.id] = team
+            else:
+                invites.append(SInvite(id=row["invite_id"], invite_user_id=tg_id, team_id=team.id))
+
+        # Роль в удаленной команде: ее нет ни в кэше, ни в БД. Без снятия роль навсегда
+        # оставила бы кэш неполным, и каждый запрос шел бы в БД
+        stale = [team_id for team_id in roles if team_id not in member_of and team_id not in teams]
+        for team_id in stale:
+            del roles[team_id]
+        if stale:
+            await redis.update_hash_fields(user_roles_key(tg_id), {str(team_id): NO_ROLE for team_id in stale},
+                                           tags=[f"user:{tg_id}"])
+
+        await redis.cache_many({invites_key: (invites, SInvite, [f"user:{tg_id}"]), **missing})
+
+    return SBootstrap(
+        user=user,
+        is_registered=check_registration_for_app(user=user),
+        teams=[STeamMembership(**team.model_dump(), role=roles[team_id])
+               for team_id, team in teams.items() if team_id in roles],
+        invites=invites
+    )
+
+
+
 async def invalidate_user_cache(
         redis: CustomRedis,
         tg_id: int,
         invalidate_teams: bool = False,
         invalidate_user: bool = False,
+        team: STeam | None = None
 ) -> None:
 
     if invalidate_user:
         user_key = f"user:{tg_id}"
         await redis.delete_key(user_key)
 
-    if invalidate_teams:
-        user_teams_cache_key = f"teams:user:{tg_id}"
+    user_teams_cache_key = f"teams:user:{tg_id}"
+    if team:
+        # Пользователь вступил в команду или создал ее: дописываем команду в закэшированный список
+        await redis.append_to_cached_list(user_teams_cache_key, team)
+    elif invalidate_teams:
         await redis.delete_key(user_teams_cache_key)
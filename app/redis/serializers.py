@@ -0,0 +1,140 @@
+import hashlib
+import json
+from functools import cache
+from typing import Any, NamedTuple, Type
+from loguru import logger
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class CacheSerializer:
+    """Базовый сериализатор значений кэша."""
+
+    name: str = ""
+    # Короткая метка формата, которая пишется в заголовок каждого значения
+    tag: bytes = b""
+
+    def dumps(self, data: Any) -> bytes:
+        raise NotImplementedError("Этот метод должен быть реализован в подклассах.")
+
+    def loads(self, raw: bytes) -> Any:
+        raise NotImplementedError("Этот метод должен быть реализован в подклассах.")
+
+
+class JsonSerializer(CacheSerializer):
+    name = "json"
+    tag = b"j"
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+class OrjsonSerializer(CacheSerializer):
+    name = "orjson"
+    # orjson пишет обычный JSON, поэтому значения совместимы с JsonSerializer
+    tag = b"j"
+
+    def dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(self, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+
+class MsgpackSerializer(CacheSerializer):
+    name = "msgpack"
+    tag = b"m"
+
+    def dumps(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, raw=False)
+
+
+SERIALIZERS: dict[str, Type[CacheSerializer]] = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+_AVAILABLE = {
+    "json": True,
+    "orjson": orjson is not None,
+    "msgpack": msgpack is not None,
+}
+
+
+def get_serializer(name: str) -> CacheSerializer:
+    """Возвращает сериализатор по имени; если библиотека не установлена, используется stdlib json."""
+    if name not in SERIALIZERS:
+        raise ValueError(f"Неизвестный сериализатор кэша: {name}")
+
+    if not _AVAILABLE[name]:
+        logger.warning(f"Сериализатор {name} недоступен (библиотека не установлена), используется json")
+        return JsonSerializer()
+
+    return SERIALIZERS[name]()
+
+
+def _reader_for(tag: bytes, serializer: CacheSerializer) -> CacheSerializer | None:
+    """Подбирает сериализатор для чтения значения с указанной меткой формата."""
+    if tag == serializer.tag:
+        return serializer
+    if tag == JsonSerializer.tag:
+        return JsonSerializer()
+    if tag == MsgpackSerializer.tag and msgpack is not None:
+        return MsgpackSerializer()
+    return None
+
+
+@cache
+def schema_version(model: Type[BaseModel]) -> str:
+    """Версия схемы Pydantic-модели: короткий хэш ее JSON Schema.
+    Меняется при любом изменении полей, поэтому старые значения в кэше перестают читаться."""
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha1(schema.encode()).hexdigest()[:8]
+
+
+class CacheEnvelope(NamedTuple):
+    """Распакованное значение кэша."""
+    version: str
+    payload: Any
+    soft_expires_at: float
+
+
+def pack_entry(serializer: CacheSerializer, version: str, payload: Any, soft_expires_at: float) -> bytes:
+    """Упаковывает данные в формат <метка>:<версия схемы>:<тело>."""
+    body = serializer.dumps({"v": payload, "exp": soft_expires_at})
+    return serializer.tag + b":" + version.encode() + b":" + body
+
+
+def unpack_entry(serializer: CacheSerializer, raw: bytes | str) -> CacheEnvelope | None:
+    """Распаковывает значение. Возвращает None для значений неизвестного или устаревшего формата."""
+    if isinstance(raw, str):
+        raw = raw.encode()
+
+    parts = raw.split(b":", 2)
+    if len(parts) != 3:
+        return None
+
+    tag, version, body = parts
+    reader = _reader_for(tag, serializer)
+    if reader is None:
+        return None
+
+    data = reader.loads(body)
+    return CacheEnvelope(version=version.decode(), payload=data["v"], soft_expires_at=data["exp"])
+
@@ -0,0 +1,223 @@
+import uuid
+import asyncio
+from contextlib import suppress
+from loguru import logger
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+from redis.asyncio import Redis
+
+
+# Кладет обновление в поток, только если обновление с таким update_id еще не приходило
+ENQUEUE_SCRIPT = """
+if redis.call('set', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+    return redis.call('xadd', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', 'u', ARGV[3])
+end
+return false
+"""
+
+# Продлевает аренду раздела, только если она все еще принадлежит текущему обработчику
+RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class UpdateQueue:
+    """
+    Очередь обновлений Telegram на Redis Streams.
+
+    Вебхук кладет обновление в один из partitions потоков по ID чата и сразу отвечает Telegram.
+    Обработчики берут раздел в аренду (одновременно раздел обрабатывает только один обработчик
+    во всех процессах), поэтому обновления одного чата обрабатываются строго по порядку,
+    а разные чаты - параллельно. Повторная доставка того же update_id отбрасывается при постановке.
+    Обновления, не подтвержденные упавшим обработчиком, забирает следующий арендатор раздела.
+    """
+
+    group = "bot"
+    dedup_ttl = 3600
+    max_stream_length = 100_000
+    lease_ttl_ms = 30_000
+    block_ms = 1000
+    batch_size = 50
+    # Сколько пачек подряд обработчик разбирает из одного раздела, прежде чем уступить его
+    max_batches = 10
+
+    def __init__(self, redis: Redis, partitions: int = 8, prefix: str = "updates"):
+        self.redis = redis
+        self.partitions = partitions
+        self.prefix = prefix
+        self._enqueue_script = redis.register_script(ENQUEUE_SCRIPT)
+        self._renew_lease_script = redis.register_script(RENEW_LEASE_SCRIPT)
+        self._release_lease_script = redis.register_script(RELEASE_LEASE_SCRIPT)
+
+
+    def _stream_key(self, partition: int) -> str:
+        return f"{self.prefix}:{partition}"
+
+
+    def _lease_key(self, partition: int) -> str:
+        return f"{self.prefix}:{partition}:lease"
+
+
+    def partition_for(self, update: Update) -> int:
+        """Раздел обновления: все обновления одного чата (или пользователя) попадают в один раздел."""
+        context = UserContextMiddleware.resolve_event_context(update)
+        if context.chat:
+            return context.chat.id % self.partitions
+        if context.user:
+            return context.user.id % self.partitions
+        return update.update_id % self.partitions
+
+
+    async def enqueue(self, update: Update) -> bool:
+        """Ставит обновление в очередь. Возвращает False, если это повторная доставка."""
+        entry_id = await self._enqueue_script(
+            keys=[f"{self.prefix}:seen:{update.update_id}", self._stream_key(self.partition_for(update))],
+            args=[self.dedup_ttl, self.max_stream_length, update.model_dump_json(exclude_unset=True)]
+        )
+        if entry_id is None:
+            logger.info(f"Обновление {update.update_id} уже было поставлено в очередь")
+            return False
+        return True
+
+
+    async def _ensure_groups(self) -> None:
+        for partition in range(self.partitions):
+            try:
+                await self.redis.xgroup_create(self._stream_key(partition), self.group, id="0", mkstream=True)
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+
+    async def _keep_lease(self, partition: int, token: str, lease_lost: asyncio.Event) -> None:
+        """Продлевает аренду раздела, пока идет обработка долгих обновлений.
+        Если продлить не удалось, раздел уже мог взять другой обработчик: выставляет lease_lost."""
+        while True:
+            await asyncio.sleep(self.lease_ttl_ms / 3000)
+            try:
+                renewed = await self._renew_lease_script(keys=[self._lease_key(partition)],
+                                                         args=[token, self.lease_ttl_ms])
+            except Exception as e:
+                logger.error(f"Ошибка при продлении аренды раздела {partition}: {e}")
+                renewed = False
+
+            if not renewed:
+                logger.warning(f"Аренда раздела {partition} потеряна во время обработки")
+                lease_lost.set()
+                return
+
+
+    async def _process_entries(self, dp: Dispatcher, bot: Bot, partition: int, entries: list,
+                               lease_lost: asyncio.Event) -> None:
+        stream_key = self._stream_key(partition)
+        for entry_id, fields in entries:
+            if lease_lost.is_set():
+                # Оставшиеся записи остаются неподтвержденными и достанутся новому арендатору по порядку
+                logger.warning(f"Обработка раздела {partition} остановлена перед записью {entry_id}: аренда потеряна")
+                return
+
+            try:
+                raw = (fields.get(b"u") or fields.get("u")) if fields else None
+                if raw:
+                    update = Update.model_validate_json(raw, context={"bot": bot})
+                    await dp.feed_update(bot, update)
+                else:
+                    # Запись удалена обрезкой потока (MAXLEN), пока ждала подтверждения: обновление потеряно
+                    logger.warning(f"Обновление {entry_id} из очереди {stream_key} удалено до обработки")
+            except Exception as e:
+                # Обновление с ошибкой не должно блокировать остальные обновления раздела
+                logger.error(f"Ошибка при обработке обновления из очереди {stream_key} ({entry_id}): {e}")
+
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.xack(stream_key, self.group, entry_id)
+                pipe.xdel(stream_key, entry_id)
+                await pipe.execute()
+
+
+    async def _drain_partition(self, dp: Dispatcher, bot: Bot, partition: int, token: str) -> None:
+        """Разбирает раздел, пока он не опустеет или не исчерпан лимит пачек."""
+        stream_key = self._stream_key(partition)
+        # Имя потребителя совпадает с разделом: при смене арендатора ему достаются неподтвержденные записи
+        consumer = f"partition-{partition}"
+        lease_lost = asyncio.Event()
+        keeper = asyncio.create_task(self._keep_lease(partition, token, lease_lost))
+        try:
+            start_id = "0"
+            for _ in range(self.max_batches):
+                if lease_lost.is_set():
+                    break
+
+                response = await self.redis.xreadgroup(self.group, consumer, {stream_key: start_id},
+                                                       count=self.batch_size,
+                                                       block=None if start_id == "0" else self.block_ms)
+                entries = response[0][1] if response else []
+
+                if not entries:
+                    if start_id == ">":
+                        break
+                    start_id = ">"
+                    continue
+
+                await self._process_entries(dp, bot, partition, entries, lease_lost)
+        finally:
+            keeper.cancel()
+            with suppress(asyncio.CancelledError):
+                await keeper
+
+
+    async def _consume(self, dp: Dispatcher, bot: Bot, offset: int) -> None:
+        partition = offset % self.partitions
+        while True:
+            try:
+                token = uuid.uuid4().hex
+                acquired_any = False
+                for _ in range(self.partitions):
+                    partition = (partition + 1) % self.partitions
+                    lease_key = self._lease_key(partition)
+
+                    if not await self.redis.set(lease_key, token, nx=True, px=self.lease_ttl_ms):
+                        continue
+
+                    acquired_any = True
+                    try:
+                        await self._drain_partition(dp, bot, partition, token)
+                    finally:
+                        await self._release_lease_script(keys=[lease_key], args=[token])
+
+                if not acquired_any:
+                    # Все разделы заняты другими обработчиками
+                    await asyncio.sleep(self.block_ms / 1000)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка обработчика очереди обновлений: {e}")
+                if "NOGROUP" in str(e):
+                    # Потоки удалены вместе с группами (например, при очистке базы Redis)
+                    await self._ensure_groups()
+                await asyncio.sleep(self.block_ms / 1000)
+
+
+    async def run_consumers(self, dp: Dispatcher, bot: Bot, concurrency: int = 4) -> None:
+        """Запускает concurrency обработчиков очереди и работает до отмены."""
+        await self._ensure_groups()
+        logger.info(f"Запуск {concurrency} обработчиков очереди обновлений ({self.partitions} разделов)")
+
+        consumers = [asyncio.create_task(self._consume(dp, bot, offset)) for offset in range(concurrency)]
+        try:
+            await asyncio.gather(*consumers)
+        finally:
+            for consumer in consumers:
+                consumer.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
@@ -0,0 +1,68 @@
+"""
+Сравнение сериализаторов кэша на списке из 10 000 участников.
+
+Запуск из корня проекта:
+    python -m benchmarks.cache_serializers
+"""
+import time
+from statistics import median
+
+from app.api.typization.responses import SMember
+from app.redis.serializers import SERIALIZERS, get_serializer, pack_entry, schema_version, unpack_entry
+
+
+MEMBERS_COUNT = 10_000
+ROUNDS = 20
+
+
+def build_members() -> list[dict]:
+    return [
+        {
+            "id": i,
+            "user_id": 1_000_000 + i,
+            "team_id": i // 5,
+            "tg_name": f"user_{i}",
+            "role": "leader" if i % 5 == 0 else "member",
+            "created_at": 1_735_689_600 + i,
+            "updated_at": 1_735_689_600 + i,
+        }
+        for i in range(MEMBERS_COUNT)
+    ]
+
+
+def measure(func) -> float:
+    """Медианное время одного вызова в миллисекундах."""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def main() -> None:
+    members = build_members()
+    version = schema_version(SMember)
+
+    print(f"Участников: {MEMBERS_COUNT}, замеров: {ROUNDS} (медиана, мс)")
+    print(f"{'сериализатор':<12} {'размер, КБ':>10} {'encode':>8} {'decode':>8} {'decode+validate':>16}")
+
+    for name in SERIALIZERS:
+        serializer = get_serializer(name)
+        if serializer.name != name:
+            print(f"{name:<12} пропущен: библиотека не установлена")
+            continue
+
+        raw = pack_entry(serializer, version, members, time.time())
+
+        encode = measure(lambda: pack_entry(serializer, version, members, time.time()))
+        decode = measure(lambda: unpack_entry(serializer, raw))
+        validate = measure(
+            lambda: [SMember.model_validate(item) for item in unpack_entry(serializer, raw).payload]
+        )
+
+        print(f"{name:<12} {len(raw) / 1024:>10.1f} {encode:>8.2f} {decode:>8.2f} {validate:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
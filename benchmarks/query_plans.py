@@ -0,0 +1,122 @@
+"""
+Планы запросов горячих путей до и после индексов миграции 8c4e2f7a1d93.
+
+Скрипт создает в базе из config.db_url отдельную схему, заполняет ее данными,
+выводит EXPLAIN ANALYZE каждого запроса без индексов (удаляются внутри транзакции,
+которая затем откатывается) и с ними, после чего удаляет схему.
+
+Запуск из корня проекта (нужен PostgreSQL):
+    python -m benchmarks.query_plans
+"""
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.db.database import Base
+from app.db import models  # noqa: F401 - регистрирует таблицы в Base.metadata
+from config import db_url
+
+
+SCHEMA = "query_plans_bench"
+HACKATHONS = 20
+TEAMS = 20_000
+USERS = 100_000
+INVITES = 50_000
+
+SEED = [
+    f"""
+    INSERT INTO users (telegram_id, username)
+    SELECT 1000000 + g, 'user_' || g FROM generate_series(1, {USERS}) g
+    """,
+    f"""
+    INSERT INTO hackathons (name, start_description, description, max_members)
+    SELECT 'hackathon ' || g, '', '', 5 FROM generate_series(1, {HACKATHONS}) g
+    """,
+    f"""
+    INSERT INTO teams (name, is_open, hackathon_id)
+    SELECT 'team ' || g, g % 2 = 0, 1 + g % {HACKATHONS} FROM generate_series(1, {TEAMS}) g
+    """,
+    # Каждый пользователь состоит в одной команде; первый участник команды - лидер
+    f"""
+    INSERT INTO members (user_id, team_id, hackathon_id, tg_name, role)
+    SELECT 1000000 + g, t.id, t.hackathon_id, 'user_' || g,
+           CASE WHEN g <= {TEAMS} THEN 'leader' ELSE 'member' END
+    FROM generate_series(1, {USERS}) g
+    JOIN teams t ON t.id = 1 + (g - 1) % {TEAMS}
+    """,
+    f"""
+    INSERT INTO invites (team_id, invite_user_id)
+    SELECT 1 + g % {TEAMS}, 1000000 + 1 + (g * 7) % {USERS} FROM generate_series(1, {INVITES}) g
+    """,
+    "ANALYZE",
+]
+
+QUERIES = {
+    "участие пользователя в хакатоне":
+        "SELECT * FROM members WHERE user_id = 1050000 AND hackathon_id = 3",
+    "участники команды":
+        "SELECT * FROM members WHERE team_id = 1234",
+    "лидер команды":
+        "SELECT * FROM members WHERE team_id = 1234 AND role = 'leader'",
+    "команды хакатона":
+        "SELECT * FROM teams WHERE hackathon_id = 3",
+    "проверка имени команды":
+        "SELECT * FROM teams WHERE hackathon_id = 3 AND name = 'team 1003'",
+    "приглашения пользователя":
+        "SELECT * FROM invites WHERE invite_user_id = 1050001",
+    "приглашение в команду":
+        "SELECT * FROM invites WHERE team_id = 1234 AND invite_user_id = 1050001",
+}
+
+DROP_INDEXES = [
+    "ALTER TABLE members DROP CONSTRAINT fk_members_team_id_hackathon_id",
+    "ALTER TABLE members DROP CONSTRAINT uq_members_user_id_hackathon_id",
+    "DROP INDEX ix_members_team_id_role",
+    "ALTER TABLE teams DROP CONSTRAINT uq_teams_id_hackathon_id",
+    "ALTER TABLE teams DROP CONSTRAINT uq_teams_hackathon_id_name",
+    "DROP INDEX ix_invites_invite_user_id",
+    "DROP INDEX ix_invites_team_id_invite_user_id",
+]
+
+
+async def explain_all(conn: AsyncConnection, title: str) -> None:
+    print(f"\n===== {title} =====")
+    for name, query in QUERIES.items():
+        result = await conn.execute(text(f"EXPLAIN (ANALYZE, COSTS OFF) {query}"))
+        print(f"\n-- {name}")
+        for (line,) in result:
+            print(f"   {line}")
+
+
+async def main() -> None:
+    engine = create_async_engine(db_url, connect_args={"server_settings": {"search_path": SCHEMA}})
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for statement in SEED:
+                await conn.execute(text(statement))
+
+        conn = await engine.connect()
+        try:
+            transaction = await conn.begin()
+            for statement in DROP_INDEXES:
+                await conn.execute(text(statement))
+            await explain_all(conn, "без индексов")
+            await transaction.rollback()
+
+            await explain_all(conn, "с индексами")
+        finally:
+            await conn.close()
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,7 +3,7 @@ from typing import List
 from loguru import logger
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.client.default import DefaultBotProperties
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -22,6 +22,15 @@ class Settings(BaseSettings):
     DB_PORT: int
     DB_NAME: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Кэши подготовленных выражений asyncpg; за PgBouncer в режиме transaction оба нужно выставить в 0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_DB: int
@@ -31,6 +40,29 @@ class Settings(BaseSettings):
 
     TMA: str
 
+    CACHE_L1_MAX_SIZE: int = 2048
+    CACHE_L1_TTL: int = 30
+    CACHE_SOFT_TTL: int = 600
+    CACHE_SERIALIZER: str = "orjson"
+    AUTH_CACHE_MAX_SIZE: int = 10000
+
+    # Лимиты исходящих запросов бота: всего в секунду и в один чат (с допустимой серией подряд)
+    TG_GLOBAL_RATE: float = 30
+    TG_CHAT_RATE: float = 1
+    TG_CHAT_BURST: int = 3
+    # Время жизни состояния FSM бота с момента последнего изменения
+    FSM_STATE_TTL: int = 86400
+
+    # Адрес API для вебхука Telegram; если не задан, бот работает через long polling
+    WEBHOOK_URL: str | None = None
+    # Секрет, который Telegram передает в заголовке X-Telegram-Bot-Api-Secret-Token каждого обновления
+    # (1-256 символов: A-Z, a-z, 0-9, _ и -); без него вебхук отклоняет все запросы
+    WEBHOOK_SECRET: str | None = None
+    # Вебхук кладет обновления в очередь Redis Streams, их разбирают обработчики процесса бота
+    WEBHOOK_QUEUE: bool = True
+    WEBHOOK_QUEUE_PARTITIONS: int = 8
+    WEBHOOK_QUEUE_CONCURRENCY: int = 4
+
     FORMAT_LOG: str = "{time:YYYY-MM-DD at HH:mm} | {level} | {message}"
     LOG_ROTATION: str = "10 MB"
 
@@ -49,7 +81,10 @@ settings = Settings()
 
 
 bot = Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-dp = Dispatcher(storage=MemoryStorage())
+# Состояние FSM общее для всех процессов бота и переживает перезапуск. У хранилища свой пул
+# подключений: Dispatcher закрывает его при остановке, не трогая подключение redis_client
+dp = Dispatcher(storage=RedisStorage.from_url(settings.get_redis_url(), state_ttl=settings.FSM_STATE_TTL,
+                                              data_ttl=settings.FSM_STATE_TTL))
 admins = settings.ADMINS_ID
 
 front_site_url = settings.FRONT_SITE
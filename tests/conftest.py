@@ -63,6 +63,23 @@ async def async_client():
         redis_client.close()
 
 
+# Ключи, которые тесты пишут в Redis напрямую, начинаются с этого префикса
+TEST_KEY_PREFIX = "test:"
+
+
+@pytest_asyncio.fixture(scope="function")
+async def redis():
+    """Отдельный клиент Redis для тестов кэша и очередей, без слушателя инвалидаций."""
+    client = CustomRedis.from_url(url=settings.get_redis_url())
+    client.enable_local_cache(max_size=100, ttl=30)
+    try:
+        yield client
+    finally:
+        for prefix in (TEST_KEY_PREFIX, f"lock:{TEST_KEY_PREFIX}", f"tag:{TEST_KEY_PREFIX}"):
+            await client.delete_keys_by_prefix(prefix)
+        await client.aclose()
+
+
 @pytest.fixture
 def authorization_headers():
     # Init data из Telegram
@@ -0,0 +1,105 @@
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import quote
+
+import pytest
+
+from app.api.utils.api_utils import (INIT_DATA_MAX_AGE, authorization_check, eligible_checker, parse_init_data,
+                                     verified_init_data)
+from config import settings
+
+
+USER = {"id": 4242, "first_name": "Андрей", "username": "tester", "language_code": "ru"}
+
+
+def sign_init_data(fields: dict, bot_token: str = settings.BOT_TOKEN) -> str:
+    """Собирает initData так же, как Telegram: поля в URL-кодировке и HMAC-подпись отсортированных полей."""
+    data_check_string = "\n".join(f"{key}={fields[key]}" for key in sorted(fields))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    hash_str = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return "&".join(f"{key}={quote(value)}" for key, value in fields.items()) + f"&hash={hash_str}"
+
+
+def init_data_fields(auth_date: float | None = None) -> dict:
+    return {
+        "query_id": "AAH0s0ABAAAAAPSzQAEbDp1I",
+        "user": json.dumps(USER, ensure_ascii=False, separators=(",", ":")),
+        "auth_date": str(int(time.time() if auth_date is None else auth_date)),
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_verified_init_data():
+    verified_init_data.clear()
+    yield
+    verified_init_data.clear()
+
+
+def test_parse_init_data_builds_data_check_string():
+    fields = init_data_fields(auth_date=1700000000)
+
+    parsed, hash_str, data_check_string = parse_init_data(sign_init_data(fields))
+
+    assert parsed == fields
+    assert len(hash_str) == 64
+    assert data_check_string == (f"auth_date=1700000000\nquery_id={fields['query_id']}\n"
+                                 f"user={fields['user']}")
+    assert eligible_checker(hash_str, data_check_string)
+
+
+@pytest.mark.asyncio
+async def test_valid_init_data_is_accepted():
+    status, data = await authorization_check({"authorization": f"tma {sign_init_data(init_data_fields())}"})
+
+    assert status is True
+    assert data["user"] == USER
+
+
+@pytest.mark.asyncio
+async def test_tampered_init_data_is_rejected():
+    init_data = sign_init_data(init_data_fields()).replace("4242", "4243")
+
+    assert await authorization_check({"authorization": f"tma {init_data}"}) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_init_data_signed_by_another_bot_is_rejected():
+    init_data = sign_init_data(init_data_fields(), bot_token="654321:another-bot-token")
+
+    assert await authorization_check({"authorization": f"tma {init_data}"}) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_expired_init_data_is_rejected():
+    init_data = sign_init_data(init_data_fields(auth_date=time.time() - INIT_DATA_MAX_AGE - 60))
+
+    assert await authorization_check({"authorization": f"tma {init_data}"}) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_malformed_auth_date_is_rejected():
+    fields = init_data_fields()
+    fields["auth_date"] = "yesterday"
+
+    assert await authorization_check({"authorization": f"tma {sign_init_data(fields)}"}) == (False, None)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("headers", [{}, {"authorization": "Bearer token"}, {"authorization": "tma "}])
+async def test_missing_init_data_is_rejected(headers: dict):
+    assert await authorization_check(headers) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_verified_init_data_is_reused(monkeypatch):
+    headers = {"authorization": f"tma {sign_init_data(init_data_fields())}"}
+    assert (await authorization_check(headers))[0] is True
+
+    # Повторный запрос той же сессии Mini App не проверяет подпись заново
+    monkeypatch.setattr("app.api.utils.api_utils.eligible_checker", lambda *args: pytest.fail("подпись проверена повторно"))
+    status, data = await authorization_check(headers)
+
+    assert status is True
+    assert data["user"] == USER
@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from app.redis.custom_redis import CustomRedis
+from app.redis.invalidation import invalidation_batch
+from tests.conftest import TEST_KEY_PREFIX
+
+
+class SItem(BaseModel):
+    id: int
+    name: str
+
+
+class CountingFetch:
+    """Функция загрузки из "БД", которая считает обращения и отвечает с задержкой."""
+
+    def __init__(self, result: dict | None, delay: float = 0.05):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}item:1"
+    fetch = CountingFetch({"id": 1, "name": "first"})
+
+    results = await asyncio.gather(*(redis.get_cached_data(key, fetch, SItem) for _ in range(20)))
+
+    assert fetch.calls == 1
+    assert all(result == SItem(id=1, name="first") for result in results)
+    assert redis.cache_stats.coalesced == 19
+
+
+@pytest.mark.asyncio
+async def test_lock_waiter_takes_value_written_by_holder(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}item:2"
+    fetch = CountingFetch({"id": 2, "name": "from db"})
+
+    # Ключ перестраивает другой воркер
+    token = await redis._acquire_lock(key)
+    waiter = asyncio.create_task(redis.get_cached_data(key, fetch, SItem))
+    await asyncio.sleep(redis.lock_poll_interval * 2)
+    await redis.cache_entry(key, SItem(id=2, name="from holder"))
+    await redis._release_lock(key, token)
+
+    assert await waiter == SItem(id=2, name="from holder")
+    assert fetch.calls == 0
+    assert redis.cache_stats.lock_wait_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_lock_waiter_stops_when_lock_released_without_value(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}item:3"
+    fetch = CountingFetch(None, delay=0)
+    redis.lock_wait_timeout = 5
+
+    # Другой воркер ничего не нашел в БД и снял блокировку, не записав значение
+    token = await redis._acquire_lock(key)
+    waiter = asyncio.create_task(redis.get_cached_data(key, fetch, SItem))
+    await asyncio.sleep(redis.lock_poll_interval * 2)
+    await redis._release_lock(key, token)
+
+    assert await asyncio.wait_for(waiter, timeout=1) is None
+    assert fetch.calls == 1
+    assert redis.cache_stats.lock_timeouts == 0
+
+
+@pytest.mark.asyncio
+async def test_lock_waiter_falls_back_to_db_after_timeout(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}item:4"
+    fetch = CountingFetch({"id": 4, "name": "from db"}, delay=0)
+    redis.lock_wait_timeout = 0.2
+
+    # Блокировку держит зависший воркер
+    await redis._acquire_lock(key)
+
+    assert await redis.get_cached_data(key, fetch, SItem) == SItem(id=4, name="from db")
+    assert fetch.calls == 1
+    assert redis.cache_stats.lock_timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_value_is_refreshed_in_background(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}item:5"
+    await redis.get_cached_data(key, CountingFetch({"id": 5, "name": "old"}, delay=0), SItem, soft_ttl=0)
+    redis.local_cache.clear()
+
+    fetch = CountingFetch({"id": 5, "name": "request"})
+    refresh = CountingFetch({"id": 5, "name": "refreshed"})
+
+    # Устаревшее значение отдается сразу, обновление идет в фоне через refresh
+    assert await redis.get_cached_data(key, fetch, SItem, soft_ttl=0, refresh=refresh) == SItem(id=5, name="old")
+    await asyncio.gather(*redis._refreshing.values())
+
+    assert fetch.calls == 0
+    assert refresh.calls == 1
+    assert redis.cache_stats.background_refreshes == 1
+    redis.local_cache.clear()
+    assert (await redis._read_cached(key, SItem))[0] == SItem(id=5, name="refreshed")
+
+
+@pytest.mark.asyncio
+async def test_stale_value_without_refresh_is_rebuilt_in_request(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}item:6"
+    await redis.get_cached_data(key, CountingFetch({"id": 6, "name": "old"}, delay=0), SItem, soft_ttl=0)
+    redis.local_cache.clear()
+
+    fetch = CountingFetch({"id": 6, "name": "request"}, delay=0)
+
+    assert await redis.get_cached_data(key, fetch, SItem, soft_ttl=0) == SItem(id=6, name="request")
+    assert fetch.calls == 1
+    assert redis.cache_stats.background_refreshes == 0
+
+
+@pytest.mark.asyncio
+async def test_hash_fill_keeps_fields_written_concurrently(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}roles"
+
+    # Пока шло чтение из БД, другой запрос записал свежую роль и снял старую
+    await redis.update_hash_fields(key, {"5": "leader", "1": ""})
+    await redis.set_hash_fields_if_absent(key, {"1": "member", "2": "member", "*": ""})
+
+    assert await redis.hgetall(key) == {b"5": b"leader", b"1": b"", b"2": b"member", b"*": b""}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_inside_batch_keeps_pending_delete(redis: CustomRedis):
+    key = f"{TEST_KEY_PREFIX}item:7"
+
+    async with invalidation_batch(redis):
+        await redis.delete_key(key)
+        # Данные прочитаны из незакоммиченной транзакции: в кэш они не попадают, удаление остается в пакете
+        fetch = CountingFetch({"id": 7, "name": "uncommitted"}, delay=0)
+        assert await redis.get_cached_data(key, fetch, SItem) == SItem(id=7, name="uncommitted")
+
+    assert await redis.get(key) is None
+    assert redis.local_cache.get(key) is None
+
+
+@pytest.mark.asyncio
+async def test_batch_flush_writes_in_one_pipeline(redis: CustomRedis, monkeypatch):
+    stale_key, entry_key, hash_key = (f"{TEST_KEY_PREFIX}item:8", f"{TEST_KEY_PREFIX}item:9",
+                                      f"{TEST_KEY_PREFIX}roles:8")
+    await redis.cache_entry(stale_key, SItem(id=8, name="stale"))
+
+    pipelines = 0
+    open_pipeline = redis.pipeline
+
+    def pipeline(*args, **kwargs):
+        nonlocal pipelines
+        pipelines += 1
+        return open_pipeline(*args, **kwargs)
+
+    monkeypatch.setattr(redis, "pipeline", pipeline)
+    async with invalidation_batch(redis):
+        await redis.delete_key(stale_key)
+        await redis.cache_entry(entry_key, SItem(id=9, name="fresh"))
+        await redis.update_hash_fields(hash_key, {"1": "leader"})
+
+    assert pipelines == 1
+    assert await redis.get(stale_key) is None
+    assert (await redis._read_cached(entry_key, SItem))[0] == SItem(id=9, name="fresh")
+    assert await redis.hgetall(hash_key) == {b"1": b"leader"}
@@ -0,0 +1,74 @@
+import asyncio
+from collections import Counter
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, func, select
+
+from app.db.dao import JoinStatus, MemberDAO
+from app.db.database import async_session_maker
+from app.db.models import Hackathon, Member, Team, User
+
+
+USERS_COUNT = 300
+MAX_MEMBERS = 5
+FIRST_TG_ID = 9_900_000
+
+
+@pytest_asyncio.fixture(scope="function")
+async def crowded_hackathon():
+    """Хакатон с двумя открытыми командами и USERS_COUNT пользователями вне команд."""
+    user_ids = [FIRST_TG_ID + i for i in range(USERS_COUNT)]
+
+    async with async_session_maker() as session:
+        hackathon = Hackathon(name="stress", start_description="", description="", max_members=MAX_MEMBERS)
+        session.add(hackathon)
+        await session.flush()
+
+        teams = [Team(name=f"stress {i}", is_open=True, hackathon_id=hackathon.id) for i in range(2)]
+        session.add_all(teams)
+        session.add_all(User(telegram_id=tg_id, username=f"stress_{tg_id}") for tg_id in user_ids)
+        await session.commit()
+
+        hackathon_id, team_ids = hackathon.id, [team.id for team in teams]
+
+    yield hackathon_id, team_ids, user_ids
+
+    async with async_session_maker() as session:
+        await session.execute(delete(Hackathon).where(Hackathon.id == hackathon_id))
+        await session.execute(delete(User).where(User.telegram_id.in_(user_ids)))
+        await session.commit()
+
+
+async def join(user_id: int, team_id: int) -> JoinStatus:
+    async with async_session_maker() as session:
+        result = await MemberDAO(session).join_team(user_id=user_id, team_id=team_id, tg_name=f"stress_{user_id}")
+        await session.commit()
+        return result.status
+
+
+@pytest.mark.asyncio
+async def test_parallel_joins_respect_capacity(crowded_hackathon):
+    hackathon_id, team_ids, user_ids = crowded_hackathon
+
+    # Каждый пользователь одновременно пытается вступить в обе команды хакатона
+    statuses = await asyncio.gather(*(join(user_id, team_id) for user_id in user_ids for team_id in team_ids))
+
+    counts = Counter(statuses)
+    assert counts[JoinStatus.JOINED] == MAX_MEMBERS * len(team_ids)
+    assert counts[JoinStatus.TEAM_NOT_FOUND] == 0
+
+    async with async_session_maker() as session:
+        per_team = await session.execute(
+            select(Member.team_id, func.count()).where(Member.team_id.in_(team_ids)).group_by(Member.team_id)
+        )
+        assert all(count == MAX_MEMBERS for _, count in per_team)
+
+        member_counts = await session.scalars(select(Team.member_count).where(Team.id.in_(team_ids)))
+        assert all(count == MAX_MEMBERS for count in member_counts)
+
+        per_user = await session.execute(
+            select(func.count()).where(Member.hackathon_id == hackathon_id)
+            .group_by(Member.user_id).having(func.count() > 1)
+        )
+        assert per_user.first() is None
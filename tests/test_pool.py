@@ -0,0 +1,40 @@
+import sqlite3
+
+from app.db.pool import InstrumentedAsyncPool
+
+
+POOL_SIZE = 3
+MAX_OVERFLOW = 2
+
+
+def make_pool() -> InstrumentedAsyncPool:
+    return InstrumentedAsyncPool(lambda: sqlite3.connect(":memory:", check_same_thread=False),
+                                 pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, timeout=0.1)
+
+
+def test_connections_within_pool_size_are_not_overflow():
+    pool = make_pool()
+
+    connections = [pool.connect() for _ in range(POOL_SIZE)]
+
+    assert pool.stats.checkouts == POOL_SIZE
+    assert pool.stats.overflow_events == 0
+    for connection in connections:
+        connection.close()
+
+
+def test_connections_past_pool_size_are_counted_as_overflow():
+    pool = make_pool()
+
+    connections = [pool.connect() for _ in range(POOL_SIZE + MAX_OVERFLOW)]
+
+    assert pool.stats.overflow_events == MAX_OVERFLOW
+    assert pool.snapshot()["overflow"] == MAX_OVERFLOW
+    for connection in connections:
+        connection.close()
+
+    # Возвращенные в пул подключения переиспользуются без новых выходов за pool_size
+    connections = [pool.connect() for _ in range(POOL_SIZE)]
+    assert pool.stats.overflow_events == MAX_OVERFLOW
+    for connection in connections:
+        connection.close()
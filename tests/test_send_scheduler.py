@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from app.bot.utils.send_scheduler import TelegramSendScheduler, TokenBucket
+
+
+def retry_after(seconds: int) -> TelegramRetryAfter:
+    return TelegramRetryAfter(method=SendMessage(chat_id=1, text="test"), message="Too Many Requests",
+                              retry_after=seconds)
+
+
+class FlakyRequest:
+    """Запрос к Telegram, который первые failures раз получает RetryAfter."""
+
+    def __init__(self, failures: int, retry_seconds: int = 1):
+        self.failures = failures
+        self.retry_seconds = retry_seconds
+        self.calls: list[float] = []
+
+    async def __call__(self):
+        self.calls.append(time.monotonic())
+        if len(self.calls) <= self.failures:
+            raise retry_after(self.retry_seconds)
+        return "sent"
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_rate():
+    bucket = TokenBucket(rate=20, capacity=3)
+    started = time.monotonic()
+
+    for _ in range(3):
+        await bucket.acquire()
+    burst = time.monotonic() - started
+
+    for _ in range(2):
+        await bucket.acquire()
+    total = time.monotonic() - started
+
+    assert burst < 0.02
+    assert 0.08 <= total < 0.3
+
+
+@pytest.mark.asyncio
+async def test_requests_to_one_chat_keep_order():
+    scheduler = TelegramSendScheduler(global_rate=100, chat_rate=50, chat_burst=1)
+    sent = []
+
+    async def send(n: int):
+        sent.append(n)
+        return n
+
+    results = await scheduler.run_many((1, lambda n=n: send(n)) for n in range(10))
+
+    assert results == list(range(10))
+    assert sent == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_all_chats():
+    scheduler = TelegramSendScheduler(global_rate=100, chat_rate=100, chat_burst=10)
+    flaky = FlakyRequest(failures=1)
+    other_chat_sent = []
+
+    async def send_other():
+        other_chat_sent.append(time.monotonic())
+        return "other"
+
+    started = time.monotonic()
+    flaky_task = asyncio.create_task(scheduler.run(1, flaky))
+    await asyncio.sleep(0.05)
+    # Пауза, запрошенная Telegram, действует на весь бот, а не только на чат, получивший ошибку
+    assert await scheduler.run(2, send_other) == "other"
+
+    assert await flaky_task == "sent"
+    assert len(flaky.calls) == 2
+    assert flaky.calls[1] - started >= 1
+    assert other_chat_sent[0] - started >= 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_gives_up_after_max_retries():
+    scheduler = TelegramSendScheduler(global_rate=100, chat_rate=100, chat_burst=10, max_retries=1)
+    flaky = FlakyRequest(failures=5)
+
+    results = await scheduler.run_many([(1, flaky), (2, FlakyRequest(failures=0))])
+
+    assert isinstance(results[0], TelegramRetryAfter)
+    assert results[1] == "sent"
+    assert len(flaky.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_chat_buckets_are_dropped():
+    scheduler = TelegramSendScheduler(global_rate=100, chat_rate=100, chat_burst=1, max_idle_chats=2)
+
+    async def send():
+        return "sent"
+
+    for chat_id in range(2):
+        await scheduler.run(chat_id, send)
+    await asyncio.sleep(0.05)
+    await scheduler.run(2, send)
+
+    assert list(scheduler._chat_buckets) == [2]
@@ -0,0 +1,142 @@
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from aiogram.types import Update
+
+from app.redis.custom_redis import CustomRedis
+from app.redis.update_queue import UpdateQueue
+from config import bot
+from tests.conftest import TEST_KEY_PREFIX
+
+
+CHAT_ID = 42
+
+
+def make_update(update_id: int) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {"message_id": update_id, "date": 0, "text": f"message {update_id}",
+                    "chat": {"id": CHAT_ID, "type": "private"}},
+    })
+
+
+class RecordingDispatcher:
+    """Вместо роутеров бота запоминает ID обработанных обновлений."""
+
+    def __init__(self, on_update=None):
+        self.processed: list[int] = []
+        self.on_update = on_update
+
+    async def feed_update(self, bot, update: Update):
+        if self.on_update is not None:
+            await self.on_update(update)
+        self.processed.append(update.update_id)
+
+
+@pytest_asyncio.fixture(scope="function")
+async def queue(redis: CustomRedis):
+    queue = UpdateQueue(redis=redis, partitions=1, prefix=f"{TEST_KEY_PREFIX}updates")
+    queue.block_ms = 50
+    queue.lease_ttl_ms = 300
+    await queue._ensure_groups()
+    return queue
+
+
+async def take_lease(queue: UpdateQueue, token: str | None = None) -> str:
+    token = token or uuid.uuid4().hex
+    assert await queue.redis.set(queue._lease_key(0), token, px=queue.lease_ttl_ms)
+    return token
+
+
+@pytest.mark.asyncio
+async def test_duplicate_delivery_is_enqueued_once(queue: UpdateQueue):
+    assert await queue.enqueue(make_update(1)) is True
+    assert await queue.enqueue(make_update(1)) is False
+
+    assert await queue.redis.xlen(queue._stream_key(0)) == 1
+
+
+@pytest.mark.asyncio
+async def test_pending_entries_are_replayed_in_order(queue: UpdateQueue):
+    for update_id in range(1, 4):
+        await queue.enqueue(make_update(update_id))
+
+    # Прежний арендатор прочитал записи и упал, не подтвердив их
+    await queue.redis.xreadgroup(queue.group, "partition-0", {queue._stream_key(0): ">"}, count=10)
+    await queue.enqueue(make_update(4))
+
+    dp = RecordingDispatcher()
+    await queue._drain_partition(dp, bot, 0, await take_lease(queue))
+
+    assert dp.processed == [1, 2, 3, 4]
+    assert await queue.redis.xlen(queue._stream_key(0)) == 0
+    assert (await queue.redis.xpending(queue._stream_key(0), queue.group))["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_stops_drain_before_next_entry(queue: UpdateQueue):
+    for update_id in range(1, 4):
+        await queue.enqueue(make_update(update_id))
+
+    new_token = uuid.uuid4().hex
+
+    async def slow_first_update(update: Update):
+        if update.update_id == 1:
+            # Аренда истекла во время долгой обработки, и раздел взял другой обработчик
+            await take_lease(queue, new_token)
+            await asyncio.sleep(queue.lease_ttl_ms / 1000)
+
+    old_dp = RecordingDispatcher(on_update=slow_first_update)
+    await asyncio.wait_for(queue._drain_partition(old_dp, bot, 0, uuid.uuid4().hex), timeout=2)
+
+    assert old_dp.processed == [1]
+
+    new_dp = RecordingDispatcher()
+    await queue._drain_partition(new_dp, bot, 0, new_token)
+
+    assert new_dp.processed == [2, 3]
+    assert await queue.redis.xlen(queue._stream_key(0)) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_update_does_not_block_partition(queue: UpdateQueue):
+    for update_id in range(1, 4):
+        await queue.enqueue(make_update(update_id))
+
+    async def fail_second_update(update: Update):
+        if update.update_id == 2:
+            raise RuntimeError("handler failed")
+
+    dp = RecordingDispatcher(on_update=fail_second_update)
+    await queue._drain_partition(dp, bot, 0, await take_lease(queue))
+
+    assert dp.processed == [1, 3]
+    assert await queue.redis.xlen(queue._stream_key(0)) == 0
+
+
+@pytest.mark.asyncio
+async def test_trimmed_pending_entry_does_not_block_partition(queue: UpdateQueue, monkeypatch):
+    for update_id in range(1, 4):
+        await queue.enqueue(make_update(update_id))
+
+    # Запись прочитана, но до подтверждения поток обрезан: в ответе на чтение "0" у нее нет полей
+    await queue.redis.xreadgroup(queue.group, "partition-0", {queue._stream_key(0): ">"}, count=1)
+    await queue.redis.xtrim(queue._stream_key(0), maxlen=2, approximate=False)
+    await queue.enqueue(make_update(4))
+
+    read_group = queue.redis.xreadgroup
+
+    async def xreadgroup(*args, **kwargs):
+        # Redis отдает вместо полей удаленной записи nil (redis-py - None), эмуляторы - пустой словарь
+        response = await read_group(*args, **kwargs)
+        return [[stream, [(entry_id, fields or None) for entry_id, fields in entries]] for stream, entries in response]
+
+    monkeypatch.setattr(queue.redis, "xreadgroup", xreadgroup)
+    dp = RecordingDispatcher()
+    await asyncio.wait_for(queue._drain_partition(dp, bot, 0, await take_lease(queue)), timeout=2)
+
+    assert dp.processed == [2, 3, 4]
+    assert await queue.redis.xlen(queue._stream_key(0)) == 0
+    assert (await queue.redis.xpending(queue._stream_key(0), queue.group))["pending"] == 0